@@ -0,0 +1,15 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Benchmarks for the hot paths of the library.
+
+Each `bench_*` module defines some benchmarks, which are run with:
+
+```sh
+python -m benchmarks [--update-baseline] [NAME_PATTERN...]
+```
+
+The results are compared against the baseline stored in `benchmarks/baseline.json`
+and the run fails if any benchmark got slower than the allowed tolerance. The
+`benchmarks` nox session runs them in a clean environment.
+"""
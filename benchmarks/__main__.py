@@ -0,0 +1,10 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Run the benchmarks and compare them against the stored baseline."""
+
+import sys
+
+from ._runner import main
+
+sys.exit(main())
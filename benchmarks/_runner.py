@@ -0,0 +1,372 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Run the benchmarks and compare them against a stored baseline.
+
+Times are normalized by the time of a fixed calibration workload measured in the same
+run, so baselines recorded in one machine are still meaningful (within the tolerance)
+in a faster or slower machine.
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import fnmatch
+import importlib
+import json
+import pathlib
+import pkgutil
+import platform
+import sys
+import timeit
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any
+
+Setup = Callable[[], contextlib.AbstractContextManager[Callable[[], object]]]
+"""A function preparing a benchmark, providing the function to time."""
+
+DEFAULT_BASELINE = pathlib.Path(__file__).with_name("baseline.json")
+"""The file where the baseline is stored."""
+
+DEFAULT_TOLERANCE = 0.5
+"""How much slower than the baseline a benchmark can be before it is a regression."""
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Benchmark:
+    """A benchmark."""
+
+    name: str
+    """The name of the benchmark."""
+
+    description: str
+    """What is being measured."""
+
+    setup: Setup
+    """The function preparing the benchmark and providing the function to time."""
+
+    repeat: int = 5
+    """How many times to measure the benchmark (the fastest time is used)."""
+
+    number: int | None = None
+    """How many calls to make per measure, or `None` to calibrate it automatically."""
+
+
+def benchmark(
+    name: str, *, repeat: int = 5, number: int | None = None
+) -> Callable[[Setup], Benchmark]:
+    """Make a benchmark from a setup function.
+
+    The setup function must be a context manager providing the function to time, so it
+    can prepare and clean up any data needed by the benchmark. The first line of its
+    docstring is used as the benchmark description.
+
+    Args:
+        name: The name of the benchmark.
+        repeat: How many times to measure the benchmark (the fastest time is used).
+        number: How many calls to make per measure, or `None` to calibrate it
+            automatically.
+
+    Returns:
+        A decorator making a benchmark from a setup function.
+    """
+
+    def decorator(setup: Setup) -> Benchmark:
+        return Benchmark(
+            name=name,
+            description=(setup.__doc__ or name).strip().splitlines()[0],
+            setup=setup,
+            repeat=repeat,
+            number=number,
+        )
+
+    return decorator
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Result:
+    """The result of running a benchmark."""
+
+    seconds: float
+    """The time per call, in seconds."""
+
+    relative: float
+    """The time per call relative to the calibration workload."""
+
+
+def collect() -> list[Benchmark]:
+    """Collect all the benchmarks defined in the `bench_*` modules.
+
+    Returns:
+        The benchmarks, sorted by name.
+    """
+    benchmarks: list[Benchmark] = []
+    for module_info in pkgutil.iter_modules([str(pathlib.Path(__file__).parent)]):
+        if not module_info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"{__package__}.{module_info.name}")
+        benchmarks.extend(v for v in vars(module).values() if isinstance(v, Benchmark))
+    return sorted(benchmarks, key=lambda b: b.name)
+
+
+def measure(func: Callable[[], object], *, repeat: int, number: int | None) -> float:
+    """Measure the time a function takes.
+
+    Args:
+        func: The function to measure.
+        repeat: How many times to measure the function (the fastest time is used).
+        number: How many calls to make per measure, or `None` to make enough calls to
+            take at least 0.2 seconds.
+
+    Returns:
+        The fastest time per call, in seconds.
+    """
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _calibration_workload() -> None:
+    """Run a fixed pure Python workload, similar to the benchmarked code."""
+    items = [f"v{i % 37}.{i % 11}.{i % 7}" for i in range(2000)]
+    parsed = {item: tuple(int(p) for p in item[1:].split(".")) for item in items}
+    sorted(parsed.items(), key=lambda item: item[1])
+
+
+def calibrate() -> float:
+    """Measure the calibration workload.
+
+    Returns:
+        The time the calibration workload takes, in seconds.
+    """
+    return measure(_calibration_workload, repeat=5, number=None)
+
+
+def run(benchmarks: Sequence[Benchmark]) -> tuple[float, dict[str, Result]]:
+    """Run some benchmarks.
+
+    Args:
+        benchmarks: The benchmarks to run.
+
+    Returns:
+        The time of the calibration workload and the result of each benchmark.
+    """
+    calibrations: list[float] = []
+    results: dict[str, Result] = {}
+    for bench in benchmarks:
+        # Calibrate right before each benchmark, so if the machine gets busier or
+        # slower during the run, both are affected the same way
+        calibrations.append(calibrate())
+        with bench.setup() as func:
+            seconds = measure(func, repeat=bench.repeat, number=bench.number)
+        results[bench.name] = Result(
+            seconds=seconds, relative=seconds / calibrations[-1]
+        )
+        print(f"{bench.name}: {_format_seconds(seconds)}", file=sys.stderr)
+    calibration = min(calibrations, default=calibrate())
+    return calibration, results
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Comparison:
+    """The comparison of a benchmark result against the baseline."""
+
+    name: str
+    """The name of the benchmark."""
+
+    result: Result
+    """The result of the benchmark."""
+
+    baseline: Result | None
+    """The result in the baseline, or `None` if the benchmark has no baseline."""
+
+    @property
+    def ratio(self) -> float | None:
+        """How many times slower than the baseline the benchmark is, if known."""
+        if self.baseline is None:
+            return None
+        return self.result.relative / self.baseline.relative
+
+    def is_regression(self, tolerance: float) -> bool:
+        """Tell whether the benchmark is slower than the baseline.
+
+        Args:
+            tolerance: How much slower than the baseline the benchmark can be (`0.3`
+                means 30% slower).
+
+        Returns:
+            Whether the benchmark is slower than the baseline plus the tolerance.
+        """
+        ratio = self.ratio
+        return ratio is not None and ratio > 1 + tolerance
+
+
+def compare(
+    results: dict[str, Result], baseline: dict[str, Result]
+) -> list[Comparison]:
+    """Compare some results against the baseline.
+
+    Args:
+        results: The results of the benchmarks.
+        baseline: The results stored in the baseline.
+
+    Returns:
+        The comparison of each result.
+    """
+    return [
+        Comparison(name=name, result=result, baseline=baseline.get(name))
+        for name, result in results.items()
+    ]
+
+
+def load_baseline(path: pathlib.Path) -> dict[str, Result]:
+    """Load the baseline.
+
+    Args:
+        path: The file where the baseline is stored.
+
+    Returns:
+        The results stored in the baseline, or no results if the file doesn't exist.
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    return {name: Result(**result) for name, result in data["benchmarks"].items()}
+
+
+def save_results(
+    path: pathlib.Path, calibration: float, results: dict[str, Result]
+) -> None:
+    """Save the results of the benchmarks, in the baseline format.
+
+    Args:
+        path: The file where to save the results.
+        calibration: The time of the calibration workload.
+        results: The results of the benchmarks.
+    """
+    data: dict[str, Any] = {
+        "python": platform.python_version(),
+        "calibration": calibration,
+        "benchmarks": {
+            name: dataclasses.asdict(result) for name, result in sorted(results.items())
+        },
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def _format_seconds(seconds: float) -> str:
+    """Format a time for humans.
+
+    Args:
+        seconds: The time to format, in seconds.
+
+    Returns:
+        The formatted time.
+    """
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def _report(comparisons: Sequence[Comparison], tolerance: float) -> Iterator[str]:
+    """Make a report of the comparisons.
+
+    Args:
+        comparisons: The comparisons to report.
+        tolerance: How much slower than the baseline a benchmark can be.
+
+    Yields:
+        The lines of the report.
+    """
+    width = max((len(c.name) for c in comparisons), default=0)
+    for comparison in comparisons:
+        ratio = comparison.ratio
+        if ratio is None:
+            status = "no baseline"
+        else:
+            status = f"{ratio - 1:+.0%}"
+            if comparison.is_regression(tolerance):
+                status += " REGRESSION"
+        yield (
+            f"{comparison.name:<{width}}  "
+            f"{_format_seconds(comparison.result.seconds):>9}  {status}"
+        )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the benchmarks and compare them against the baseline.
+
+    Args:
+        argv: The command-line arguments (without the program name).
+
+    Returns:
+        The exit code, 1 if there were regressions or 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "--baseline",
+        type=pathlib.Path,
+        default=DEFAULT_BASELINE,
+        help="the file where the baseline is stored (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="how much slower than the baseline a benchmark can be "
+        "(default: %(default)s, i.e. 50%% slower)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store the results as the new baseline instead of comparing them",
+    )
+    parser.add_argument(
+        "--output",
+        type=pathlib.Path,
+        help="also save the results to this file, in the baseline format",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="list the benchmarks and exit"
+    )
+    parser.add_argument(
+        "patterns",
+        nargs="*",
+        metavar="NAME_PATTERN",
+        help="only run the benchmarks matching these (shell-style) patterns",
+    )
+    args = parser.parse_args(argv)
+
+    benchmarks = [
+        b
+        for b in collect()
+        if not args.patterns or any(fnmatch.fnmatch(b.name, p) for p in args.patterns)
+    ]
+    if args.list:
+        for bench in benchmarks:
+            print(f"{bench.name}: {bench.description}")
+        return 0
+
+    calibration, results = run(benchmarks)
+    if args.output:
+        save_results(args.output, calibration, results)
+    if args.update_baseline:
+        # Keep the baseline of the benchmarks that were not run
+        results = {**load_baseline(args.baseline), **results}
+        save_results(args.baseline, calibration, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    comparisons = compare(results, load_baseline(args.baseline))
+    print(*_report(comparisons, args.tolerance), sep="\n")
+    regressions = [c for c in comparisons if c.is_regression(args.tolerance)]
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) are more than {args.tolerance:.0%} "
+            "slower than the baseline"
+        )
+        return 1
+    return 0
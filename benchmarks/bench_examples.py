@@ -0,0 +1,112 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Benchmarks for linting the code examples in docstrings."""
+
+import contextlib
+import os
+import pathlib
+import sys
+import tempfile
+from collections.abc import Callable, Iterator
+
+from sybil import Sybil
+
+from frequenz.repo.config.pytest.examples import get_sybil_arguments
+
+from ._runner import benchmark
+
+
+def _module(examples: int) -> str:
+    """Make the source of a module with many code examples in its docstrings.
+
+    Args:
+        examples: The number of code examples.
+
+    Returns:
+        The source of the module.
+    """
+    functions = [
+        f'''
+def function_{i}(value: int) -> int:
+    """Return the value plus {i}.
+
+    Example:
+        ```python
+        VALUE = 3
+        assert VALUE + {i} == {i + 3}
+        ```
+
+    Args:
+        value: The value.
+
+    Returns:
+        The value plus {i}.
+    """
+    return value + {i}
+'''
+        for i in range(examples)
+    ]
+    return '"""A module with many code examples."""\n' + "\n".join(functions)
+
+
+@contextlib.contextmanager
+def _module_file(examples: int) -> Iterator[pathlib.Path]:
+    """Write a module with many code examples in a temporary project.
+
+    The module is written in a package inside a namespace package, in a `src`
+    directory, like in the projects using the linter. The project directory is used as
+    the working directory, and the module is made importable both by Sybil (which
+    imports it before evaluating the examples) and pylint (which is run as a
+    subprocess).
+
+    Args:
+        examples: The number of code examples.
+
+    Yields:
+        The path of the module, relative to the working directory.
+    """
+    package = f"examples_{examples}"
+    with tempfile.TemporaryDirectory() as tmp, contextlib.chdir(tmp):
+        path = pathlib.Path("src", "namespace", package, "module.py")
+        path.parent.mkdir(parents=True)
+        (path.parent / "__init__.py").touch()
+        path.write_text(_module(examples), encoding="utf-8")
+        old_path = sys.path[:]
+        old_pythonpath = os.environ.get("PYTHONPATH")
+        sys.path.insert(0, str(path.parent.parent.absolute()))
+        os.environ["PYTHONPATH"] = str(path.parent.parent.parent.absolute())
+        try:
+            yield path
+        finally:
+            sys.path[:] = old_path
+            if old_pythonpath is None:
+                del os.environ["PYTHONPATH"]
+            else:
+                os.environ["PYTHONPATH"] = old_pythonpath
+            sys.modules.pop(f"{package}.module", None)
+            sys.modules.pop(package, None)
+
+
+@benchmark("examples.parse")
+@contextlib.contextmanager
+def parse() -> Iterator[Callable[[], object]]:
+    """Extract the code examples of a module with 500 examples."""
+    sybil = Sybil(**get_sybil_arguments())
+    with _module_file(500) as path:
+        yield lambda: list(sybil.parse(path.absolute()))
+
+
+@benchmark("examples.lint", repeat=2, number=1)
+@contextlib.contextmanager
+def lint() -> Iterator[Callable[[], object]]:
+    """Lint the code examples of a module with 3 examples."""
+    sybil = Sybil(**get_sybil_arguments())
+    with _module_file(3) as path:
+        examples = list(sybil.parse(path.absolute()))
+
+        def evaluate() -> None:
+            for example in examples:
+                example.evaluate()
+
+        yield evaluate
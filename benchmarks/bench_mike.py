@@ -0,0 +1,52 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Benchmarks for building and sorting `mike`'s versions."""
+
+import contextlib
+import random
+from collections.abc import Callable, Iterator
+
+from frequenz.repo.config.mkdocs.mike import build_mike_versions, sort_mike_versions
+from frequenz.repo.config.version import RepoVersionIndex
+
+from ._runner import benchmark
+from .bench_version import _branches, _tags
+
+
+def _versions() -> list[str]:
+    """Make the versions of a large `versions.json` file.
+
+    Returns:
+        About 2000 versions, including versions that are not releases, in random
+            order.
+    """
+    versions = [
+        f"v{major}.{minor}{suffix}"
+        for major in range(30)
+        for minor in range(20)
+        for suffix in ("", "-pre", "-dev")
+    ]
+    versions.extend(f"pr-{i}" for i in range(200))
+    versions.extend(["latest", "next"])
+    random.Random(42).shuffle(versions)
+    return versions
+
+
+@benchmark("mike.sort_mike_versions")
+@contextlib.contextmanager
+def sort_versions() -> Iterator[Callable[[], object]]:
+    """Sort the versions of a large `versions.json` file."""
+    versions = _versions()
+    yield lambda: sort_mike_versions(list(versions))
+
+
+@benchmark("mike.build_mike_versions")
+@contextlib.contextmanager
+def build_versions() -> Iterator[Callable[[], object]]:
+    """Build the mike versions of all the refs of a repository with a long history."""
+    tags = _tags()
+    branches = _branches()
+    refs = {f"refs/tags/{tag}": "sha" for tag in tags}
+    refs.update({f"refs/heads/{branch}": "sha" for branch in branches})
+    yield lambda: build_mike_versions(RepoVersionIndex(tags, branches), refs)
@@ -0,0 +1,73 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Benchmarks for finding packages in a source tree."""
+
+import contextlib
+import os
+import pathlib
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+
+from frequenz.repo.config.nox.util import find_toplevel_package_dirs
+
+from ._runner import benchmark
+
+
+def _make_tree(root: pathlib.Path) -> None:
+    """Make a deep source tree.
+
+    The tree has about 1500 plain directories, nested 5 levels deep, with a package
+    (with sub-packages) at each leaf, and a pruned directory with 500 more directories.
+
+    Args:
+        root: The directory where to make the tree.
+    """
+    leaves = [root / "src" / f"group{i}" for i in range(4)]
+    for _ in range(5):
+        leaves = [leaf / f"dir{i}" for leaf in leaves for i in range(3)]
+    for leaf in leaves:
+        package = leaf / "pkg"
+        (package / "sub").mkdir(parents=True)
+        (package / "__init__.py").touch()
+        (package / "module.py").touch()
+        (package / "sub" / "__init__.py").touch()
+        (leaf.parent / "data.txt").touch()
+    for i in range(500):
+        (root / "src" / ".mypy_cache" / f"dir{i}").mkdir(parents=True)
+
+
+@contextlib.contextmanager
+def _tree() -> Iterator[pathlib.Path]:
+    """Make a deep source tree in a temporary directory.
+
+    Yields:
+        The root of the tree.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        root = pathlib.Path(tmp)
+        _make_tree(root)
+        yield root
+
+
+@benchmark("packages.find_toplevel_package_dirs")
+@contextlib.contextmanager
+def find_packages() -> Iterator[Callable[[], object]]:
+    """Find the top-level packages in a deep source tree."""
+    with _tree() as root:
+        yield lambda: find_toplevel_package_dirs(root / "src", root=root)
+
+
+@benchmark("packages.find_toplevel_package_dirs_indexed")
+@contextlib.contextmanager
+def find_packages_indexed() -> Iterator[Callable[[], object]]:
+    """Find the top-level packages in a deep source tree using an up to date index."""
+    with _tree() as root:
+        # Directories modified too recently are always scanned again, as changes in
+        # the same clock tick could go unnoticed, so the tree is made to look older
+        old = time.time_ns() - 60_000_000_000
+        for directory, _, _ in os.walk(root):
+            os.utime(directory, ns=(old, old))
+        index = root / "index.json"
+        yield lambda: find_toplevel_package_dirs(root / "src", root=root, index=index)
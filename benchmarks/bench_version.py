@@ -0,0 +1,135 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Benchmarks for getting information about repository versions."""
+
+import contextlib
+import operator
+import random
+from collections.abc import Callable, Iterator
+
+from frequenz.repo.config import version
+from frequenz.repo.config.version import BranchVersion, RepoVersionInfo
+
+from ._runner import benchmark
+
+_MAJORS = 30
+_MINORS = 20
+_PATCHES = 5
+
+
+def _tags() -> list[str]:
+    """Make the tags of a repository with a long history.
+
+    Returns:
+        About 3600 tags, including pre-releases, in random order.
+    """
+    tags = [
+        f"v{major}.{minor}.{patch}"
+        for major in range(_MAJORS)
+        for minor in range(_MINORS)
+        for patch in range(_PATCHES)
+    ]
+    tags.extend(
+        f"v{major}.{minor}.0-rc.{rc}"
+        for major in range(_MAJORS)
+        for minor in range(_MINORS)
+        for rc in (1, 2)
+    )
+    tags.extend(f"not-a-version-{i}" for i in range(100))
+    random.Random(42).shuffle(tags)
+    return tags
+
+
+def _branches() -> list[str]:
+    """Make the branches of a repository with a long history.
+
+    Returns:
+        About 2000 branches, including branches not following the version scheme, in
+            random order.
+    """
+    branches = [f"v{major}.x.x" for major in range(_MAJORS)]
+    branches.extend(
+        f"v{major}.{minor}.x" for major in range(_MAJORS) for minor in range(_MINORS)
+    )
+    branches.extend(f"dependabot/pip/package-{i}" for i in range(700))
+    branches.extend(f"feature-{i}" for i in range(700))
+    random.Random(42).shuffle(branches)
+    return branches
+
+
+@benchmark("version.repo_version_info")
+@contextlib.contextmanager
+def repo_version_info() -> Iterator[Callable[[], object]]:
+    """Create a `RepoVersionInfo` with thousands of tags and branches."""
+    tags = _tags()
+    branches = _branches()
+    yield lambda: RepoVersionInfo("sha", "refs/tags/v12.3.4", tags, branches)
+
+
+@benchmark("version.parse_uncached")
+@contextlib.contextmanager
+def parse_uncached() -> Iterator[Callable[[], object]]:
+    """Parse and sort 10000 tags and 2000 branches not seen before."""
+    tags = [f"{tag}-{i}" for i, tag in enumerate(_tags() * 3)][:10000]
+    branches = _branches()
+
+    def parse() -> object:
+        # pylint: disable-next=protected-access
+        version._to_semver.cache_clear()
+        # pylint: disable-next=protected-access
+        version._parse_branch.cache_clear()
+        return RepoVersionInfo("sha", "refs/tags/v12.3.4", tags, branches)
+
+    yield parse
+
+
+@benchmark("version.tag_queries")
+@contextlib.contextmanager
+def tag_queries() -> Iterator[Callable[[], object]]:
+    """Query a `RepoVersionInfo` at a tag, with thousands of tags and branches."""
+    info = RepoVersionInfo("sha", "refs/tags/v12.3.4", _tags(), _branches())
+
+    def queries() -> object:
+        return (
+            info.find_last_tag(),
+            info.find_next_breaking_branch(),
+            info.is_tag_last_minor_for_major(),
+            info.is_tag_latest(),
+        )
+
+    yield queries
+
+
+@benchmark("version.branch_queries")
+@contextlib.contextmanager
+def branch_queries() -> Iterator[Callable[[], object]]:
+    """Query a `RepoVersionInfo` at a branch, with thousands of tags and branches."""
+    info = RepoVersionInfo("sha", "refs/heads/v12.x.x", _tags(), _branches())
+
+    def queries() -> object:
+        return (
+            info.find_last_tag(),
+            info.find_next_breaking_branch(),
+            info.find_next_minor_for_major_branch(),
+            info.is_branch_latest(),
+        )
+
+    yield queries
+
+
+@benchmark("version.sort_branches")
+@contextlib.contextmanager
+def sort_branches() -> Iterator[Callable[[], object]]:
+    """Sort and find the biggest of thousands of parsed branches."""
+    branches = [
+        BranchVersion(major=major, minor=minor, name=f"v{major}.{minor}.x")
+        for major in range(100)
+        for minor in range(50)
+    ]
+    branches.extend(
+        BranchVersion(major=major, name=f"v{major}.x.x") for major in range(100)
+    )
+    random.Random(42).shuffle(branches)
+    key = operator.attrgetter("sort_key")
+    yield lambda: (sorted(branches, key=key), max(branches, key=key))
@@ -3,6 +3,7 @@
 
 """Configuration file for nox."""
 
+import nox as _nox
 from frequenz.repo.config import nox
 from frequenz.repo.config.nox import default
 
@@ -14,3 +15,18 @@ config.extra_paths.extend(
     ]
 )
 nox.configure(config)
+
+
+@_nox.session
+def benchmarks(session: _nox.Session) -> None:
+    """Run the benchmarks and compare them against the stored baseline.
+
+    The session fails if any benchmark got slower than the baseline. Extra arguments
+    are passed to the benchmarks runner, for example use
+    `nox -e benchmarks -- --update-baseline` to store the results as the new baseline.
+
+    Args:
+        session: The nox session.
+    """
+    session.install("-e", ".[dev-pytest]")
+    session.run("python", "-m", "benchmarks", *session.posargs)
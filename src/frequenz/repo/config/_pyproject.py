@@ -0,0 +1,126 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""A cached model of the `pyproject.toml` file.
+
+The file is parsed only once per process, and parsed again only when its modification
+time or size change, so it can be read cheaply from anywhere it is needed.
+
+As file systems store modification times with a limited resolution, a file modified
+right before it was parsed could be modified again without changing its modification
+time, so (like git does with its index) such results are not cached.
+"""
+
+import dataclasses
+import os
+import pathlib
+import threading
+import time
+import tomllib
+from collections.abc import Mapping
+from typing import Any
+
+DEFAULT_BUILD_REQUIRES = ("setuptools>=40.8.0",)
+"""The build requirements used when `pyproject.toml` doesn't specify them (PEP 518)."""
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class PyProject:
+    """The contents of a `pyproject.toml` file.
+
+    The parsed data is shared by all users of the cache, so it must not be modified.
+    """
+
+    path: pathlib.Path
+    """The path of the file."""
+
+    data: Mapping[str, Any]
+    """The parsed TOML document."""
+
+    @property
+    def project(self) -> Mapping[str, Any]:
+        """The `[project]` table."""
+        project: Mapping[str, Any] = self.data.get("project", {})
+        return project
+
+    @property
+    def build_system(self) -> Mapping[str, Any]:
+        """The `[build-system]` table."""
+        build_system: Mapping[str, Any] = self.data.get("build-system", {})
+        return build_system
+
+    @property
+    def dependencies(self) -> list[str]:
+        """The dependencies of the project."""
+        return list(self.project.get("dependencies", []))
+
+    @property
+    def build_requires(self) -> list[str]:
+        """The requirements of the build system."""
+        return list(self.build_system.get("requires", DEFAULT_BUILD_REQUIRES))
+
+    @property
+    def pytest_testpaths(self) -> list[str]:
+        """The `testpaths` option of pytest."""
+        return list(self.tool("pytest", "ini_options").get("testpaths", []))
+
+    def tool(self, *keys: str) -> Mapping[str, Any]:
+        """Get the configuration of a tool.
+
+        Args:
+            *keys: The keys of the table inside the `[tool]` table, for example
+                `"frequenz-repo-config", "protobuf"` for
+                `[tool.frequenz-repo-config.protobuf]`.
+
+        Returns:
+            The table, or an empty mapping if it is not defined.
+        """
+        table: Mapping[str, Any] = self.data.get("tool", {})
+        for key in keys:
+            table = table.get(key, {})
+        return table
+
+
+_RACY_WINDOW_NS = 2_000_000_000
+"""How recently modified a file can be to cache its contents, in nanoseconds."""
+
+_cache: dict[pathlib.Path, tuple[tuple[int, int], PyProject]] = {}
+_lock = threading.Lock()
+
+
+def load(path: str | os.PathLike[str] = "pyproject.toml", /) -> PyProject:
+    """Load a `pyproject.toml` file, reusing the last result if it didn't change.
+
+    Args:
+        path: The path of the file.
+
+    Returns:
+        The contents of the file.
+
+    Raises:
+        OSError: If the file can't be read.
+        tomllib.TOMLDecodeError: If the file is not valid TOML.
+    """
+    resolved = pathlib.Path(path).resolve()
+    stat = resolved.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _cache.get(resolved)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+    parse_time = time.time_ns()
+    try:
+        with resolved.open("rb") as toml_file:
+            pyproject = PyProject(path=resolved, data=tomllib.load(toml_file))
+    except (OSError, tomllib.TOMLDecodeError):
+        with _lock:
+            _cache.pop(resolved, None)
+        raise
+
+    with _lock:
+        if parse_time - stat.st_mtime_ns > _RACY_WINDOW_NS:
+            _cache[resolved] = (key, pyproject)
+        else:
+            _cache.pop(resolved, None)
+    return pyproject
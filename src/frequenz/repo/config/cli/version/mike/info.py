@@ -4,9 +4,10 @@
 """Command-line tool to get the current `mike` version information of a repository.
 
 For now this tool is designed to be used in GitHub Actions workflows, but is is possible
-to use it in other environments as well. To do so the `gh` tool should be properly
-configured and have at least read-access to the repository, and the following environment
-variables should be set:
+to use it in other environments as well. To do so a token with at least read-access to
+the repository should be available (in the `GITHUB_TOKEN` or `GH_TOKEN` environment
+variables, or from a logged in `gh` tool) unless the repository is public, and the
+following environment variables should be set:
 
 - `GITHUB_REPO`: The repository to get the version information of (e.g.
   `frequenz-floss/frequenz-sdk-python`).
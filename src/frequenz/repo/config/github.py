@@ -10,16 +10,23 @@
 - [`get_tags()`][frequenz.repo.config.github.get_tags] to get the tags of a repository.
 - [`get_branches()`][frequenz.repo.config.github.get_branches] to get the branches of a
     repository.
+- [`get_tags_and_branches()`][frequenz.repo.config.github.get_tags_and_branches] to get
+    the tags and branches of a repository concurrently.
 - [`configure_logging()`][frequenz.repo.config.github.configure_logging] to configure
     logging for GitHub Actions.
 """
 
-
+import concurrent.futures
+import json
 import logging
 import os
+import re
 import subprocess
 import sys
-from typing import NoReturn
+import urllib.parse
+import urllib.request
+from collections.abc import Callable
+from typing import Literal, NoReturn
 
 import github_action_utils as gha
 
@@ -27,6 +34,17 @@ from . import version
 
 _logger = logging.getLogger(__name__)
 
+DEFAULT_API_URL = "https://api.github.com"
+"""The URL of the GitHub REST API, used if `GITHUB_API_URL` is not defined."""
+
+_PER_PAGE = 100
+"""How many items to request per page (the maximum allowed by the GitHub API)."""
+
+_TIMEOUT = 30.0
+"""How long to wait for each request to the GitHub API, in seconds."""
+
+_link_re: re.Pattern[str] = re.compile(r'<([^>]*)>\s*;\s*rel="([^"]*)"')
+
 
 class GitHubActionsFormatter(logging.Formatter):
     """A formatter for GitHub Actions."""
@@ -109,13 +127,129 @@ def require_env(name: str) -> str:
     return value
 
 
+def _api_token() -> str | None:
+    """Get the token to authenticate to the GitHub API.
+
+    The token is taken from the `GITHUB_TOKEN` or `GH_TOKEN` environment variables, or
+    from the GitHub `gh` CLI tool if it is installed and logged in.
+
+    Returns:
+        The token, or `None` if there is none (only public repositories can be
+            accessed then).
+    """
+    if token := os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN"):
+        return token
+    try:
+        gh_token = subprocess.check_output(
+            ["gh", "auth", "token"], stderr=subprocess.DEVNULL
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return gh_token.decode("utf-8").strip() or None
+
+
+def _next_page(link_header: str | None) -> str | None:
+    """Get the URL of the next page from a `Link` header.
+
+    Args:
+        link_header: The value of the `Link` header of a response.
+
+    Returns:
+        The URL of the next page, or `None` if it was the last page.
+    """
+    for url, rel in _link_re.findall(link_header or ""):
+        if "next" in rel.split():
+            return str(url)
+    return None
+
+
+def _same_origin(url: str, other_url: str) -> bool:
+    """Check if two URLs have the same scheme and host.
+
+    Args:
+        url: The URL to check.
+        other_url: The URL to compare with.
+
+    Returns:
+        Whether both URLs have the same scheme and host (including the port).
+    """
+    parts, other_parts = urllib.parse.urlsplit(url), urllib.parse.urlsplit(other_url)
+    return (parts.scheme.lower(), parts.netloc.lower()) == (
+        other_parts.scheme.lower(),
+        other_parts.netloc.lower(),
+    )
+
+
+def _get_ref_names(
+    repository: str, kind: Literal["tags", "branches"], token: str | None
+) -> list[str]:
+    """Get the names of all the tags or branches of a repository from the GitHub API.
+
+    All the pages are fetched, following the `Link` headers of the responses. The
+    token is only sent to URLs with the same scheme and host as the API URL.
+
+    Args:
+        repository: The repository (e.g. `frequenz-floss/frequenz-sdk-python`).
+        kind: Whether to get the tags or the branches.
+        token: The token to authenticate to the API, if any.
+
+    Returns:
+        The names of the tags or branches.
+    """
+    api_url = os.environ.get("GITHUB_API_URL") or DEFAULT_API_URL
+    headers = {
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+    auth_headers = {**headers, "Authorization": f"Bearer {token}"} if token else headers
+
+    names: list[str] = []
+    url: str | None = (
+        f"{api_url.rstrip('/')}/repos/{repository}/{kind}?per_page={_PER_PAGE}"
+    )
+    while url is not None:
+        _logger.debug("Getting %s from %s", kind, url)
+        request = urllib.request.Request(
+            url, headers=auth_headers if _same_origin(url, api_url) else headers
+        )
+        with urllib.request.urlopen(request, timeout=_TIMEOUT) as response:
+            names.extend(item["name"] for item in json.load(response))
+            url = _next_page(response.headers.get("Link"))
+    return names
+
+
+def _get_refs(
+    repository: str,
+    kind: Literal["tags", "branches"],
+    get_token: Callable[[], str | None],
+) -> list[str]:
+    """Get the tags or branches of a repository from the environment or the API.
+
+    Args:
+        repository: The repository to get the tags or branches of.
+        kind: Whether to get the tags or the branches.
+        get_token: A function returning the token to authenticate to the API, only
+            called if the API is used.
+
+    Returns:
+        The tags or branches of the repository.
+    """
+    names: list[str]
+    if env_names := os.environ.get(kind.upper(), None):
+        names = env_names.split()
+    else:
+        names = _get_ref_names(repository, kind, get_token())
+    _logger.debug("Got %s: %r", kind, names)
+    return names
+
+
 def get_tags(repository: str) -> list[str]:
     """Get the tags of the repository.
 
     This function uses the `TAGS` environment variable if it is defined. If it is
-    not defined, it uses the GitHub `gh` CLI tool to get them. This means the tool
-    needs to be properly configured and have at least read access over
-    `repository`.
+    not defined, it gets all of them from the GitHub API (see
+    [`get_tags_and_branches()`][frequenz.repo.config.github.get_tags_and_branches]
+    for how the API is accessed).
 
     Args:
         repository: The repository to get the tags of.
@@ -123,39 +257,16 @@ def get_tags(repository: str) -> list[str]:
     Returns:
         The tags of the repository.
     """
-    tags_str: list[str]
-    if env_tags := os.environ.get("TAGS", None):
-        tags_str = env_tags.split()
-    else:
-        tags_str = (
-            subprocess.check_output(
-                [
-                    "gh",
-                    "api",
-                    "-q",
-                    ".[].name",
-                    "-H",
-                    "Accept: application/vnd.github+json",
-                    "-H",
-                    "X-GitHub-Api-Version: 2022-11-28",
-                    f"/repos/{repository}/tags",
-                ]
-            )
-            .decode("utf-8")
-            .splitlines()
-        )
-
-    _logger.debug("Got tags: %r", tags_str)
-    return tags_str
+    return _get_refs(repository, "tags", _api_token)
 
 
 def get_branches(repository: str) -> list[str]:
     """Get the branches of the repository.
 
     This function uses the `BRANCHES` environment variable if it is defined. If it
-    is not defined, it uses the GitHub `gh` CLI tool to get them. This means the
-    tool needs to be properly configured and have at least read access over
-    `repository`.
+    is not defined, it gets all of them from the GitHub API (see
+    [`get_tags_and_branches()`][frequenz.repo.config.github.get_tags_and_branches]
+    for how the API is accessed).
 
     Args:
         repository: The repository to get the branches of.
@@ -163,29 +274,38 @@ def get_branches(repository: str) -> list[str]:
     Returns:
         The branches of the repository.
     """
-    branches_str: list[str]
-    if env_branches := os.environ.get("BRANCHES", None):
-        branches_str = env_branches.split()
-    else:
-        branches_str = (
-            subprocess.check_output(
-                [
-                    "gh",
-                    "api",
-                    "-q",
-                    ".[].name",
-                    "-H",
-                    "Accept: application/vnd.github+json",
-                    "-H",
-                    "X-GitHub-Api-Version: 2022-11-28",
-                    f"/repos/{repository}/branches",
-                ]
-            )
-            .decode("utf-8")
-            .splitlines()
-        )
-    _logger.debug("Got branches: %r", branches_str)
-    return branches_str
+    return _get_refs(repository, "branches", _api_token)
+
+
+def get_tags_and_branches(repository: str) -> tuple[list[str], list[str]]:
+    """Get the tags and branches of the repository concurrently.
+
+    The `TAGS` and `BRANCHES` environment variables are used if they are defined.
+    Otherwise, all the pages of tags and branches are fetched from the GitHub API, with
+    the tags and branches requests made at the same time.
+
+    The API URL is taken from the `GITHUB_API_URL` environment variable (defined in
+    GitHub Actions), or
+    [`DEFAULT_API_URL`][frequenz.repo.config.github.DEFAULT_API_URL] if it is not
+    defined. Requests are authenticated with the `GITHUB_TOKEN` or `GH_TOKEN`
+    environment variables, or with the token of the GitHub `gh` CLI tool if it is
+    logged in, which needs to have at least read access over `repository`. The token
+    is only sent to the host of the API URL, not to other hosts the API could link
+    to.
+
+    Args:
+        repository: The repository to get the tags and branches of.
+
+    Returns:
+        The tags and the branches of the repository.
+    """
+    token: str | None = None
+    if not (os.environ.get("TAGS") and os.environ.get("BRANCHES")):
+        token = _api_token()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        tags = executor.submit(_get_refs, repository, "tags", lambda: token)
+        branches = executor.submit(_get_refs, repository, "branches", lambda: token)
+        return tags.result(), branches.result()
 
 
 def configure_logging(level: int | None = None) -> None:
@@ -219,19 +339,18 @@ def get_repo_version_info() -> version.RepoVersionInfo:
     variables to get the repository information. If these variables are not
     defined, it raises a `ValueError`.
 
-    It also uses the `BRANCHES` and `TAGS` environment variables to get the
-    branches and tags of the repository. If they are not defined, the GitHub `gh`
-    CLI tool is used to get them. This means the tool needs to be properly
-    configured and have at least read access over `repository`.
+    The branches and tags of the repository are obtained using
+    [`get_tags_and_branches()`][frequenz.repo.config.github.get_tags_and_branches].
 
     Returns:
         The repository version information.
     """
     repository = require_env("GITHUB_REPO")
+    tags, branches = get_tags_and_branches(repository)
     repo_info = version.RepoVersionInfo(
         ref=require_env("GIT_REF"),
         sha=require_env("GIT_SHA"),
-        tags=get_tags(repository),
-        branches=get_branches(repository),
+        tags=tags,
+        branches=branches,
     )
     return repo_info
@@ -6,7 +6,9 @@
 This module provides these tools:
 
 * Building the mike version information from the repository information
-  ([`build_mike_version()`][frequenz.repo.config.mkdocs.mike.build_mike_version]).
+  ([`build_mike_version()`][frequenz.repo.config.mkdocs.mike.build_mike_version]),
+  also for many references at once
+  ([`build_mike_versions()`][frequenz.repo.config.mkdocs.mike.build_mike_versions]).
 * Sorting the mike version information `version.json` file
   ([`sort_mike_versions()`][frequenz.repo.config.mkdocs.mike.sort_mike_versions]).
 * Comparing mike versions
@@ -34,11 +36,15 @@ development versions.
 
 import dataclasses
 import functools
+import logging
 import re
+from collections.abc import Mapping
 
 import semver
 
-from ..version import RepoVersionInfo
+from ..version import RepoVersionIndex, RepoVersionInfo
+
+_logger = logging.getLogger(__name__)
 
 
 @dataclasses.dataclass(frozen=True, kw_only=True)
@@ -136,6 +142,55 @@ def build_mike_version(repo_info: RepoVersionInfo) -> MikeVersionInfo:
     )
 
 
+def build_mike_versions(
+    index: RepoVersionIndex, refs: Mapping[str, str]
+) -> dict[str, MikeVersionInfo]:
+    """Build the mike version information for many references of a repository.
+
+    This is the same as calling
+    [`build_mike_version()`][frequenz.repo.config.mkdocs.mike.build_mike_version] for
+    each reference, but the tags and branches of the repository are only parsed and
+    sorted once, when building the `index`.
+
+    References that can't be converted to a mike version (like branches that don't
+    follow the version scheme) are skipped.
+
+    Example:
+        ```python
+        from frequenz.repo.config.mkdocs.mike import build_mike_versions
+        from frequenz.repo.config.version import RepoVersionIndex
+
+        tags = ["v1.0.0", "v1.1.0", "v2.0.0-rc.1"]
+        branches = ["v1.x.x", "v2.x.x", "feature"]
+        index = RepoVersionIndex(tags, branches)
+        versions = build_mike_versions(
+            index,
+            {
+                **{f"refs/tags/{tag}": "1234567" for tag in tags},
+                **{f"refs/heads/{branch}": "89abcde" for branch in branches},
+            },
+        )
+        assert versions["refs/tags/v1.1.0"].aliases == ["v1", "latest"]
+        assert "refs/heads/feature" not in versions
+        ```
+
+    Args:
+        index: The index of the tags and branches of the repository.
+        refs: The references full path (e.g. `refs/tags/v1.0.0`) mapped to the
+            commit hash they point to.
+
+    Returns:
+        The mike version of each reference that has one, in the same order as `refs`.
+    """
+    versions: dict[str, MikeVersionInfo] = {}
+    for ref, sha in refs.items():
+        try:
+            versions[ref] = build_mike_version(index.info(sha, ref))
+        except ValueError as exc:
+            _logger.debug("Skipping %r: %s", ref, exc)
+    return versions
+
+
 _is_version_re = re.compile(r"^v(\d+).(\d+)(-dev|-pre)?$")
 _stable_to_semver_re = re.compile(r"^v(\d+).(\d+)$")
 _pre_to_semver_re = re.compile(r"^v(\d+).(\d+)-pre$")
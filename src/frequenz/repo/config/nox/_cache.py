@@ -0,0 +1,333 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Caches to avoid repeating work done by previous sessions.
+
+The main one is a content-addressed cache of files that were checked clean by a tool.
+
+Each entry is an empty file named after the hash of the checked file contents and a
+*salt* describing how the file was checked (the tool versions, its command-line options
+and the contents of the configuration files). If any of these change, the key changes
+too, so stale results are never reused.
+
+The cache is bounded in the number of entries, evicting the least recently used
+entries first.
+"""
+
+import hashlib
+import importlib.metadata
+import json
+import logging
+import os
+import pathlib
+import tomllib
+from collections.abc import Iterable
+from typing import Any
+
+import nox
+
+from .. import _pyproject
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY = pathlib.Path(".nox/.check-cache")
+"""The default directory where the cache is stored."""
+
+DEFAULT_MAX_ENTRIES = 50_000
+"""The default maximum number of entries kept in the cache."""
+
+
+def _hash_file(path: pathlib.Path) -> str:
+    """Calculate the hash of the contents of a file.
+
+    Args:
+        path: The file to hash.
+
+    Returns:
+        The hex digest of the file contents, or an empty string if it doesn't exist.
+    """
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return ""
+
+
+def hash_files(paths: Iterable[pathlib.Path], /) -> str:
+    """Calculate a hash of the names and contents of some files.
+
+    Args:
+        paths: The files to hash.
+
+    Returns:
+        The hex digest of the names and contents of all the files.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(f"{path}\0{_hash_file(path)}\0".encode())
+    return digest.hexdigest()
+
+
+def installed_versions(
+    session: nox.Session,
+    distributions: Iterable[str],
+    /,
+    *,
+    plugin_groups: Iterable[str] = (),
+) -> dict[str, str]:
+    """Get the versions of some distributions installed in the session virtualenv.
+
+    The versions are read from the metadata in the virtualenv `site-packages`
+    directory, so no process needs to be started.
+
+    Args:
+        session: The nox session.
+        distributions: The names of the distributions to look for.
+        plugin_groups: Entry point groups used to register plugins. All the
+            distributions providing entry points in any of these groups are included
+            too.
+
+    Returns:
+        A mapping from the distribution name to its version. Distributions that are
+            not installed are mapped to an empty string.
+    """
+    location = getattr(session.virtualenv, "location", None)
+    search_path = (
+        [
+            str(p)
+            for p in pathlib.Path(location).glob("[Ll]ib*/**/site-packages")
+            if p.is_dir()
+        ]
+        if location
+        else []
+    )
+
+    def normalize(name: str) -> str:
+        return name.lower().replace("_", "-")
+
+    wanted = {normalize(d): d for d in distributions}
+    groups = frozenset(plugin_groups)
+    versions = dict.fromkeys(wanted.values(), "")
+    found = (
+        importlib.metadata.distributions(path=search_path)
+        if search_path
+        else importlib.metadata.distributions()
+    )
+    for dist in found:
+        name = dist.metadata["Name"] or ""
+        if (wanted_name := wanted.get(normalize(name))) is not None:
+            versions[wanted_name] = dist.version
+        elif groups and any(ep.group in groups for ep in dist.entry_points):
+            versions[name] = dist.version
+    return versions
+
+
+def make_salt(  # pylint: disable=too-many-arguments
+    session: nox.Session,
+    /,
+    *,
+    tool: str,
+    distributions: Iterable[str],
+    args: Iterable[str],
+    config_files: Iterable[str],
+    plugin_groups: Iterable[str] = (),
+) -> str:
+    """Make a salt that identifies how files are checked by a tool.
+
+    Args:
+        session: The nox session where the tool is installed.
+        tool: The name of the tool (or check).
+        distributions: The names of the distributions that affect the tool results
+            (the tool itself and its plugins, for example).
+        args: The command-line arguments passed to the tool.
+        config_files: The configuration files that could affect the tool results.
+        plugin_groups: Entry point groups used to register plugins for the tool.
+
+    Returns:
+        The salt.
+    """
+    return json.dumps(
+        {
+            "tool": tool,
+            "versions": installed_versions(
+                session, distributions, plugin_groups=plugin_groups
+            ),
+            "args": list(args),
+            "config": {f: _hash_file(pathlib.Path(f)) for f in sorted(config_files)},
+        },
+        sort_keys=True,
+    )
+
+
+INSTALL_FINGERPRINT_FILE = ".install-fingerprint"
+"""The file, inside a virtualenv, where the fingerprint of the last install is stored."""
+
+
+def _installable_metadata() -> dict[str, Any]:
+    """Get the parts of `pyproject.toml` that affect how the project is installed.
+
+    Returns:
+        The `project` and `build-system` tables and the `setuptools` configuration,
+            or an empty dictionary if `pyproject.toml` can't be read.
+    """
+    try:
+        pyproject = _pyproject.load()
+    except (OSError, tomllib.TOMLDecodeError) as exc:
+        _logger.warning("Can't read pyproject.toml: %s", exc)
+        return {}
+    return {
+        "project": pyproject.project,
+        "build-system": pyproject.build_system,
+        "setuptools": pyproject.tool("setuptools"),
+    }
+
+
+def install_fingerprint(session: nox.Session, args: Iterable[str], /) -> str:
+    """Make a fingerprint of what an install in the session virtualenv depends on.
+
+    The fingerprint includes the dependency tables in `pyproject.toml` (and the rest of
+    the project metadata), the arguments passed to the installer (which include the
+    requested extras and pinned dependencies), the contents of any requirement or
+    constraint files passed as arguments and the virtualenv configuration (which
+    includes the Python version).
+
+    Args:
+        session: The nox session where the packages are installed.
+        args: The arguments passed to `session.install()`.
+
+    Returns:
+        The fingerprint.
+    """
+    args = list(args)
+    location = getattr(session.virtualenv, "location", None)
+    files = [
+        pathlib.Path(a) for a in args if not a.startswith("-") and os.path.isfile(a)
+    ]
+    return json.dumps(
+        {
+            "args": args,
+            "pyproject": _installable_metadata(),
+            "files": {str(f): _hash_file(f) for f in files},
+            "venv": _hash_file(pathlib.Path(location, "pyvenv.cfg"))
+            if location
+            else "",
+        },
+        sort_keys=True,
+    )
+
+
+class CheckCache:
+    """An on-disk cache of files that were checked clean by a tool."""
+
+    def __init__(
+        self,
+        salt: str,
+        /,
+        *,
+        directory: pathlib.Path = DEFAULT_DIRECTORY,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        """Initialize this cache.
+
+        Args:
+            salt: The salt describing how files are checked, see `make_salt()`.
+            directory: The directory where the cache entries are stored.
+            max_entries: The maximum number of entries to keep in the cache.
+        """
+        self._salt: bytes = salt.encode()
+        self._directory: pathlib.Path = directory
+        self._max_entries: int = max_entries
+        self._keys: dict[pathlib.Path, str] = {}
+
+    def _key(self, path: pathlib.Path) -> str:
+        """Compute the key of a file with its current contents.
+
+        The key depends on the path of the file too, as some configuration options
+        only apply to some paths (like flake8 `per-file-ignores`).
+
+        Args:
+            path: The file to compute the key for.
+
+        Returns:
+            The key.
+        """
+        digest = hashlib.sha256(self._salt)
+        digest.update(b"\0")
+        digest.update(pathlib.Path(os.path.relpath(path)).as_posix().encode())
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def _entry(self, path: pathlib.Path) -> pathlib.Path:
+        """Get the cache entry for a file.
+
+        The key of the file is computed the first time, and remembered afterwards.
+
+        Args:
+            path: The file to get the entry for.
+
+        Returns:
+            The path of the cache entry.
+        """
+        key = self._keys.get(path)
+        if key is None:
+            key = self._keys[path] = self._key(path)
+        return self._directory / key[:2] / key
+
+    def is_clean(self, path: pathlib.Path, /) -> bool:
+        """Tell whether a file was checked clean with its current contents.
+
+        Args:
+            path: The file to look for.
+
+        Returns:
+            Whether the file was checked clean before.
+        """
+        entry = self._entry(path)
+        try:
+            # Touch the entry to keep track of the last use for the LRU eviction
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def mark_clean(self, paths: Iterable[pathlib.Path], /) -> None:
+        """Record that some files were checked clean.
+
+        If the cache grows over its maximum number of entries, the least recently used
+        entries are removed.
+
+        Files that changed since they were looked up with `is_clean()` are not
+        recorded, as the new contents were not necessarily checked.
+
+        Args:
+            paths: The files that were checked clean.
+        """
+        for path in paths:
+            entry = self._entry(path)
+            try:
+                changed = self._key(path) != entry.name
+            except OSError:
+                changed = True
+            if changed:
+                _logger.debug("%s changed while being checked, not caching it", path)
+                continue
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            entry.touch()
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries if the cache is too big."""
+        entries = [e for e in self._directory.glob("*/*") if e.is_file()]
+        if len(entries) <= self._max_entries:
+            return
+
+        def last_used(entry: pathlib.Path) -> int:
+            try:
+                return entry.stat().st_mtime_ns
+            except FileNotFoundError:  # Evicted concurrently by another check
+                return 0
+
+        entries.sort(key=last_used)
+        for entry in entries[: len(entries) - self._max_entries]:
+            _logger.debug("Evicting check cache entry %s", entry)
+            entry.unlink(missing_ok=True)
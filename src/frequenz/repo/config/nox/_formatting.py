@@ -0,0 +1,335 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Check the formatting of Python files with isort and black in a single pass.
+
+Each file is read once and checked in memory with the isort and black Python APIs,
+spreading the files across a pool of processes, and a single combined diff is printed
+for all the files that are not properly formatted.
+
+This script is run with the Python interpreter of the `formatting` session
+virtualenv, where black and isort are installed, so it must not import anything from
+the `frequenz.repo.config` package.
+
+The configuration is read from `pyproject.toml` like the tools do. If the tools are
+configured in a way that is not supported by this script, or they are not run with
+`--check` (so they would reformat the files), they are run as separate processes as
+usual.
+
+Usage:
+    python _formatting.py [--workers N] [--black-option OPT]... [--isort-option OPT]...
+        [--] FILE...
+
+Exits with 0 if all files are properly formatted, 1 if some files would be
+reformatted and 123 if some files couldn't be checked.
+"""
+
+# black is compiled with mypyc, so pylint can't see the members of its modules
+# pylint: disable=c-extension-no-member
+
+import argparse
+import concurrent.futures
+import dataclasses
+import difflib
+import os
+import pathlib
+import re
+import subprocess
+import sys
+from collections.abc import Sequence
+from typing import Any
+
+import black
+import black.const
+import black.files
+import black.mode
+import black.report
+import isort
+import isort.exceptions
+
+SUPPORTED_OPTIONS = frozenset({"--check", "--diff", "-q", "--quiet"})
+"""Command-line options supported for both tools (they only affect the output)."""
+
+CHECK_OPTION = "--check"
+"""The option both tools need for this script to be used instead of them.
+
+Without it, the tools change the files, and this script can only check them.
+"""
+
+_SUPPORTED_BLACK_CONFIG = frozenset(
+    {
+        "check",
+        "color",
+        "diff",
+        "exclude",
+        "extend_exclude",
+        "force_exclude",
+        "include",
+        "line_length",
+        "preview",
+        "quiet",
+        "required_version",
+        "skip_magic_trailing_comma",
+        "skip_string_normalization",
+        "target_version",
+        "verbose",
+    }
+)
+
+_MIN_FILES_PER_WORKER = 8
+"""Minimum number of files to check per process, so small runs don't use a pool."""
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class BlackConfig:
+    """The black configuration relevant to check files."""
+
+    mode: black.Mode
+    """The formatting mode."""
+
+    include: re.Pattern[str] | None = None
+    """Files to check, if they match."""
+
+    exclude: tuple[re.Pattern[str], ...] = ()
+    """Files to skip, if they match any pattern."""
+
+    def is_excluded(self, path: str) -> bool:
+        """Check if black should skip a file.
+
+        Args:
+            path: The file to check.
+
+        Returns:
+            Whether the file should not be checked by black.
+        """
+        normalized = "/" + pathlib.Path(path).as_posix()
+        if self.include is not None and not self.include.search(normalized):
+            return True
+        return any(p.search(normalized) for p in self.exclude)
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class FileResult:
+    """The result of checking a file."""
+
+    path: str
+    """The path of the file."""
+
+    tools: tuple[str, ...] = ()
+    """The tools that would change the file."""
+
+    diff: str = ""
+    """The diff between the file and how it should be formatted."""
+
+    error: str | None = None
+    """The error that prevented checking the file, if any."""
+
+
+def black_config() -> BlackConfig | None:
+    """Read the black configuration from `pyproject.toml`.
+
+    Returns:
+        The configuration, or `None` if it uses options not supported by this script.
+    """
+    config: dict[str, Any] = {}
+    if pyproject := black.files.find_pyproject_toml((os.getcwd(),)):
+        config = black.files.parse_pyproject_toml(pyproject)
+    if set(config) - _SUPPORTED_BLACK_CONFIG:
+        return None
+    mode = black.Mode(
+        target_versions={
+            black.mode.TargetVersion[v.upper()]
+            for v in config.get("target_version", [])
+        },
+        line_length=config.get("line_length", black.const.DEFAULT_LINE_LENGTH),
+        string_normalization=not config.get("skip_string_normalization", False),
+        magic_trailing_comma=not config.get("skip_magic_trailing_comma", False),
+        preview=config.get("preview", False),
+    )
+    return BlackConfig(
+        mode=mode,
+        include=re.compile(config["include"]) if "include" in config else None,
+        exclude=tuple(
+            re.compile(config[k])
+            for k in ("exclude", "extend_exclude", "force_exclude")
+            if k in config
+        ),
+    )
+
+
+def _run_black(source: str, mode: black.Mode) -> str:
+    """Format some code with black.
+
+    Args:
+        source: The code to format.
+        mode: The formatting mode.
+
+    Returns:
+        The formatted code.
+    """
+    try:
+        return black.format_file_contents(source, fast=False, mode=mode)
+    except black.report.NothingChanged:
+        return source
+
+
+def check_file(
+    path: str, black_conf: BlackConfig, isort_conf: isort.Config
+) -> FileResult:
+    """Check the formatting of a file.
+
+    Args:
+        path: The file to check.
+        black_conf: The black configuration.
+        isort_conf: The isort configuration.
+
+    Returns:
+        The result of the check.
+    """
+    try:
+        with open(path, "rb") as source_file:
+            source, _, _ = black.decode_bytes(source_file.read())
+    except (OSError, UnicodeDecodeError) as exc:
+        return FileResult(path=path, error=str(exc))
+
+    expected = source
+    tools: list[str] = []
+    try:
+        if not isort_conf.is_skipped(pathlib.Path(path)):
+            try:
+                expected = isort.code(
+                    source, config=isort_conf, file_path=pathlib.Path(path)
+                )
+            except isort.exceptions.FileSkipComment:
+                pass  # isort doesn't change files with a skip comment
+            if expected != source:
+                tools.append("isort")
+        if not black_conf.is_excluded(path):
+            mode = dataclasses.replace(black_conf.mode, is_pyi=path.endswith(".pyi"))
+            formatted = _run_black(source, mode)
+            if formatted != source:
+                tools.append("black")
+            # Only format the isort output too if it is different
+            expected = formatted if expected == source else _run_black(expected, mode)
+    except Exception as exc:  # pylint: disable=broad-except
+        return FileResult(path=path, error=f"{type(exc).__name__}: {exc}")
+
+    if not tools:
+        return FileResult(path=path)
+    diff = difflib.unified_diff(
+        source.splitlines(keepends=True),
+        expected.splitlines(keepends=True),
+        fromfile=f"{path}\t(original)",
+        tofile=f"{path}\t(formatted)",
+    )
+    return FileResult(path=path, tools=tuple(tools), diff="".join(diff))
+
+
+def check_files(
+    paths: Sequence[str],
+    black_conf: BlackConfig,
+    isort_conf: isort.Config,
+    *,
+    workers: int,
+) -> list[FileResult]:
+    """Check the formatting of some files.
+
+    Args:
+        paths: The files to check.
+        black_conf: The black configuration.
+        isort_conf: The isort configuration.
+        workers: The maximum number of processes to use.
+
+    Returns:
+        The results of the checks, in the same order as `paths`.
+    """
+    workers = min(workers, len(paths) // _MIN_FILES_PER_WORKER)
+    if workers <= 1:
+        return [check_file(p, black_conf, isort_conf) for p in paths]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(
+                check_file,
+                paths,
+                [black_conf] * len(paths),
+                [isort_conf] * len(paths),
+                chunksize=max(1, len(paths) // (workers * 4)),
+            )
+        )
+
+
+def _run_tools_separately(args: argparse.Namespace) -> int:
+    """Run black and isort as separate processes.
+
+    Args:
+        args: The parsed command-line arguments.
+
+    Returns:
+        The exit code.
+    """
+    code = 0
+    for tool, options in (("black", args.black_option), ("isort", args.isort_option)):
+        command = [sys.executable, "-m", tool, *options, *args.files]
+        code = code or subprocess.run(command, check=False).returncode
+    return code
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Check the formatting of the files passed as command-line arguments.
+
+    Args:
+        argv: The command-line arguments (without the program name).
+
+    Returns:
+        The exit code.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--black-option", action="append", default=[])
+    parser.add_argument("--isort-option", action="append", default=[])
+    parser.add_argument("files", nargs="*")
+    args = parser.parse_args(argv)
+
+    black_conf = black_config()
+    unsupported = set(args.black_option + args.isort_option) - SUPPORTED_OPTIONS
+    if black_conf is None or unsupported:
+        print(
+            "Options not supported by the single-pass formatting check, "
+            "running black and isort separately",
+            file=sys.stderr,
+        )
+        return _run_tools_separately(args)
+    if CHECK_OPTION not in args.black_option or CHECK_OPTION not in args.isort_option:
+        print(
+            f"black and isort don't run with {CHECK_OPTION}, so they can change the "
+            "files, running them separately",
+            file=sys.stderr,
+        )
+        return _run_tools_separately(args)
+
+    isort_conf = isort.Config(settings_path=os.getcwd())
+    results = check_files(args.files, black_conf, isort_conf, workers=args.workers)
+
+    failed = [r for r in results if r.tools]
+    errors = [r for r in results if r.error is not None]
+    for result in failed:
+        print(result.diff, end="" if result.diff.endswith("\n") else "\n")
+    for result in failed:
+        print(
+            f"would reformat {result.path} ({', '.join(result.tools)})",
+            file=sys.stderr,
+        )
+    for result in errors:
+        print(f"error: cannot check {result.path}: {result.error}", file=sys.stderr)
+    print(
+        f"{len(results)} file(s) checked, {len(failed)} would be reformatted, "
+        f"{len(errors)} failed to check",
+        file=sys.stderr,
+    )
+    if errors:
+        return 123
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Keep a history of previous test runs.
+
+Test results are read from the JUnit XML reports written by pytest and stored in a
+small JSON file, so they can be used by later runs (for example to split the tests in
+balanced groups to run them in parallel, or to run the tests that failed first).
+"""
+
+import dataclasses
+import json
+import logging
+import pathlib
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable
+from typing import Literal, Self
+
+_logger = logging.getLogger(__name__)
+
+JUNIT_ARGS = ("-o", "junit_family=xunit1")
+"""Extra pytest arguments needed to write reports that can be read by this module.
+
+The `xunit1` family includes the file where each test is defined, which is needed to
+reconstruct the test node IDs.
+"""
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class TestReport:
+    """The result of running a test."""
+
+    __test__ = False  # Tell pytest this is not a test class
+
+    nodeid: str
+    """The pytest node ID of the test."""
+
+    duration: float
+    """The time it took to run the test, in seconds."""
+
+    outcome: Literal["passed", "failed", "skipped"]
+    """The outcome of the test (errors are considered failures)."""
+
+    @property
+    def file(self) -> str:
+        """The file where the test is defined."""
+        return self.nodeid.split("::", 1)[0]
+
+
+def _nodeid(file: str, classname: str, name: str) -> str:
+    """Reconstruct a pytest node ID from the attributes of a JUnit test case.
+
+    Args:
+        file: The file where the test is defined.
+        classname: The dotted module path of the test, including the class names.
+        name: The name of the test.
+
+    Returns:
+        The node ID of the test.
+    """
+    module = file.removesuffix(".py").replace("/", ".")
+    classes = classname.removeprefix(module).strip(".")
+    return "::".join([file, *(classes.split(".") if classes else []), name])
+
+
+def read_junit(path: pathlib.Path, /) -> list[TestReport]:
+    """Read the test results from a JUnit XML report.
+
+    Args:
+        path: The JUnit XML file written by pytest (using `JUNIT_ARGS`).
+
+    Returns:
+        The results of the tests in the report. If the report can't be read, an empty
+            list is returned.
+    """
+    try:
+        root = ET.parse(path).getroot()
+    except (OSError, ET.ParseError) as exc:
+        _logger.warning("Can't read the JUnit report %s: %s", path, exc)
+        return []
+
+    reports: list[TestReport] = []
+    for case in root.iter("testcase"):
+        file = case.get("file")
+        if not file:
+            file = case.get("classname", "").replace(".", "/") + ".py"
+        outcome: Literal["passed", "failed", "skipped"] = "passed"
+        if case.find("failure") is not None or case.find("error") is not None:
+            outcome = "failed"
+        elif case.find("skipped") is not None:
+            outcome = "skipped"
+        reports.append(
+            TestReport(
+                nodeid=_nodeid(file, case.get("classname", ""), case.get("name", "")),
+                duration=float(case.get("time", 0.0)),
+                outcome=outcome,
+            )
+        )
+    return reports
+
+
+def merge_junit(paths: Iterable[pathlib.Path], output: pathlib.Path, /) -> None:
+    """Merge several JUnit XML reports into one.
+
+    Args:
+        paths: The reports to merge. Reports that can't be read are ignored.
+        output: The file where to write the merged report.
+    """
+    merged = ET.Element("testsuites")
+    for path in paths:
+        try:
+            root = ET.parse(path).getroot()
+        except (OSError, ET.ParseError):
+            continue
+        merged.extend(root.iter("testsuite"))
+    ET.ElementTree(merged).write(output, encoding="utf-8", xml_declaration=True)
+
+
+HISTORY_SIZE = 5
+"""The number of recent durations kept for each test."""
+
+
+class RunHistory:
+    """The history of previous test runs.
+
+    For each test, the outcome of the last run and the durations of the last
+    `HISTORY_SIZE` runs are kept. The history is stored as JSON with the following
+    format, so it can be used by other tools too:
+
+    ```json
+    {
+      "version": 2,
+      "tests": {
+        "tests/test_a.py::test_x": {"outcome": "passed", "durations": [0.5, 0.4]}
+      }
+    }
+    ```
+
+    Durations are in seconds, from the oldest to the most recent.
+    """
+
+    def __init__(self, path: pathlib.Path, /) -> None:
+        """Initialize this history, loading it from `path` if it exists.
+
+        Args:
+            path: The JSON file where the history is stored.
+        """
+        self._path: pathlib.Path = path
+        self._tests: dict[str, tuple[str, list[float]]] = {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            self._tests = {
+                str(k): (str(v["outcome"]), [float(d) for d in v["durations"]])
+                for k, v in data["tests"].items()
+            }
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+            _logger.warning("Ignoring invalid test history in %s: %s", path, exc)
+
+    @classmethod
+    def for_deps(cls, max_or_min_deps: str, /) -> Self:
+        """Load the history of the tests run with the max or min dependencies.
+
+        Args:
+            max_or_min_deps: Either `max` or `min`.
+
+        Returns:
+            The history.
+        """
+        return cls(pathlib.Path(".nox", f".test-history-{max_or_min_deps}.json"))
+
+    @property
+    def durations(self) -> dict[str, float]:
+        """The last duration of each test, in seconds, by node ID."""
+        return {
+            k: durations[-1] for k, (_, durations) in self._tests.items() if durations
+        }
+
+    @property
+    def failed(self) -> list[str]:
+        """The node IDs of the tests that failed in their last run."""
+        return [k for k, (outcome, _) in self._tests.items() if outcome == "failed"]
+
+    def recent_durations(self, nodeid: str, /) -> list[float]:
+        """Get the durations of the last runs of a test.
+
+        Args:
+            nodeid: The node ID of the test.
+
+        Returns:
+            The durations, in seconds, from the oldest to the most recent (empty if
+                the test was never run).
+        """
+        return list(self._tests.get(nodeid, ("", []))[1])
+
+    def slowest(self, count: int, /, among: Iterable[str] | None = None) -> list[str]:
+        """Get the slowest tests, according to their last duration.
+
+        Args:
+            count: The maximum number of tests to return.
+            among: The node IDs of the tests to consider. If `None`, all the tests in
+                the history are considered.
+
+        Returns:
+            The node IDs of the slowest tests, from the slowest.
+        """
+        durations = self.durations
+        if among is not None:
+            durations = {k: durations[k] for k in among if k in durations}
+        return sorted(durations, key=lambda k: durations[k], reverse=True)[:count]
+
+    def file_durations(self, files: Iterable[str], /) -> dict[str, float | None]:
+        """Get the total duration of the tests in each file.
+
+        Args:
+            files: The files to get the durations for.
+
+        Returns:
+            The sum of the last durations of all the tests in each file, or `None` for
+                files without recorded tests.
+        """
+        totals: dict[str, float | None] = dict.fromkeys(files)
+        for nodeid, duration in self.durations.items():
+            file = nodeid.split("::", 1)[0]
+            if file in totals:
+                totals[file] = (totals[file] or 0.0) + duration
+        return totals
+
+    def update(self, reports: Iterable[TestReport], /) -> None:
+        """Record the results of a run.
+
+        Args:
+            reports: The results of the tests that were run.
+        """
+        for report in reports:
+            durations = self.recent_durations(report.nodeid)
+            # Skipped tests don't really run, so their duration is not meaningful
+            if report.outcome != "skipped" or not durations:
+                durations = [*durations, report.duration][-HISTORY_SIZE:]
+            self._tests[report.nodeid] = (report.outcome, durations)
+
+    def save(self) -> None:
+        """Save the history to disk."""
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._path.write_text(
+            json.dumps(
+                {
+                    "version": 2,
+                    "tests": {
+                        k: {"outcome": outcome, "durations": durations}
+                        for k, (outcome, durations) in self._tests.items()
+                    },
+                },
+                indent=1,
+                sort_keys=True,
+            ),
+            encoding="utf-8",
+        )
@@ -0,0 +1,272 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Select the tests affected by some changes using a static import graph.
+
+The imports of all the modules in the source and test paths are found by parsing them
+(without importing them), and the tests affected by a change are the test files that
+import, directly or indirectly, any of the changed modules.
+
+The imports of each file are cached by the hash of its contents, so only files that
+changed need to be parsed again.
+"""
+
+import ast
+import dataclasses
+import hashlib
+import json
+import logging
+import pathlib
+from collections.abc import Iterable
+
+import nox
+
+from . import config as _config
+from . import util as _util
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = pathlib.Path(".nox", ".import-graph.json")
+"""The default file where the imports of each file are cached."""
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Selection:
+    """The tests selected to run."""
+
+    tests: list[str] | None
+    """The test files to run, or `None` if all the tests should be run."""
+
+    reason: str
+    """Why the tests were selected, to inform the user."""
+
+
+def module_name(path: pathlib.Path, source_paths: Iterable[str], /) -> str:
+    """Get the name a Python file is imported as.
+
+    Files in the source paths are named relative to the source path they are in.
+    Other files are named relative to the first parent directory that is not a package
+    (like pytest does when importing test files).
+
+    Args:
+        path: The Python file.
+        source_paths: The paths containing the source packages.
+
+    Returns:
+        The name of the module (or package, for `__init__` files).
+    """
+    root: pathlib.Path | None = None
+    for source_path in map(pathlib.Path, source_paths):
+        if source_path in path.parents:
+            root = source_path
+            break
+    if root is None:
+        root = path.parent
+        while (root / "__init__.py").exists() and root != root.parent:
+            root = root.parent
+    parts = list(path.relative_to(root).with_suffix("").parts)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def _imported_names(source: bytes, module: str, is_package: bool) -> list[str]:
+    """Find the names of the modules that could be imported by some code.
+
+    For `from x import y`, both `x` and `x.y` are returned, as `y` could be a module,
+    and for `x.y`, `x` is returned too, as its `__init__` is imported as well.
+
+    Args:
+        source: The source code.
+        module: The name of the module the code belongs to.
+        is_package: Whether the module is a package (an `__init__` file).
+
+    Returns:
+        The names of the possibly imported modules.
+    """
+    package = module if is_package else module.rpartition(".")[0]
+    names: set[str] = set()
+    for node in ast.walk(ast.parse(source)):
+        bases: list[str] = []
+        if isinstance(node, ast.Import):
+            bases = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parts = package.split(".") if package else []
+                parts = parts[: len(parts) - node.level + 1]
+                base = ".".join(p for p in [*parts, base] if p)
+            bases = [base] + [
+                f"{base}.{a.name}" if base else a.name for a in node.names
+            ]
+        for name in bases:
+            parts = name.split(".")
+            names.update(".".join(parts[:i]) for i in range(1, len(parts) + 1))
+    names.discard("")
+    return sorted(names)
+
+
+class ImportGraph:
+    """A graph of the imports between some Python files."""
+
+    def __init__(
+        self,
+        files: Iterable[pathlib.Path],
+        source_paths: Iterable[str],
+        /,
+        *,
+        cache_file: pathlib.Path = DEFAULT_CACHE_FILE,
+    ) -> None:
+        """Build the graph, using and updating the cache.
+
+        Args:
+            files: The Python files in the graph.
+            source_paths: The paths containing the source packages.
+            cache_file: The file where the imports of each file are cached.
+        """
+        self._source_paths = list(source_paths)
+        self._imports: dict[pathlib.Path, list[str]] = {}
+        self._modules: dict[pathlib.Path, str] = {}
+
+        try:
+            cached = json.loads(cache_file.read_text(encoding="utf-8"))["files"]
+        except FileNotFoundError:
+            cached = {}
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            _logger.warning(
+                "Ignoring invalid import graph cache %s: %s", cache_file, exc
+            )
+            cached = {}
+
+        entries: dict[str, dict[str, object]] = {}
+        for file in files:
+            module = module_name(file, self._source_paths)
+            source = file.read_bytes()
+            digest = hashlib.sha256(source).hexdigest()
+            entry = cached.get(str(file))
+            if not isinstance(entry, dict) or entry.get("hash") != digest:
+                try:
+                    imports = _imported_names(source, module, file.stem == "__init__")
+                except (SyntaxError, ValueError) as exc:
+                    _logger.warning("Can't parse %s: %s", file, exc)
+                    imports = []
+                entry = {"hash": digest, "imports": imports}
+            entries[str(file)] = entry
+            self._modules[file] = module
+            self._imports[file] = list(entry["imports"])
+
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(
+            json.dumps({"version": 1, "files": entries}), encoding="utf-8"
+        )
+
+    def dependents(self, changed: Iterable[pathlib.Path], /) -> set[pathlib.Path]:
+        """Find the files that import, directly or indirectly, some changed files.
+
+        Args:
+            changed: The changed Python files (they don't need to exist anymore).
+
+        Returns:
+            The files in the graph that are affected by the changes, including the
+                changed files themselves.
+        """
+        importers: dict[str, list[pathlib.Path]] = {}
+        for file, imports in self._imports.items():
+            for name in imports:
+                importers.setdefault(name, []).append(file)
+
+        affected = {f for f in changed if f in self._modules}
+        pending = [module_name(f, self._source_paths) for f in changed]
+        seen = set(pending)
+        while pending:
+            for file in importers.get(pending.pop(), []):
+                if file not in affected:
+                    affected.add(file)
+                    if (module := self._modules[file]) not in seen:
+                        seen.add(module)
+                        pending.append(module)
+        return affected
+
+
+def select_tests(
+    changed: Iterable[pathlib.Path],
+    /,
+    *,
+    source_paths: Iterable[str],
+    test_paths: Iterable[str],
+    config_files: Iterable[str],
+    cache_file: pathlib.Path = DEFAULT_CACHE_FILE,
+) -> Selection:
+    """Select the test files affected by some changes.
+
+    All tests are selected if a `conftest.py` file, a configuration file or any
+    non-Python file changed, as the effect of these changes can't be known.
+
+    Args:
+        changed: The changed files.
+        source_paths: The paths containing the source packages.
+        test_paths: The paths where pytest looks for tests.
+        config_files: The configuration files that could affect any test.
+        cache_file: The file where the imports of each file are cached.
+
+    Returns:
+        The selected tests.
+    """
+    changed = list(changed)
+    config = set(map(pathlib.Path, config_files)) | {pathlib.Path("pyproject.toml")}
+    for file in changed:
+        if file.name == "conftest.py" or file in config:
+            return Selection(tests=None, reason=f"{file} changed")
+        if not _util.is_python_file(file):
+            return Selection(tests=None, reason=f"non-Python file {file} changed")
+
+    source_paths = list(source_paths)
+    test_paths = list(test_paths)
+    graph = ImportGraph(
+        _util.python_files([*source_paths, *test_paths]),
+        source_paths,
+        cache_file=cache_file,
+    )
+    test_roots = list(map(pathlib.Path, test_paths))
+    tests = sorted(
+        str(f)
+        for f in graph.dependents(changed)
+        if f.exists() and any(f == p or p in f.parents for p in test_roots)
+    )
+    return Selection(
+        tests=tests,
+        reason=f"{len(tests)} test file(s) affected by {len(changed)} changed file(s)",
+    )
+
+
+def select_impacted_tests(session: nox.Session, /) -> list[str] | None:
+    """Select the test files affected by the changes in the working tree.
+
+    The changes are calculated since
+    [`changed_since`][frequenz.repo.config.nox.config.Config.changed_since], or since
+    `HEAD` (only uncommitted changes) if it is not set.
+
+    Args:
+        session: The nox session, used to inform the user.
+
+    Returns:
+        The affected test files, or `None` if all tests should be run.
+    """
+    conf = _config.get()
+    try:
+        changed = _util.changed_files(conf.changed_since or "HEAD")
+    except RuntimeError as exc:
+        session.warn(f"{exc}, running all tests")
+        return None
+
+    selection = select_tests(
+        changed,
+        source_paths=conf.source_paths,
+        test_paths=_util.discover_paths(),
+        config_files=conf.config_files,
+    )
+    if selection.tests is None:
+        session.log(f"Running all tests: {selection.reason}")
+    else:
+        session.log(f"Running only the affected tests: {selection.reason}")
+    return selection.tests
@@ -0,0 +1,296 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Install packages in the session virtualenvs.
+
+Packages can be installed with pip or uv, installs can be skipped when nothing they
+depend on changed, sessions can share the virtualenv of their session group, and the
+minimum dependencies can be installed from a local lock.
+"""
+
+import os
+import pathlib
+import shutil
+import sys
+from typing import assert_never
+
+import nox
+import nox.command
+import nox.virtualenv
+
+from . import _cache
+from . import config as _config
+from . import util as _util
+
+
+def install(session: nox.Session, *args: str) -> None:
+    """Install packages in the session virtualenv.
+
+    Packages are installed with the configured
+    [`installer`][frequenz.repo.config.nox.config.Config.installer]. If the session
+    is in one of the
+    [`session_groups`][frequenz.repo.config.nox.config.Config.session_groups], the
+    session is switched to the group virtualenv and the dependencies of all the
+    sessions in the group are installed instead. If
+    [`skip_unchanged_installs`][frequenz.repo.config.nox.config.Config.skip_unchanged_installs]
+    is enabled, the install is skipped if nothing it depends on changed since the
+    last install in the same virtualenv.
+
+    Args:
+        session: The nox session.
+        *args: The arguments to pass to `session.install()`.
+    """
+    conf = _config.get()
+    skip_unchanged = conf.skip_unchanged_installs
+    if (group_args := _use_group_venv(session)) is not None:
+        args = group_args
+        # The virtualenv is shared, so it only needs to be installed once
+        skip_unchanged = True
+    location = getattr(session.virtualenv, "location", None)
+    if not skip_unchanged or not location:
+        run_installer(session, args)
+        return
+
+    fingerprint_file = pathlib.Path(location, _cache.INSTALL_FINGERPRINT_FILE)
+    fingerprint = _cache.install_fingerprint(session, args)
+    try:
+        if fingerprint_file.read_text(encoding="utf-8") == fingerprint:
+            session.log("The dependencies didn't change, skipping the install")
+            return
+    except FileNotFoundError:
+        pass
+
+    fingerprint_file.unlink(missing_ok=True)
+    if run_installer(session, args):
+        fingerprint_file.write_text(fingerprint, encoding="utf-8")
+
+
+_SESSION_EXTRAS = {
+    "ci_checks_max": "dev",
+    "formatting": "dev-formatting",
+    "flake8": "dev-flake8",
+    "mypy": "dev-mypy",
+    "pylint": "dev-pylint",
+    "pytest_max": "dev-pytest",
+}
+"""The extras installed by each predefined session that can be grouped."""
+
+_created_group_venvs: set[str] = set()
+"""The locations of the group virtualenvs already created by this nox run."""
+
+
+def _use_group_venv(session: nox.Session) -> tuple[str, ...] | None:
+    """Switch a session to the virtualenv of its session group.
+
+    The group virtualenv is created the first time it is used in a nox run (or
+    reused, if virtualenvs are being reused), and later sessions in the same group
+    always reuse it.
+
+    Args:
+        session: The nox session.
+
+    Returns:
+        The arguments to install the dependencies of all the sessions in the group, or
+            `None` if the session is not in a group.
+    """
+    conf = _config.get()
+    name = session.name
+    if isinstance(session.python, str):
+        name = name.removesuffix(f"-{session.python}")
+    group = next((g for g, s in conf.session_groups.items() if name in s), None)
+    if group is None:
+        return None
+
+    venv = session.virtualenv
+    if not isinstance(venv, nox.virtualenv.VirtualEnv):
+        session.warn(
+            f"Session groups need a virtualenv, not using the {group} group virtualenv"
+        )
+        return None
+
+    suffix = f"-{session.python}" if isinstance(session.python, str) else ""
+    location = str(pathlib.Path(venv.location).parent / f"group-{group}{suffix}")
+    if location != venv.location:
+        # There is no public API to change the virtualenv of a session, so make sure
+        # the nox internals we rely on are still there before creating anything
+        runner = getattr(session, "_runner", None)
+        if runner is None or not hasattr(runner, "venv"):
+            session.error(
+                f"Can't use the virtualenv of the {group} session group, this nox "
+                "version doesn't support changing the virtualenv of a session"
+            )
+        session.log(f"Using the virtualenv of the {group} session group")
+        group_venv = nox.virtualenv.VirtualEnv(
+            location,
+            interpreter=venv.interpreter,
+            reuse_existing=venv.reuse_existing or location in _created_group_venvs,
+            venv=venv.venv_or_virtualenv == "venv",
+            venv_params=venv.venv_params,
+        )
+        group_venv.create()
+        group_venv.env["NOX_CURRENT_SESSION"] = session.name
+        _created_group_venvs.add(location)
+        runner.venv = group_venv
+
+    extras = sorted(
+        {
+            extra
+            for member in conf.session_groups[group]
+            if (extra := _SESSION_EXTRAS.get(member))
+        }
+    )
+    return ("-e", f".[{','.join(extras)}]")
+
+
+def run_installer(
+    session: nox.Session, args: tuple[str, ...], *, force: bool = False
+) -> bool:
+    """Install packages using the configured installer.
+
+    Like `session.install()`, nothing is installed when using `--no-install` with a
+    reused virtualenv, unless `force` is `True`.
+
+    Args:
+        session: The nox session.
+        args: The arguments to pass to the installer.
+        force: Whether to install even when using `--no-install`.
+
+    Returns:
+        Whether the packages were installed.
+    """
+    conf = _config.get()
+    # pylint: disable-next=protected-access
+    runner = session._runner
+    if (
+        runner.global_config.no_install
+        and getattr(runner.venv, "_reused", False)
+        and not force
+    ):
+        return False
+
+    installer = conf.installer
+    uv = None
+    if installer == "uv":
+        uv = shutil.which(
+            "uv",
+            path=os.pathsep.join(
+                [os.path.dirname(sys.executable), os.environ.get("PATH", "")]
+            ),
+        )
+        if uv is None:
+            session.warn("uv was not found, installing with pip instead")
+            installer = "pip"
+
+    env: dict[str, str] = {}
+    match installer:
+        case "uv":
+            assert uv is not None
+            if conf.install_cache_dir:
+                env["UV_CACHE_DIR"] = str(
+                    pathlib.Path(conf.install_cache_dir).absolute()
+                )
+            session.run(
+                uv,
+                "pip",
+                "install",
+                "--python",
+                str(pathlib.Path(session.bin, "python")),
+                *args,
+                env=env,
+                external=True,
+            )
+        case "pip":
+            if conf.install_cache_dir:
+                env["PIP_CACHE_DIR"] = str(
+                    pathlib.Path(conf.install_cache_dir).absolute()
+                )
+            if force:
+                session.run("python", "-m", "pip", "install", *args, env=env)
+            else:
+                session.install(*args, env=env)
+        case _ as unhandled:
+            assert_never(unhandled)
+    return True
+
+
+MIN_DEPS_LOCK_DIRECTORY = pathlib.Path(".nox", ".min-deps-lock")
+"""The directory where the locked minimum dependencies are stored."""
+
+
+def install_min_deps_locked(session: nox.Session) -> None:
+    """Install the minimum dependencies using a lock file.
+
+    The first time, the minimum dependencies are resolved and installed as usual, and
+    the resulting environment is frozen into a constraints file, downloading all the
+    packages (and the build dependencies) into a local wheel directory. Later runs
+    install from the wheel directory using the constraints file, without using the
+    network. If installing from the lock fails (for example because some package
+    needs to be built from source), the lock is created again.
+
+    The lock is keyed by the hash of `pyproject.toml` and the virtualenv
+    configuration (which includes the Python version), so it is created again when
+    any of them change.
+
+    Args:
+        session: The nox session.
+    """
+    location = getattr(session.virtualenv, "location", None)
+    key = _cache.hash_files(
+        [
+            pathlib.Path("pyproject.toml"),
+            pathlib.Path(location or ".", "pyvenv.cfg"),
+        ]
+    )[:16]
+    lock_dir = MIN_DEPS_LOCK_DIRECTORY / key
+    constraints = lock_dir / "constraints.txt"
+    wheels = lock_dir / "wheels"
+    args = ["-e", ".[dev-pytest]", *_util.min_dependencies()]
+
+    if constraints.exists():
+        session.log(f"Installing the minimum dependencies locked in {constraints}")
+        try:
+            install(
+                session,
+                "--no-index",
+                "--find-links",
+                str(wheels),
+                "--constraint",
+                str(constraints),
+                *args,
+            )
+            return
+        except nox.command.CommandFailed:
+            session.warn("Installing from the lock failed, creating it again")
+            shutil.rmtree(lock_dir, ignore_errors=True)
+
+    install(session, *args)
+
+    session.log(f"Locking the minimum dependencies in {constraints}")
+    frozen = session.run(
+        "python", "-m", "pip", "freeze", "--exclude-editable", silent=True
+    )
+    tmp_dir = lock_dir.with_name(f"{key}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    (tmp_dir / "wheels").mkdir(parents=True)
+    (tmp_dir / "constraints.txt").write_text(str(frozen), encoding="utf-8")
+    try:
+        download = [
+            "python",
+            "-m",
+            "pip",
+            "download",
+            "--dest",
+            str(tmp_dir / "wheels"),
+        ]
+        session.run(
+            *download, "--no-deps", "--requirement", str(tmp_dir / "constraints.txt")
+        )
+        # The build dependencies are needed to install the project itself, `wheel`
+        # is not always listed, but setuptools asks for it when building wheels
+        session.run(*download, *_util.build_dependencies(), "wheel")
+    except nox.command.CommandFailed:
+        session.warn("Could not download the locked dependencies, not using a lock")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+    shutil.rmtree(lock_dir, ignore_errors=True)
+    tmp_dir.rename(lock_dir)
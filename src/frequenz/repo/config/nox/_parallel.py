@@ -0,0 +1,366 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Run nox session steps concurrently.
+
+Steps are regular functions receiving a nox session, like the predefined sessions in
+[`frequenz.repo.config.nox.session`][]. Each step gets a proxy session that runs
+commands as subprocesses sharing the virtualenv of the real session, and buffers all
+their output, so it can be printed whole and in a fixed order once the step is done.
+"""
+
+import dataclasses
+import heapq
+import io
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent import futures
+from typing import Any, cast
+
+import nox
+import nox.command
+
+
+class StepCancelled(Exception):
+    """Raised when a step is cancelled because another step failed."""
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class StepResult:
+    """The result of running a step."""
+
+    name: str
+    """The name of the step."""
+
+    output: str
+    """The buffered output of the step."""
+
+    duration: float
+    """The wall time the step took, in seconds."""
+
+    error: str | None = None
+    """The error message if the step failed, `None` if it succeeded."""
+
+    cancelled: bool = False
+    """Whether the step was cancelled before it could finish."""
+
+    @property
+    def ok(self) -> bool:
+        """Whether the step finished successfully."""
+        return self.error is None and not self.cancelled
+
+
+class BufferedSession:
+    """A proxy for a nox session that runs commands buffering their output.
+
+    Only `run()` and the logging methods are overridden, everything else is forwarded to
+    the wrapped session.
+    """
+
+    def __init__(self, session: nox.Session, cancelled: threading.Event) -> None:
+        """Initialize this proxy.
+
+        Args:
+            session: The nox session to wrap.
+            cancelled: The event signaling that the step should be cancelled.
+        """
+        self._session = session
+        self._cancelled = cancelled
+        self._buffer = io.StringIO()
+        self._lock = threading.Lock()
+        self._process: subprocess.Popen[str] | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        """Forward any attribute not defined by the proxy to the wrapped session.
+
+        Args:
+            name: The name of the attribute.
+
+        Returns:
+            The attribute of the wrapped session.
+        """
+        return getattr(self._session, name)
+
+    @property
+    def output(self) -> str:
+        """The output buffered so far."""
+        with self._lock:
+            return self._buffer.getvalue()
+
+    def write(self, text: str) -> None:
+        """Write some text to the output buffer.
+
+        Args:
+            text: The text to write.
+        """
+        with self._lock:
+            self._buffer.write(text)
+
+    def log(self, *args: Any, **_kwargs: Any) -> None:
+        """Buffer an informational message.
+
+        Args:
+            *args: The message to log, it is formatted with `%` if there is more
+                than one argument.
+            **_kwargs: Ignored, only accepted for compatibility with nox.
+        """
+        self.write(f"nox > {args[0] % args[1:] if len(args) > 1 else args[0]}\n")
+
+    warn = log
+    debug = log
+
+    def run(
+        self,
+        *args: str,
+        env: Mapping[str, str] | None = None,
+        silent: bool = False,
+        success_codes: Iterable[int] | None = None,
+        **_kwargs: Any,
+    ) -> str | bool:
+        """Run a command in the session virtualenv, buffering its output.
+
+        Args:
+            *args: The command to run.
+            env: Extra environment variables to set for the command.
+            silent: Whether to silence the command output. If `True` the output
+                is returned instead of buffered.
+            success_codes: The exit codes that are considered a success.
+            **_kwargs: Other options accepted by `nox.Session.run()`, ignored.
+
+        Returns:
+            The output of the command if `silent` is `True`, `True` otherwise.
+
+        Raises:
+            ValueError: If no command is given.
+            StepCancelled: If the step was cancelled.
+            nox.command.CommandFailed: If the command failed.
+        """
+        if not args:
+            raise ValueError("At least one argument required to run().")
+        if self._cancelled.is_set():
+            raise StepCancelled()
+
+        full_env = dict(self._session.env)
+        if env is not None:
+            full_env.update(env)
+        program = shutil.which(args[0], path=full_env.get("PATH")) or args[0]
+
+        self.log(shlex.join(args))
+        with self._lock:
+            # pylint: disable-next=consider-using-with
+            self._process = subprocess.Popen(
+                [program, *args[1:]],
+                env=full_env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+            )
+        output, _ = self._process.communicate()
+        returncode = self._process.returncode
+        with self._lock:
+            self._process = None
+
+        if self._cancelled.is_set():
+            raise StepCancelled()
+        if not silent:
+            self.write(output)
+        if returncode not in (success_codes or [0]):
+            if silent:
+                self.write(output)
+            raise nox.command.CommandFailed(f"Returned code {returncode}")
+        return output if silent else True
+
+    def terminate(self) -> None:
+        """Terminate the currently running command, if any."""
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                self._process.terminate()
+
+
+def _run_step(
+    name: str, step: Callable[[nox.Session], object], proxy: BufferedSession
+) -> StepResult:
+    """Run a step with a buffered session proxy.
+
+    Args:
+        name: The name of the step.
+        step: The step to run.
+        proxy: The session proxy to pass to the step.
+
+    Returns:
+        The result of the step.
+    """
+    start = time.monotonic()
+    try:
+        step(cast(nox.Session, proxy))
+    except StepCancelled:
+        return StepResult(
+            name=name,
+            output=proxy.output,
+            duration=time.monotonic() - start,
+            cancelled=True,
+        )
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        return StepResult(
+            name=name,
+            output=proxy.output,
+            duration=time.monotonic() - start,
+            error=str(exc) or type(exc).__name__,
+        )
+    return StepResult(name=name, output=proxy.output, duration=time.monotonic() - start)
+
+
+def run_steps(
+    session: nox.Session,
+    steps: Sequence[tuple[str, Callable[[nox.Session], object]]],
+    /,
+    *,
+    fail_fast: bool = True,
+    max_workers: int | None = None,
+) -> list[StepResult]:
+    """Run steps concurrently and print their output in order.
+
+    The output of each step is printed whole as soon as the step and all the steps
+    before it are done, so the output of the steps is never interleaved and is always
+    printed in the order the steps were given.
+
+    Args:
+        session: The nox session whose virtualenv will be used by the steps.
+        steps: The name and function of each step to run.
+        fail_fast: Whether to cancel the remaining steps as soon as one fails.
+        max_workers: The maximum number of steps to run at the same time. If `None`,
+            all steps are run at the same time.
+
+    Returns:
+        The results of all the steps, in the same order as `steps`.
+
+    Raises:
+        KeyboardInterrupt: If the user interrupted the execution, after cancelling
+            all the steps.
+    """
+    cancelled = threading.Event()
+    proxies = [BufferedSession(session, cancelled) for _ in steps]
+
+    def cancel_all() -> None:
+        cancelled.set()
+        for proxy in proxies:
+            proxy.terminate()
+
+    results: list[StepResult] = []
+    with futures.ThreadPoolExecutor(max_workers=max_workers or len(steps) or 1) as pool:
+        pending = [
+            pool.submit(_run_step, name, step, proxy)
+            for (name, step), proxy in zip(steps, proxies)
+        ]
+        if fail_fast:
+            for future in pending:
+                future.add_done_callback(
+                    lambda f: cancel_all() if f.result().error is not None else None
+                )
+        try:
+            for future in pending:
+                result = future.result()
+                results.append(result)
+                _print_result(session, result)
+        except KeyboardInterrupt:
+            cancel_all()
+            raise
+
+    return results
+
+
+def write_output(session: nox.Session, text: str, /) -> None:
+    """Write some output for a session.
+
+    If the session is running as a step (even through other proxies), the output is
+    written to the step buffer, otherwise it is written to the standard output.
+
+    Args:
+        session: The nox session (or a proxy for it).
+        text: The text to write.
+    """
+    proxy: Any = session
+    while proxy is not None:
+        if isinstance(proxy, BufferedSession):  # We are nested in another step
+            proxy.write(text)
+            return
+        proxy = getattr(proxy, "__dict__", {}).get("_session")
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def _print_result(session: nox.Session, result: StepResult) -> None:
+    """Print the buffered output and status of a step.
+
+    Args:
+        session: The nox session to use to log the status.
+        result: The result to print.
+    """
+    session.log(f"----- {result.name} -----")
+    write_output(session, result.output)
+    if result.cancelled:
+        session.warn(f"{result.name}: cancelled after {result.duration:.1f}s")
+    elif result.error is not None:
+        session.warn(
+            f"{result.name}: failed ({result.error}) in {result.duration:.1f}s"
+        )
+    else:
+        session.log(f"{result.name}: succeeded in {result.duration:.1f}s")
+
+
+def check_results(session: nox.Session, results: Sequence[StepResult], /) -> None:
+    """Log a summary of the results and fail the session if any step failed.
+
+    Args:
+        session: The nox session to fail.
+        results: The results of the steps.
+    """
+    for result in results:
+        status = "ok" if result.ok else "cancelled" if result.cancelled else "FAILED"
+        session.log(f"{result.name:>20}: {status} ({result.duration:.1f}s)")
+    if failed := [r.name for r in results if not r.ok]:
+        session.error(f"Some steps failed or were cancelled: {', '.join(failed)}")
+
+
+def default_workers() -> int:
+    """Get the default number of workers to use to run things in parallel.
+
+    Returns:
+        The number of CPUs available to this process.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on all platforms
+        return os.cpu_count() or 1
+
+
+def partition(weights: Mapping[str, float], parts: int, /) -> list[list[str]]:
+    """Split some items into groups with a similar total weight.
+
+    This uses the greedy *longest processing time* algorithm: items are assigned from
+    the heaviest to the lightest, always to the lightest group so far.
+
+    Args:
+        weights: The weight of each item.
+        parts: The maximum number of groups to make.
+
+    Returns:
+        The groups, without empty groups. The items in each group keep the order they
+            had in `weights`.
+
+    Example:
+        >>> assert partition({"a": 3, "b": 2, "c": 1, "d": 2}, 2) == [["a", "c"], ["b", "d"]]
+    """
+    heap: list[tuple[float, int]] = [(0.0, i) for i in range(max(parts, 1))]
+    groups: list[set[str]] = [set() for _ in heap]
+    for item in sorted(weights, key=lambda i: weights[i], reverse=True):
+        total, index = heapq.heappop(heap)
+        groups[index].add(item)
+        heapq.heappush(heap, (total + weights[item], index))
+    return [[i for i in weights if i in group] for group in groups if group]
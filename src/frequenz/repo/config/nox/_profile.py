@@ -0,0 +1,130 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Run the tools used by the sessions under a profiler."""
+
+import collections
+import os
+import pathlib
+import shutil
+from typing import Any
+
+import nox
+
+from . import config as _config
+
+PROFILES_DIRECTORY = pathlib.Path(".nox", "profiles")
+"""The directory where the profiles are written."""
+
+PROFILED_SCRIPT = pathlib.Path(__file__).with_name("_profiled.py")
+"""The script running a tool under `cProfile`, with the session's Python interpreter."""
+
+PROFILED_TOOLS = frozenset({"black", "flake8", "isort", "mypy", "pylint", "pytest"})
+"""The commands that can be profiled by running their Python module."""
+
+_runs: collections.Counter[tuple[str, str]] = collections.Counter()
+"""How many times each tool was profiled in each session, to name the profiles."""
+
+
+def _python_target(args: tuple[str, ...]) -> list[str] | None:
+    """Get the Python module or script run by a command.
+
+    Args:
+        args: The command.
+
+    Returns:
+        The arguments to pass to `python` to run the same command (`-m MODULE ...` or
+            `SCRIPT ...`), or `None` if the command can't be profiled.
+    """
+    if args and args[0] in PROFILED_TOOLS:
+        return ["-m", *args]
+    if len(args) > 1 and args[0] == "python" and not args[1].startswith("-"):
+        return list(args[1:])
+    if len(args) > 2 and args[0] == "python" and args[1] == "-m":
+        return list(args[1:])
+    return None
+
+
+def profile_path(session: nox.Session, target: list[str], suffix: str) -> pathlib.Path:
+    """Get the file where to write the profile of a command.
+
+    Args:
+        session: The nox session.
+        target: The Python module or script run (as returned by `_python_target()`).
+        suffix: The suffix of the file.
+
+    Returns:
+        The path of the profile, unique for each run of a tool in a session.
+    """
+    tool = target[1] if target[0] == "-m" else pathlib.Path(target[0]).stem
+    tool = tool.lstrip("_")
+    _runs[session.name, tool] += 1
+    return (
+        PROFILES_DIRECTORY
+        / f"{session.name}-{tool}-{_runs[session.name, tool]}{suffix}"
+    )
+
+
+def _find_py_spy(session: nox.Session) -> str | None:
+    """Find the `py-spy` command, in the session virtualenv or in the `PATH`.
+
+    Args:
+        session: The nox session.
+
+    Returns:
+        The path to the `py-spy` command, or `None` if it is not installed.
+    """
+    paths = [*(session.bin_paths or []), os.environ.get("PATH", "")]
+    return shutil.which("py-spy", path=os.pathsep.join(paths))
+
+
+def run(session: nox.Session, *args: str, **kwargs: Any) -> Any:
+    """Run a command, under a profiler if profiling is enabled.
+
+    Commands that run one of the `PROFILED_TOOLS`, or a Python module or script, are
+    profiled according to the
+    [`profile`][frequenz.repo.config.nox.config.Config.profile] option. Other
+    commands are run as usual.
+
+    Args:
+        session: The nox session.
+        *args: The command to run.
+        **kwargs: Keyword arguments for `session.run()`.
+
+    Returns:
+        What `session.run()` returns.
+    """
+    conf = _config.get()
+    target = _python_target(args) if conf.profile is not None else None
+    if target is None:
+        return session.run(*args, **kwargs)
+
+    if conf.profile == "py-spy":
+        if (py_spy := _find_py_spy(session)) is not None:
+            output = profile_path(session, target, ".svg")
+            output.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                return session.run(
+                    py_spy,
+                    "record",
+                    "--format=flamegraph",
+                    f"--output={output}",
+                    "--",
+                    "python",
+                    *target,
+                    **{**kwargs, "external": True},
+                )
+            finally:
+                session.log(f"Flame graph saved to {output}")
+        session.warn("py-spy is not installed, profiling with cProfile instead")
+
+    output = profile_path(session, target, ".pstats")
+    return session.run(
+        "python",
+        str(PROFILED_SCRIPT),
+        f"--output={output}",
+        f"--top={conf.profile_top}",
+        "--",
+        *target,
+        **kwargs,
+    )
@@ -0,0 +1,114 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Run a Python module or script under `cProfile` and summarize the profile.
+
+The profile is saved in the `pstats` format and the functions taking most of the time
+are printed when the program finishes, even if it fails.
+
+Unlike `python -m cProfile`, the exit code of the profiled program is preserved, so
+it can be used to run checks that can fail.
+
+This script is run with the Python interpreter of the session virtualenv, where the
+profiled tool is installed, so it must not import anything from the
+`frequenz.repo.config` package.
+
+Usage:
+    python _profiled.py --output FILE [--top N] -- (-m MODULE | SCRIPT) [ARG]...
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import runpy
+import sys
+from collections.abc import Sequence
+
+SORT_KEYS = {"cumulative": "cumulative time", "tottime": "own time"}
+"""The orders in which the functions are shown in the summary, and their description."""
+
+
+def _exit_code(exc: SystemExit) -> int:
+    """Get the exit code the interpreter would use for a `SystemExit`.
+
+    Args:
+        exc: The exception.
+
+    Returns:
+        The exit code.
+    """
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+def summarize(stats_file: str, top: int) -> None:
+    """Print the functions taking most of the time in a profile.
+
+    Args:
+        stats_file: The file where the profile was saved.
+        top: How many functions to show for each sort order.
+    """
+    stats = pstats.Stats(stats_file, stream=sys.stderr)
+    stats.strip_dirs()
+    for key, description in SORT_KEYS.items():
+        print(f"\nTop {top} functions by {description}:", file=sys.stderr)
+        stats.sort_stats(key).print_stats(top)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the program passed as command-line arguments under the profiler.
+
+    Args:
+        argv: The command-line arguments (without the program name).
+
+    Returns:
+        The exit code of the profiled program.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("target", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    target: list[str] = args.target
+    if target[:1] == ["--"]:
+        target = target[1:]
+    if not target or (target[0] == "-m" and len(target) < 2):
+        parser.error("a module (-m MODULE) or a script to profile is required")
+
+    if target[0] == "-m":
+        module: str | None = target[1]
+        sys.argv = [target[1], *target[2:]]
+        # Like `python -m`, modules are looked up in the current directory first
+        sys.path[0] = os.getcwd()
+    else:
+        module = None
+        sys.argv = target
+        sys.path[0] = os.path.dirname(os.path.abspath(target[0]))
+
+    code = 0
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        if module is not None:
+            runpy.run_module(module, run_name="__main__", alter_sys=True)
+        else:
+            runpy.run_path(target[0], run_name="__main__")
+    except SystemExit as exc:
+        code = _exit_code(exc)
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        profiler.dump_stats(args.output)
+        if args.top > 0:
+            summarize(args.output, args.top)
+        print(f"\nProfile saved to {args.output}", file=sys.stderr)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
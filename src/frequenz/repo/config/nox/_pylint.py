@@ -0,0 +1,169 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Split pylint runs in shards and merge their results.
+
+Files are grouped by the directory (package) they are in, so modules that import each
+other are usually checked by the same pylint process, and the groups are split in
+shards with a similar amount of source code. Each shard writes its messages as JSON,
+and the reports of all shards are merged into one deduplicated report.
+"""
+
+import json
+import logging
+import pathlib
+import re
+from collections.abc import Iterable
+from typing import Any
+
+from . import _parallel
+from . import util as _util
+
+_logger = logging.getLogger(__name__)
+
+
+def _package_modules(package: pathlib.Path) -> Iterable[pathlib.Path]:
+    """Find the modules in a package, like pylint does.
+
+    Args:
+        package: The directory of the package.
+
+    Yields:
+        The modules in the package and its sub-packages. Directories that are not
+            packages (without a `__init__.py` file) are skipped.
+    """
+    for child in sorted(package.iterdir()):
+        if child.is_dir():
+            if (child / "__init__.py").exists():
+                yield from _package_modules(child)
+        elif child.suffix == ".py":
+            yield child
+
+
+def module_files(paths: Iterable[str], /) -> list[pathlib.Path]:
+    """Expand paths to the Python modules pylint would check.
+
+    Files are returned as they are. Packages are searched for modules only in
+    sub-packages, and other directories are searched recursively for all Python
+    modules, like pylint does.
+
+    Args:
+        paths: The files and directories to expand.
+
+    Returns:
+        The Python modules in `paths`, without duplicates.
+    """
+    files: list[pathlib.Path] = []
+    for path in map(pathlib.Path, paths):
+        if (path / "__init__.py").exists():
+            files.extend(_package_modules(path))
+        elif path.is_dir():
+            files.extend(
+                f for f in _util.python_files([str(path)]) if f.suffix == ".py"
+            )
+        else:
+            files.append(path)
+    return list(_util.deduplicate(files))
+
+
+def shards(paths: Iterable[str], parts: int, /) -> list[list[str]]:
+    """Split the Python modules in some paths in shards of a similar size.
+
+    Args:
+        paths: The files and directories to split.
+        parts: The maximum number of shards to make.
+
+    Returns:
+        The files in each shard.
+    """
+    groups: dict[str, list[pathlib.Path]] = {}
+    for file in module_files(paths):
+        groups.setdefault(str(file.parent), []).append(file)
+
+    def size(file: pathlib.Path) -> int:
+        try:
+            return file.stat().st_size
+        except OSError:
+            return 0
+
+    weights = {d: float(sum(map(size, files))) for d, files in groups.items()}
+    return [
+        [str(f) for directory in shard for f in groups[directory]]
+        for shard in _parallel.partition(weights, parts)
+    ]
+
+
+def read_reports(paths: Iterable[pathlib.Path], /) -> list[dict[str, Any]]:
+    """Read and merge the JSON reports written by pylint.
+
+    Args:
+        paths: The JSON reports to read. Reports that can't be read are ignored.
+
+    Returns:
+        The messages in all reports, without duplicates, sorted by file and position.
+    """
+    messages: dict[tuple[Any, ...], dict[str, Any]] = {}
+    for path in paths:
+        try:
+            report = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            _logger.warning("Can't read the pylint report %s: %s", path, exc)
+            continue
+        for message in report:
+            key = (
+                message.get("path"),
+                message.get("line"),
+                message.get("column"),
+                message.get("message-id"),
+                message.get("message"),
+            )
+            messages.setdefault(key, message)
+    return sorted(
+        messages.values(),
+        key=lambda m: (m.get("path", ""), m.get("line") or 0, m.get("column") or 0),
+    )
+
+
+def format_messages(messages: Iterable[dict[str, Any]], /) -> str:
+    """Format messages like the pylint text reporter does.
+
+    Args:
+        messages: The messages to format, as read by `read_reports()`.
+
+    Returns:
+        The formatted messages.
+    """
+    lines: list[str] = []
+    module = None
+    for message in messages:
+        if message.get("module") != module:
+            module = message.get("module")
+            lines.append(f"************* Module {module}")
+        lines.append(
+            f"{message.get('path')}:{message.get('line')}:{message.get('column')}: "
+            f"{message.get('message-id')}: {message.get('message')} "
+            f"({message.get('symbol')})"
+        )
+    return "\n".join(lines)
+
+
+def exit_code(results: Iterable[_parallel.StepResult], /) -> int:
+    """Combine the exit codes of the pylint shards.
+
+    The pylint exit code is a bit mask of the kinds of messages that were emitted, so
+    the combined exit code is the bitwise OR of the codes of all shards.
+
+    Args:
+        results: The results of running the shards.
+
+    Returns:
+        The combined exit code.
+    """
+    code = 0
+    for result in results:
+        if result.error is None:
+            continue
+        match = re.search(r"code (\d+)", result.error)
+        # If pylint didn't exit by itself, report it as a fatal error (1)
+        code |= int(match.group(1)) if match else 1
+    return code
@@ -0,0 +1,329 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Measure the time spent in each step of a nox session.
+
+Sessions decorated with `timed()` get a proxy session that records how long each
+`run()` and `install()` call takes. When the session finishes, a JSON report is
+written to `.nox/.timing/<session>.json`, and optionally a markdown summary is appended
+to a file (like `$GITHUB_STEP_SUMMARY`).
+
+CPU time and peak memory are taken from the resource usage of the child processes of
+nox, so they are only accurate when steps don't run concurrently. The peak memory is
+only reported for steps that used more memory than all the previous steps, as the
+operating system only keeps track of the biggest child process.
+"""
+
+import dataclasses
+import datetime
+import functools
+import json
+import pathlib
+import re
+import sys
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Concatenate, ParamSpec
+
+import nox
+import nox.command
+
+from . import config as _config
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None  # type: ignore[assignment]  # pylint: disable=invalid-name
+
+_P = ParamSpec("_P")
+
+REPORT_DIRECTORY = pathlib.Path(".nox", ".timing")
+"""The directory where the JSON reports are written."""
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class StepTiming:
+    """The measurements of a session step."""
+
+    step: str
+    """The name of the step, `<session>/<tool>`."""
+
+    command: list[str]
+    """The command that was run."""
+
+    wall_time: float
+    """The wall time the step took, in seconds."""
+
+    cpu_time: float | None
+    """The user and system CPU time used by the step, in seconds."""
+
+    peak_rss_kib: int | None
+    """The peak resident memory of the step, in KiB.
+
+    `None` if it is unknown or not bigger than the peak of previous steps.
+    """
+
+    exit_code: int
+    """The exit code of the command."""
+
+
+def _children_usage() -> tuple[float, int] | None:
+    """Get the CPU time and peak memory used by the child processes so far.
+
+    Returns:
+        The CPU time (in seconds) and peak resident memory (in KiB), or `None` if
+            they can't be measured in this platform.
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    max_rss = usage.ru_maxrss
+    if sys.platform == "darwin":  # macOS reports bytes instead of KiB
+        max_rss //= 1024
+    return usage.ru_utime + usage.ru_stime, max_rss
+
+
+class Recorder:
+    """Record the timing of the steps of a session."""
+
+    def __init__(self, session_name: str) -> None:
+        """Initialize this recorder.
+
+        Args:
+            session_name: The name of the session being recorded.
+        """
+        self._session_name = session_name
+        self._started = datetime.datetime.now(datetime.timezone.utc)
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._steps: list[StepTiming] = []
+        self._names: dict[str, int] = {}
+
+    @property
+    def steps(self) -> list[StepTiming]:
+        """The steps recorded so far."""
+        with self._lock:
+            return list(self._steps)
+
+    def measure(self, name: str, command: list[str], func: Callable[[], Any]) -> Any:
+        """Measure a step.
+
+        Args:
+            name: The name of the step.
+            command: The command run by the step.
+            func: The function running the step.
+
+        Returns:
+            The return value of `func`.
+
+        Raises:
+            nox.command.CommandFailed: If the command run by `func` fails.
+        """
+        before = _children_usage()
+        start = time.perf_counter()
+        exit_code = 0
+        try:
+            return func()
+        except nox.command.CommandFailed as exc:
+            match = re.search(r"code (-?\d+)", str(exc.reason))
+            exit_code = int(match.group(1)) if match else 1
+            raise
+        finally:
+            wall_time = time.perf_counter() - start
+            after = _children_usage()
+            with self._lock:
+                count = self._names[name] = self._names.get(name, 0) + 1
+                self._steps.append(
+                    StepTiming(
+                        step=name if count == 1 else f"{name}#{count}",
+                        command=command,
+                        wall_time=wall_time,
+                        cpu_time=after[0] - before[0] if before and after else None,
+                        peak_rss_kib=(
+                            after[1]
+                            if before and after and after[1] > before[1]
+                            else None
+                        ),
+                        exit_code=exit_code,
+                    )
+                )
+
+    def write_report(self, summary: pathlib.Path | None = None) -> pathlib.Path:
+        """Write the JSON report and optionally a markdown summary.
+
+        Args:
+            summary: The file where to append a markdown summary, if any.
+
+        Returns:
+            The path of the JSON report.
+        """
+        steps = self.steps
+        wall_time = time.perf_counter() - self._start
+        REPORT_DIRECTORY.mkdir(parents=True, exist_ok=True)
+        report = REPORT_DIRECTORY / f"{self._session_name}.json"
+        report.write_text(
+            json.dumps(
+                {
+                    "session": self._session_name,
+                    "started": self._started.isoformat(),
+                    "wall_time": wall_time,
+                    "steps": [dataclasses.asdict(s) for s in steps],
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+        if summary is not None:
+            lines = [
+                f"### Timing of the `{self._session_name}` session "
+                f"({wall_time:.1f}s)",
+                "",
+                "| Step | Wall time | CPU time | Peak RSS | Exit code |",
+                "|------|----------:|---------:|---------:|----------:|",
+            ]
+            for step in steps:
+                cpu = "" if step.cpu_time is None else f"{step.cpu_time:.1f}s"
+                rss = (
+                    ""
+                    if step.peak_rss_kib is None
+                    else f"{step.peak_rss_kib >> 10} MiB"
+                )
+                lines.append(
+                    f"| `{step.step}` | {step.wall_time:.1f}s | {cpu} | {rss} "
+                    f"| {step.exit_code} |"
+                )
+            with summary.open("a", encoding="utf-8") as summary_file:
+                summary_file.write("\n".join(lines) + "\n\n")
+
+        return report
+
+
+class TimedSession:
+    """A proxy for a nox session that measures the time of each command."""
+
+    def __init__(self, session: nox.Session, recorder: Recorder, name: str) -> None:
+        """Initialize this proxy.
+
+        Args:
+            session: The nox session to wrap.
+            recorder: The recorder where to store the measurements.
+            name: The name of the session, used as prefix for the step names.
+        """
+        self._session = session
+        self.recorder = recorder
+        self._name = name
+
+    def __getattr__(self, name: str) -> Any:
+        """Forward any attribute not defined by the proxy to the wrapped session.
+
+        Args:
+            name: The name of the attribute.
+
+        Returns:
+            The attribute of the wrapped session.
+        """
+        return getattr(self._session, name)
+
+    def run(self, *args: str, **kwargs: Any) -> Any:
+        """Run a command measuring the time it takes.
+
+        Args:
+            *args: The command to run.
+            **kwargs: Other options for `nox.Session.run()`.
+
+        Returns:
+            What `nox.Session.run()` returns.
+        """
+        tool = pathlib.Path(args[0]).name if args else ""
+        return self.recorder.measure(
+            f"{self._name}/{tool}",
+            list(args),
+            lambda: self._session.run(*args, **kwargs),
+        )
+
+    def install(self, *args: str, **kwargs: Any) -> None:
+        """Install packages measuring the time it takes.
+
+        Args:
+            *args: The packages to install.
+            **kwargs: Other options for `nox.Session.install()`.
+        """
+        self.recorder.measure(
+            f"{self._name}/install",
+            ["install", *args],
+            lambda: self._session.install(*args, **kwargs),
+        )
+
+    @property
+    def wrapped(self) -> nox.Session:
+        """The wrapped nox session."""
+        return self._session
+
+
+def _find_recorder(session: Any) -> Recorder | None:
+    """Find the recorder used by a (possibly proxied) session.
+
+    Args:
+        session: The session to look into.
+
+    Returns:
+        The recorder, or `None` if the session is not being timed.
+    """
+    while session is not None:
+        if isinstance(session, TimedSession):
+            return session.recorder
+        session = getattr(session, "__dict__", {}).get("_session")
+    return None
+
+
+def timed(
+    func: Callable[Concatenate[nox.Session, _P], None]
+) -> Callable[Concatenate[nox.Session, _P], None]:
+    """Time the steps of a session function.
+
+    This only does something if
+    [`timing_report`][frequenz.repo.config.nox.config.Config.timing_report] is enabled.
+
+    If the session function is called from another timed session (for example
+    `ci_checks_max` calling `mypy`), the steps are recorded in the report of the
+    calling session.
+
+    Args:
+        func: The session function to time.
+
+    Returns:
+        The wrapped session function.
+    """
+
+    @functools.wraps(func)
+    def wrapper(session: nox.Session, /, *args: _P.args, **kwargs: _P.kwargs) -> None:
+        recorder = _find_recorder(session)
+        if recorder is not None:
+            inner = session.wrapped if isinstance(session, TimedSession) else session
+            func(
+                TimedSession(inner, recorder, func.__name__),  # type: ignore[arg-type]
+                *args,
+                **kwargs,
+            )
+            return
+
+        conf = _config.get()
+        if not conf.timing_report:
+            func(session, *args, **kwargs)
+            return
+
+        recorder = Recorder(session.name)
+        try:
+            func(
+                TimedSession(session, recorder, func.__name__),  # type: ignore[arg-type]
+                *args,
+                **kwargs,
+            )
+        finally:
+            summary = conf.timing_summary
+            report = recorder.write_report(pathlib.Path(summary) if summary else None)
+            session.log(f"Timing report written to {report}")
+
+    return wrapper
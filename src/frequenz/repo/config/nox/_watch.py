@@ -0,0 +1,345 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Watch files for changes and plan which checks need to run again.
+
+Changes are detected with [watchdog](https://pypi.org/project/watchdog/) (inotify,
+FSEvents, etc.) if it is installed in the environment running nox, or by polling the
+modification time of the files otherwise.
+"""
+
+import abc
+import dataclasses
+import logging
+import os
+import pathlib
+import queue
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from . import _impact
+from . import util as _util
+
+try:
+    from watchdog import events as _events
+    from watchdog import observers as _observers
+except ImportError:
+    _events = None  # type: ignore[assignment]  # pylint: disable=invalid-name
+    _observers = None  # type: ignore[assignment]  # pylint: disable=invalid-name
+
+_logger = logging.getLogger(__name__)
+
+_CHANGE_EVENTS = frozenset({"created", "modified", "deleted", "moved", "closed"})
+"""The watchdog event types that can mean a file changed."""
+
+DEFAULT_INTERVAL = 0.5
+"""How often to look for changes, and how long to wait for more, in seconds."""
+
+
+class FileWatcher(abc.ABC):
+    """Watch the Python files in some paths and some other files for changes."""
+
+    def __init__(
+        self,
+        paths: Iterable[str],
+        files: Iterable[str] = (),
+        /,
+        *,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> None:
+        """Initialize this watcher.
+
+        Args:
+            paths: The paths where to watch Python files.
+            files: Other files to watch (like configuration files).
+            interval: How often to look for changes, and how long to wait for more
+                changes after a change is detected, in seconds.
+        """
+        self._paths = list(paths)
+        self._files = {pathlib.Path(f) for f in files}
+        self._interval = interval
+
+    def is_relevant(self, path: pathlib.Path, /) -> bool:
+        """Check if a changed path should be reported.
+
+        Args:
+            path: The changed path, relative to the current directory.
+
+        Returns:
+            Whether the path is a watched file.
+        """
+        return path in self._files or (
+            _util.is_python_file(path) and not _util.is_pruned(path)
+        )
+
+    def wait(self, timeout: float | None = None, /) -> list[pathlib.Path]:
+        """Wait for changes.
+
+        When a change is detected, this keeps waiting until no more changes happen for
+        one interval, so all the files saved together are reported at once.
+
+        Args:
+            timeout: The maximum time to wait for a first change, in seconds, or
+                `None` to wait forever.
+
+        Returns:
+            The changed files (including created and deleted files), sorted, or an
+                empty list if there were no changes before the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changed: set[pathlib.Path] = set()
+        while True:
+            if changed:
+                remaining: float | None = self._interval
+            elif deadline is None:
+                remaining = None
+            else:
+                remaining = max(0.0, deadline - time.monotonic())
+            # Irrelevant changes (like editor temporary files) also mean files are
+            # still being saved, so they don't end the wait either
+            new = self._changes(remaining)
+            if not new and (changed or remaining == 0.0):
+                return sorted(changed)
+            changed |= {p for p in new if self.is_relevant(p)}
+
+    def close(self) -> None:
+        """Stop watching."""
+
+    @abc.abstractmethod
+    def _changes(self, timeout: float | None, /) -> set[pathlib.Path]:
+        """Wait for the next changes.
+
+        Args:
+            timeout: The maximum time to wait, in seconds, or `None` to wait forever.
+
+        Returns:
+            The changed paths (they could be irrelevant), or an empty set if there
+                were no changes before the timeout.
+        """
+
+
+class PollingWatcher(FileWatcher):
+    """Watch for changes by polling the modification time and size of the files."""
+
+    def __init__(
+        self,
+        paths: Iterable[str],
+        files: Iterable[str] = (),
+        /,
+        *,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> None:
+        """Initialize this watcher.
+
+        Args:
+            paths: The paths where to watch Python files.
+            files: Other files to watch (like configuration files).
+            interval: How often to look for changes, and how long to wait for more
+                changes after a change is detected, in seconds.
+        """
+        super().__init__(paths, files, interval=interval)
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> dict[pathlib.Path, tuple[int, int]]:
+        """Get the modification time and size of all the watched files.
+
+        Returns:
+            The modification time and size of each existing file.
+        """
+        snapshot: dict[pathlib.Path, tuple[int, int]] = {}
+        for path in [*_util.python_files(self._paths), *self._files]:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _changes(self, timeout: float | None, /) -> set[pathlib.Path]:
+        """Poll for changes.
+
+        Args:
+            timeout: The maximum time to wait, in seconds, or `None` to wait forever.
+
+        Returns:
+            The changed paths, or an empty set if there were no changes before the
+                timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            sleep = self._interval
+            if deadline is not None:
+                sleep = min(sleep, max(0.0, deadline - time.monotonic()))
+            time.sleep(sleep)
+            snapshot = self._take_snapshot()
+            changed = {
+                path
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+
+class WatchdogWatcher(FileWatcher):
+    """Watch for changes using the file system notifications, through watchdog."""
+
+    def __init__(
+        self,
+        paths: Iterable[str],
+        files: Iterable[str] = (),
+        /,
+        *,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> None:
+        """Initialize this watcher.
+
+        Args:
+            paths: The paths where to watch Python files.
+            files: Other files to watch (like configuration files).
+            interval: How long to wait for more changes after a change is detected,
+                in seconds.
+        """
+        super().__init__(paths, files, interval=interval)
+        assert _observers is not None and _events is not None
+        self._queue: queue.Queue[pathlib.Path] = queue.Queue()
+        cwd = pathlib.Path.cwd()
+        changes = self._queue
+
+        class _Handler(_events.FileSystemEventHandler):
+            def on_any_event(self, event: Any) -> None:
+                # Files being opened or read by the checks are not changes
+                if event.is_directory or event.event_type not in _CHANGE_EVENTS:
+                    return
+                for path in (event.src_path, getattr(event, "dest_path", "")):
+                    if path:
+                        absolute = pathlib.Path(os.fsdecode(path)).absolute()
+                        if absolute.is_relative_to(cwd):
+                            changes.put(absolute.relative_to(cwd))
+
+        # nox shows debug messages, and watchdog logs every single event
+        logging.getLogger("watchdog").setLevel(logging.INFO)
+        self._observer = _observers.Observer()
+        handler = _Handler()
+        watched = {pathlib.Path(p) for p in self._paths if pathlib.Path(p).is_dir()}
+        # Single files can't be watched, so their directories are watched instead
+        watched_parents = {
+            pathlib.Path(p).parent
+            for p in [*self._paths, *map(str, self._files)]
+            if not pathlib.Path(p).is_dir()
+        }
+        for directory in watched:
+            self._observer.schedule(handler, str(directory), recursive=True)
+        for directory in watched_parents - watched:
+            self._observer.schedule(handler, str(directory), recursive=False)
+        self._observer.start()
+
+    def _changes(self, timeout: float | None, /) -> set[pathlib.Path]:
+        """Wait for file system events.
+
+        Args:
+            timeout: The maximum time to wait, in seconds, or `None` to wait forever.
+
+        Returns:
+            The changed paths, or an empty set if there were no changes before the
+                timeout.
+        """
+        try:
+            changed = {self._queue.get(timeout=timeout)}
+        except queue.Empty:
+            return set()
+        while True:
+            try:
+                changed.add(self._queue.get_nowait())
+            except queue.Empty:
+                return changed
+
+    def close(self) -> None:
+        """Stop watching."""
+        self._observer.stop()
+        self._observer.join()
+
+
+def make_watcher(
+    paths: Iterable[str],
+    files: Iterable[str] = (),
+    /,
+    *,
+    interval: float = DEFAULT_INTERVAL,
+) -> FileWatcher:
+    """Create the best file watcher available.
+
+    Args:
+        paths: The paths where to watch Python files.
+        files: Other files to watch (like configuration files).
+        interval: How often to look for changes, and how long to wait for more
+            changes after a change is detected, in seconds.
+
+    Returns:
+        A watcher using file system notifications if watchdog is installed, or
+            polling otherwise.
+    """
+    if _observers is not None:
+        try:
+            return WatchdogWatcher(paths, files, interval=interval)
+        except OSError as exc:  # For example, if the inotify watches limit is reached
+            _logger.warning("Can't watch for changes with watchdog: %s", exc)
+    return PollingWatcher(paths, files, interval=interval)
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Plan:
+    """The checks that need to run after some changes."""
+
+    files: list[str] | None
+    """The files to format and lint, or `None` if all files should be checked."""
+
+    tests: list[str] | None
+    """The test files to run, or `None` if all the tests should be run."""
+
+    reason: str
+    """Why these checks were selected."""
+
+
+def plan(
+    changed: Iterable[pathlib.Path],
+    /,
+    *,
+    source_paths: Iterable[str],
+    test_paths: Iterable[str],
+    config_files: Iterable[str],
+) -> Plan:
+    """Plan the checks to run after some changes.
+
+    Formatting and linters only need to check the changed files, and only the tests
+    affected by the changes need to run, unless a configuration file changed, in
+    which case all files are checked and all tests run. Type checks are always run,
+    as a change can break any other module.
+
+    Args:
+        changed: The changed files.
+        source_paths: The paths containing the source packages.
+        test_paths: The paths where pytest looks for tests.
+        config_files: The configuration files that could affect any check.
+
+    Returns:
+        The checks to run.
+    """
+    changed = list(changed)
+    config_files = list(config_files)
+    selection = _impact.select_tests(
+        changed,
+        source_paths=source_paths,
+        test_paths=test_paths,
+        config_files=config_files,
+    )
+    config = {pathlib.Path(f) for f in config_files} | {pathlib.Path("pyproject.toml")}
+    if any(f in config for f in changed):
+        return Plan(files=None, tests=None, reason=selection.reason)
+    return Plan(
+        files=[str(f) for f in changed if f.exists() and _util.is_python_file(f)],
+        tests=selection.tests,
+        reason=selection.reason,
+    )
@@ -13,7 +13,9 @@ The `configure()` function must be called before `get()` is used.
 """
 
 import dataclasses as _dataclasses
-from typing import Self, assert_never, overload
+import os as _os
+import pathlib as _pathlib
+from typing import Literal, Self, assert_never, overload
 
 import nox as _nox
 
@@ -60,8 +62,61 @@ class CommandsOptions:
         )
 
 
+Installer = Literal["pip", "uv"]
+"""The tools that can be used to install packages in the sessions virtualenvs."""
+
+
+def _installer_from_env() -> Installer:
+    """Read the installer to use from the `FREQUENZ_NOX_INSTALLER` environment variable.
+
+    Returns:
+        The installer, `pip` if the environment variable is not set or empty.
+
+    Raises:
+        ValueError: If the environment variable has an invalid value.
+    """
+    match value := _os.environ.get("FREQUENZ_NOX_INSTALLER", "").strip().lower():
+        case "" | "pip":
+            return "pip"
+        case "uv":
+            return "uv"
+        case _:
+            raise ValueError(
+                f"Invalid value for the environment variable FREQUENZ_NOX_INSTALLER: "
+                f"{value!r}"
+            )
+
+
+Profiler = Literal["cprofile", "py-spy"]
+"""The profilers that can be used to run the tools used by the sessions."""
+
+
+def _profiler_from_env() -> Profiler | None:
+    """Read the profiler to use from the `FREQUENZ_NOX_PROFILE` environment variable.
+
+    Returns:
+        The profiler, `cprofile` if the variable is a true flag (like `1`), or `None`
+            if the environment variable is not set or a false flag (like `0`).
+
+    Raises:
+        ValueError: If the environment variable has an invalid value.
+    """
+    match value := _os.environ.get("FREQUENZ_NOX_PROFILE", "").strip().lower():
+        case "" | "0" | "false" | "no" | "off":
+            return None
+        case "1" | "true" | "yes" | "on" | "cprofile":
+            return "cprofile"
+        case "py-spy":
+            return "py-spy"
+        case _:
+            raise ValueError(
+                f"Invalid value for the environment variable FREQUENZ_NOX_PROFILE: "
+                f"{value!r}"
+            )
+
+
 @_dataclasses.dataclass(kw_only=True, slots=True)
-class Config:
+class Config:  # pylint: disable=too-many-instance-attributes
     """Configuration for nox sessions."""
 
     opts: CommandsOptions = _dataclasses.field(default_factory=CommandsOptions)
@@ -90,15 +145,379 @@ class Config:
     tools invoked by the sessions.
     """
 
+    config_files: list[str] = _dataclasses.field(
+        default_factory=lambda: [
+            ".flake8",
+            ".isort.cfg",
+            ".pylintrc",
+            "mypy.ini",
+            "noxfile.py",
+            "pylintrc",
+            "pyproject.toml",
+            "setup.cfg",
+            "setup.py",
+            "tox.ini",
+        ]
+    )
+    """List of files that configure the tools used by the sessions.
+
+    When any of these files change, all files need to be checked again.
+    """
+
+    changed_since: str | None = _dataclasses.field(
+        default_factory=lambda: _os.environ.get("FREQUENZ_NOX_CHANGED_SINCE") or None
+    )
+    """Only check the Python files changed since this git reference.
+
+    If set (for example to `origin/main`),
+    [`path_args()`][frequenz.repo.config.nox.config.Config.path_args] only returns the
+    `.py` and `.pyi` files that changed since the merge-base of this reference and
+    `HEAD` (including uncommitted and untracked files). If any of the `config_files`
+    changed, all paths are returned as usual.
+
+    The default is taken from the `FREQUENZ_NOX_CHANGED_SINCE` environment variable
+    (disabled if it is not set or empty).
+    """
+
+    check_cache: bool = _dataclasses.field(
+        default_factory=lambda: _util.env_flag("FREQUENZ_NOX_CHECK_CACHE")
+    )
+    """Whether to skip checking files that were already checked clean.
+
+    When enabled, the `formatting`, `flake8` and `pylint` sessions keep an on-disk
+    cache (in `.nox/.check-cache`) of the files they checked clean, keyed by the file
+    contents, the tool versions, the tool options and the contents of the
+    `config_files`, and only check files that are not in the cache.
+
+    As `pylint` also looks at other modules when checking a file, its results are
+    only reused when none of the checked files, nor any Python file in the
+    `source_paths` and `extra_paths`, changed.
+
+    The default is taken from the `FREQUENZ_NOX_CHECK_CACHE` environment variable
+    (disabled if it is not set).
+    """
+
+    mypy_daemon: bool = _dataclasses.field(
+        default_factory=lambda: _util.env_flag("FREQUENZ_NOX_MYPY_DAEMON")
+    )
+    """Whether the `mypy` session should use the mypy daemon (`dmypy`).
+
+    When enabled, a daemon is kept running in the background for each of the checks
+    (sources and development paths) in each virtualenv, so re-checking after small
+    changes only takes a fraction of the time. Daemons are restarted when the mypy
+    options, the mypy version or any of the `config_files` change, stop by
+    themselves after an hour without being used and can be stopped explicitly with
+    the `mypy_daemon_stop` session.
+
+    The default is taken from the `FREQUENZ_NOX_MYPY_DAEMON` environment variable
+    (disabled if it is not set).
+    """
+
+    session_groups: dict[str, list[str]] = _dataclasses.field(
+        default_factory=lambda: {}
+    )
+    """Groups of sessions that share one virtualenv.
+
+    Each key is the name of a group and the value is the list of sessions in the
+    group, for example `{"lint": ["formatting", "flake8", "pylint"]}`. All sessions
+    in a group use the same virtualenv (`.nox/group-<name>`), where the dependencies
+    of all the sessions in the group are installed once, so running
+    `nox -e formatting flake8 pylint` only installs one virtualenv.
+
+    Only the predefined sessions can be grouped, except `pytest_min`, as it needs
+    different versions of the dependencies, and a session can only be in one group.
+    """
+
+    pytest_workers: int = _dataclasses.field(
+        default_factory=lambda: _util.env_int("FREQUENZ_NOX_PYTEST_WORKERS", default=1)
+    )
+    """The number of parallel pytest processes used by the `pytest_*` sessions.
+
+    If bigger than 1, the collected test files are split in this number of groups with
+    a similar duration (according to the durations recorded in previous runs), and
+    each group is run by a separate pytest process. The results of all the processes
+    are then combined into one report. If 0, the number of CPUs is used.
+
+    Tests are always run in one process when positional arguments are passed to
+    the session, as they could change the way tests are collected.
+
+    The default is taken from the `FREQUENZ_NOX_PYTEST_WORKERS` environment variable
+    (1 if it is not set).
+    """
+
+    pylint_workers: int = _dataclasses.field(
+        default_factory=lambda: _util.env_int("FREQUENZ_NOX_PYLINT_WORKERS", default=1)
+    )
+    """The number of parallel pylint processes used by the `pylint` session.
+
+    If bigger than 1, the files to check are grouped by package (directory) and split
+    in this number of shards with a similar amount of code, and each shard is checked
+    by a separate pylint process. The messages of all processes are merged into one
+    report. If 0, the number of CPUs is used.
+
+    Note that pylint can't find duplicated code (`duplicate-code`) in files that are
+    in different shards.
+
+    The default is taken from the `FREQUENZ_NOX_PYLINT_WORKERS` environment variable
+    (1 if it is not set).
+    """
+
+    single_pass_formatting: bool = _dataclasses.field(
+        default_factory=lambda: _util.env_flag("FREQUENZ_NOX_SINGLE_PASS_FORMATTING")
+    )
+    """Whether the `formatting` session should check black and isort in one pass.
+
+    When enabled, each file is read once and checked in memory with the black and
+    isort Python APIs, using a pool of processes (one per CPU), instead of running
+    `black` and `isort` as separate commands, and one combined diff is shown for all
+    files.
+
+    Only the `--check`, `--diff` and `--quiet` options are supported in the
+    `black` and `isort` command options. If other options are used, or black is
+    configured in `pyproject.toml` with options that only its command supports, the
+    commands are run as usual.
+
+    The black cache of formatted files is not used, so enable
+    [`check_cache`][frequenz.repo.config.nox.config.Config.check_cache] to skip files
+    that were already checked.
+
+    The default is taken from the `FREQUENZ_NOX_SINGLE_PASS_FORMATTING` environment
+    variable (disabled if it is not set).
+    """
+
+    impacted_tests: bool = _dataclasses.field(
+        default_factory=lambda: _util.env_flag("FREQUENZ_NOX_IMPACTED_TESTS")
+    )
+    """Whether the `pytest_*` sessions should only run the tests affected by changes.
+
+    When enabled, a static graph of the imports between the modules in the
+    `source_paths` and the pytest `testpaths` is built (and cached in
+    `.nox/.import-graph.json`), and only the test files that import, directly or
+    indirectly, a module changed since `changed_since` (or uncommitted changes, if it
+    is not set) are run. All tests are run if any `conftest.py`, any of the
+    `config_files` or any non-Python file changed.
+
+    Imports done dynamically (for example with `importlib`) are not detected.
+
+    The default is taken from the `FREQUENZ_NOX_IMPACTED_TESTS` environment variable
+    (disabled if it is not set).
+    """
+
+    failed_first: bool = _dataclasses.field(
+        default_factory=lambda: _util.env_flag("FREQUENZ_NOX_FAILED_FIRST")
+    )
+    """Whether the `pytest_*` sessions should run the tests that failed last first.
+
+    The `pytest_min` and `pytest_max` sessions keep a history of the outcome and
+    duration of each test (in `.nox/.test-history-{min,max}.json`). When enabled, the
+    tests that failed in their last run are run before the rest.
+
+    The default is taken from the `FREQUENZ_NOX_FAILED_FIRST` environment variable
+    (disabled if it is not set).
+    """
+
+    slowest_tests: int = _dataclasses.field(
+        default_factory=lambda: _util.env_int("FREQUENZ_NOX_SLOWEST_TESTS", default=0)
+    )
+    """The number of slowest tests to show after running the `pytest_*` sessions.
+
+    For each test, the change of the duration compared to the average of the previous
+    runs is shown too. If 0, no tests are shown.
+
+    The default is taken from the `FREQUENZ_NOX_SLOWEST_TESTS` environment variable
+    (0 if it is not set).
+    """
+
+    coverage: bool = _dataclasses.field(
+        default_factory=lambda: _util.env_flag("FREQUENZ_NOX_COVERAGE")
+    )
+    """Whether the `pytest_*` sessions should collect test coverage.
+
+    When enabled, the tests are run with `coverage run --parallel-mode` (installing
+    `coverage` if necessary), measuring the `source_paths`, and the data of all the
+    pytest processes is combined to print a report and to write an HTML
+    (`.htmlcov-{min,max}`) and an XML (`.nox/.pytest/{min,max}/coverage.xml`) report.
+    With Python 3.12 or newer, the low-overhead `sys.monitoring` based tracer is
+    used.
+
+    The default is taken from the `FREQUENZ_NOX_COVERAGE` environment variable
+    (disabled if it is not set).
+    """
+
+    parallel_checks: bool = _dataclasses.field(
+        default_factory=lambda: _util.env_flag("FREQUENZ_NOX_PARALLEL_CHECKS")
+    )
+    """Whether to run the checks in the `ci_checks_max` session concurrently.
+
+    When enabled, each check runs as a separate subprocess sharing the already
+    installed virtualenv, and its output is buffered and printed whole, always in the
+    same order.
+
+    The default is taken from the `FREQUENZ_NOX_PARALLEL_CHECKS` environment variable
+    (disabled if it is not set).
+    """
+
+    fail_fast: bool = _dataclasses.field(
+        default_factory=lambda: _util.env_flag("FREQUENZ_NOX_FAIL_FAST", default=True)
+    )
+    """Whether to cancel the remaining concurrent checks as soon as one fails.
+
+    If disabled, all checks are run to completion even if some fail.
+
+    The default is taken from the `FREQUENZ_NOX_FAIL_FAST` environment variable
+    (enabled if it is not set).
+    """
+
+    skip_unchanged_installs: bool = _dataclasses.field(
+        default_factory=lambda: _util.env_flag("FREQUENZ_NOX_SKIP_UNCHANGED_INSTALLS")
+    )
+    """Whether to skip installing dependencies when they didn't change.
+
+    When enabled, the sessions store a fingerprint of each install in the virtualenv
+    (made from the `pyproject.toml` project metadata, including the dependency tables,
+    the requested extras, the pinned minimum dependencies and the Python version) and
+    skip the install when it matches. Virtualenvs are also reused by default (like
+    when using `nox -r`), so running `nox` is nearly as fast as `nox -R` while still
+    installing new or updated dependencies.
+
+    Dependencies that are removed from `pyproject.toml` are not uninstalled, so run
+    `nox --no-reuse-existing-virtualenvs` to start from a clean virtualenv.
+
+    The default is taken from the `FREQUENZ_NOX_SKIP_UNCHANGED_INSTALLS` environment
+    variable (disabled if it is not set).
+    """
+
+    min_deps_lock: bool = _dataclasses.field(
+        default_factory=lambda: _util.env_flag("FREQUENZ_NOX_MIN_DEPS_LOCK")
+    )
+    """Whether the `pytest_min` session should install from a lock file.
+
+    When enabled, the minimum dependencies are resolved once, and the complete set of
+    installed packages (including transitive and development dependencies) is
+    stored as a constraints file in `.nox/.min-deps-lock`, next to a directory with
+    all the downloaded packages. Later runs install exactly the same packages from
+    that directory, without using the network. The lock is keyed by the hash of
+    `pyproject.toml` and the Python version, so it is created again when any of them
+    changes.
+
+    The default is taken from the `FREQUENZ_NOX_MIN_DEPS_LOCK` environment variable
+    (disabled if it is not set).
+    """
+
+    installer: Installer = _dataclasses.field(default_factory=_installer_from_env)
+    """The tool used to install packages in the sessions virtualenvs.
+
+    `uv` (`uv pip install`) resolves and installs dependencies much faster than
+    `pip`. If it is selected but can't be found, a warning is emitted and `pip` is
+    used instead.
+
+    The default is taken from the `FREQUENZ_NOX_INSTALLER` environment variable
+    (`pip` if it is not set or empty).
+    """
+
+    install_cache_dir: str | None = _dataclasses.field(
+        default_factory=lambda: _os.environ.get("FREQUENZ_NOX_INSTALL_CACHE_DIR")
+        or None
+    )
+    """The directory where the installer caches downloaded and built wheels.
+
+    The cache is shared by all sessions. If not set, the default cache of the
+    installer is used (which is also shared, but per user), so this is mostly useful
+    to keep the cache in a directory that is saved between CI runs.
+
+    The default is taken from the `FREQUENZ_NOX_INSTALL_CACHE_DIR` environment
+    variable (the installer default if it is not set or empty).
+    """
+
+    timing_report: bool = _dataclasses.field(
+        default_factory=lambda: _util.env_flag("FREQUENZ_NOX_TIMING_REPORT")
+    )
+    """Whether to measure the time spent in each step of the sessions.
+
+    When enabled, each session writes a JSON report to `.nox/.timing/<session>.json`
+    with the command, wall time, CPU time, peak memory and exit code of each
+    `session.run()` and `session.install()` call.
+
+    The default is taken from the `FREQUENZ_NOX_TIMING_REPORT` environment variable
+    (disabled if it is not set).
+    """
+
+    timing_summary: str | None = _dataclasses.field(
+        default_factory=lambda: _os.environ.get("FREQUENZ_NOX_TIMING_SUMMARY") or None
+    )
+    """A file where to append a markdown summary of the timing reports.
+
+    This is only used if `timing_report` is enabled. In GitHub Actions it can be set
+    to `$GITHUB_STEP_SUMMARY` to show the summary in the job page.
+
+    The default is taken from the `FREQUENZ_NOX_TIMING_SUMMARY` environment variable
+    (disabled if it is not set or empty).
+    """
+
+    profile: Profiler | None = _dataclasses.field(default_factory=_profiler_from_env)
+    """The profiler used to run the tools used by the sessions, if any.
+
+    When set, `black`, `isort`, `flake8`, `mypy`, `pylint` and `pytest` are run under
+    the profiler, and the profiles are written to `.nox/profiles/`, named after the
+    session and the tool (for example `.nox/profiles/pylint-pylint-1.pstats`).
+
+    With `cprofile`, the profiles are written in the `pstats` format, which can be
+    explored with `python -m pstats` or converted to flame graphs with tools like
+    [flameprof](https://pypi.org/project/flameprof/), and the functions taking most
+    of the time are shown after each tool finishes (see `profile_top`). With `py-spy`,
+    [py-spy](https://pypi.org/project/py-spy/) (which must be installed) samples the
+    tool and writes a flame graph as an SVG file.
+
+    To get a complete profile, the tools are always run in a single process while
+    profiling (so `pylint_workers`, `pytest_workers` and `mypy_daemon` are ignored),
+    but tools that start their own processes (like `pylint --jobs`) are only
+    profiled in the main process. The tools are slower when profiled, so the
+    durations are only meaningful relative to each other.
+
+    The default is taken from the `FREQUENZ_NOX_PROFILE` environment variable, which
+    can be `cprofile` (or a true flag like `1`) or `py-spy` (disabled if it is not
+    set or is a false flag like `0`).
+    """
+
+    profile_top: int = _dataclasses.field(
+        default_factory=lambda: _util.env_int("FREQUENZ_NOX_PROFILE_TOP", default=20)
+    )
+    """The number of functions to show in the summary of each `cprofile` profile.
+
+    The functions are shown both sorted by cumulative time (useful to find slow
+    plugins or fixtures) and by their own time (useful to find hot functions). If 0,
+    no summary is shown.
+
+    The default is taken from the `FREQUENZ_NOX_PROFILE_TOP` environment variable
+    (20 if it is not set).
+    """
+
     def __post_init__(self) -> None:
         """Initialize the configuration object.
 
         This will add extra paths discovered in config files and other sources.
+
+        Raises:
+            ValueError: If the session groups are invalid.
         """
         for path in _util.discover_paths():
             if path not in self.extra_paths and path not in self.source_paths:
                 self.extra_paths.append(path)
 
+        grouped: dict[str, str] = {}
+        for group, sessions in self.session_groups.items():
+            for session in sessions:
+                if session == "pytest_min":
+                    raise ValueError(
+                        "The pytest_min session can't be in a session group, as it "
+                        "needs different versions of the dependencies"
+                    )
+                if (other := grouped.setdefault(session, group)) != group:
+                    raise ValueError(
+                        f"The session {session} can't be in more than one session "
+                        f"group ({other} and {group})"
+                    )
+
     def copy(self, /) -> Self:
         """Create a new object as a copy of self.
 
@@ -111,6 +530,8 @@ class Config:
             sessions=self.sessions.copy(),
             source_paths=self.source_paths.copy(),
             extra_paths=self.extra_paths.copy(),
+            config_files=self.config_files.copy(),
+            session_groups={k: v.copy() for k, v in self.session_groups.items()},
         )
 
     def path_args(
@@ -127,6 +548,12 @@ class Config:
         as the file paths verbatim, and if not, all **existing** `source_paths`
         and `extra_paths` are used.
 
+        If [`changed_since`][frequenz.repo.config.nox.config.Config.changed_since] is
+        set, only the Python files inside those paths that changed since that reference
+        are used, unless any of the `config_files` changed. This means the returned
+        list can be empty if no relevant files changed. If the changes can't be
+        determined, a warning is emitted and all paths are used.
+
         Args:
             session: The nox session to use to look for command-line arguments.
             include_sources: Whether to include the source paths or not.
@@ -144,7 +571,32 @@ class Config:
         if include_extra:
             paths.extend(self.extra_paths)
 
-        return list(str(p) for p in _util.existing_paths(paths))
+        existing = list(_util.existing_paths(paths))
+        if self.changed_since is None:
+            return [str(p) for p in existing]
+
+        try:
+            changed = _util.changed_files(self.changed_since)
+        except RuntimeError as exc:
+            session.warn(f"{exc}, checking all files")
+            return [str(p) for p in existing]
+
+        config_files = set(map(_pathlib.Path, self.config_files))
+        if changed_config := config_files.intersection(changed):
+            session.log(
+                "Config files changed ("
+                + ", ".join(sorted(map(str, changed_config)))
+                + "), checking all files"
+            )
+            return [str(p) for p in existing]
+
+        return [
+            str(path)
+            for path in changed
+            if _util.is_python_file(path)
+            and path.exists()
+            and any(path == p or p in path.parents for p in existing)
+        ]
 
 
 _config: Config | None = None
@@ -233,3 +685,5 @@ def configure(
                     assert_never(unhandled)
 
     _nox.options.sessions = _config.sessions
+    if _config.skip_unchanged_installs:
+        _nox.options.reuse_existing_virtualenvs = True
@@ -6,13 +6,32 @@
 This module defines the predefined nox sessions that are used by the default.
 """
 
-import nox
+import collections as _collections
+import json as _json
+import pathlib as _pathlib
+import sys as _sys
+from collections.abc import Callable
 
+import nox
+import nox.command
+
+from . import (
+    _cache,
+    _history,
+    _impact,
+    _install,
+    _parallel,
+    _profile,
+    _pylint,
+    _timing,
+    _watch,
+)
 from . import config as _config
 from . import util as _util
 
 
 @nox.session
+@_timing.timed
 def ci_checks_max(session: nox.Session) -> None:
     """Run all checks with max dependencies in a single session.
 
@@ -20,10 +39,30 @@ def ci_checks_max(session: nox.Session) -> None:
 
     This does NOT run pytest_min, so that needs to be run separately as well.
 
+    If [`parallel_checks`][frequenz.repo.config.nox.config.Config.parallel_checks] is
+    enabled, the checks are run concurrently, so the session takes roughly as long as
+    the slowest check.
+
     Args:
         session: the nox session.
     """
-    session.install("-e", ".[dev]")
+    _install.install(session, "-e", ".[dev]")
+
+    conf = _config.get()
+    if conf.parallel_checks:
+        results = _parallel.run_steps(
+            session,
+            [
+                ("formatting", lambda s: formatting(s, False)),
+                ("flake8", lambda s: flake8(s, False)),
+                ("mypy", lambda s: mypy(s, False)),
+                ("pylint", lambda s: pylint(s, False)),
+                ("pytest_max", lambda s: pytest_max(s, False)),
+            ],
+            fail_fast=conf.fail_fast,
+        )
+        _parallel.check_results(session, results)
+        return
 
     formatting(session, False)
     flake8(session, False)
@@ -32,7 +71,18 @@ def ci_checks_max(session: nox.Session) -> None:
     pytest_max(session, False)
 
 
+_FORMATTING_SCRIPT = _pathlib.Path(__file__).with_name("_formatting.py")
+"""The single-pass formatting checker, run with the session's Python interpreter."""
+
+_BLACK_CHECK_OPTIONS = frozenset({"--check", "--diff"})
+"""The `black` options that make it only check the files, without changing them."""
+
+_ISORT_CHECK_OPTIONS = frozenset({"--check-only", "--check", "-c", "--diff", "--df"})
+"""The `isort` options that make it only check the files, without changing them."""
+
+
 @nox.session
+@_timing.timed
 def formatting(session: nox.Session, install_deps: bool = True) -> None:
     """Check code formatting with black and isort.
 
@@ -41,14 +91,44 @@ def formatting(session: nox.Session, install_deps: bool = True) -> None:
         install_deps: True if dependencies should be installed.
     """
     if install_deps:
-        session.install("-e", ".[dev-formatting]")
+        _install.install(session, "-e", ".[dev-formatting]")
 
     conf = _config.get()
-    session.run("black", *conf.opts.black, *conf.path_args(session))
-    session.run("isort", *conf.opts.isort, *conf.path_args(session))
+    paths, cache = _skip_cached(
+        session,
+        conf.path_args(session),
+        tool="formatting",
+        distributions=["black", "isort"],
+        args=[*conf.opts.black, "--", *conf.opts.isort],
+    )
+    if not paths:
+        session.log("No files to check")
+        return
+    if conf.single_pass_formatting:
+        _profile.run(
+            session,
+            "python",
+            str(_FORMATTING_SCRIPT),
+            *(f"--black-option={o}" for o in conf.opts.black),
+            *(f"--isort-option={o}" for o in conf.opts.isort),
+            "--",
+            *map(str, _util.python_files(paths)),
+        )
+    else:
+        _profile.run(session, "black", *conf.opts.black, *paths)
+        _profile.run(session, "isort", *conf.opts.isort, *paths)
+    # If the files were reformatted instead of checked, they are not known to be clean
+    # (isort could have undone some of black's formatting)
+    if (
+        cache is not None
+        and _BLACK_CHECK_OPTIONS.intersection(conf.opts.black)
+        and _ISORT_CHECK_OPTIONS.intersection(conf.opts.isort)
+    ):
+        cache.mark_clean(map(_pathlib.Path, paths))
 
 
 @nox.session
+@_timing.timed
 def mypy(session: nox.Session, install_deps: bool = True) -> None:
     """Check type hints with mypy.
 
@@ -59,28 +139,183 @@ def mypy(session: nox.Session, install_deps: bool = True) -> None:
     if install_deps:
         # install the package itself as editable, so that it is possible to do
         # fast local tests with `nox -R -e mypy`.
-        session.install("-e", ".[dev-mypy]")
+        _install.install(session, "-e", ".[dev-mypy]")
 
     conf = _config.get()
 
     # If we get CLI options, we run mypy on those, but still passing the
     # configured options (they can be overridden by the CLI options).
     if session.posargs:
-        session.run("mypy", *conf.opts.mypy, *session.posargs)
+        _profile.run(session, "mypy", *conf.opts.mypy, *session.posargs)
         return
 
     # We separate running the mypy checks into two runs, one is the default, as
     # configured in `pyproject.toml`, which should run against the sources.
-    session.run("mypy", *conf.opts.mypy)
+    # The daemon can't be profiled, as the checks run in the daemon process.
+    use_daemon = conf.mypy_daemon and conf.profile is None
+    if use_daemon:
+        _dmypy_run(session, "sources", conf.opts.mypy)
+    else:
+        _profile.run(session, "mypy", *conf.opts.mypy)
 
     # The second run checks development files, like tests, benchmarks, etc.
     # This is an attempt to minimize mypy internal errors.
-    session.run(
-        "mypy", *conf.opts.mypy, *conf.path_args(session, include_sources=False)
+    if paths := conf.path_args(session, include_sources=False):
+        if use_daemon:
+            _dmypy_run(session, "dev", [*conf.opts.mypy, *paths])
+        else:
+            _profile.run(session, "mypy", *conf.opts.mypy, *paths)
+
+
+@nox.session(venv_backend="none")
+def mypy_daemon_stop(session: nox.Session) -> None:
+    """Stop all the mypy daemons started by the `mypy` sessions.
+
+    Args:
+        session: the nox session.
+    """
+    bin_dir = "Scripts" if _sys.platform == "win32" else "bin"
+    for status_file in _pathlib.Path(".nox").glob(f"*/{_DMYPY_STATUS_GLOB}"):
+        session.run(
+            str(status_file.parent / bin_dir / "dmypy"),
+            "--status-file",
+            str(status_file),
+            "stop",
+            external=True,
+            success_codes=[0, 2],  # 2 means the daemon was not running
+        )
+
+
+@nox.session
+def watch(session: nox.Session) -> None:
+    """Watch for changes and re-run the affected checks.
+
+    The source and extra paths (or the paths passed as positional arguments) are
+    watched, and when files change, the formatting and linting checks are run on the
+    changed files, mypy is run using a daemon (that is started when the session
+    starts, so it is ready for the first change), and only the tests affected by the
+    changes are run. Everything is checked again if a configuration file changes.
+
+    Stop watching with Ctrl+C.
+
+    Args:
+        session: the nox session.
+    """
+    _install.install(session, "-e", ".[dev]")
+
+    conf = _config.get()
+    paths = session.posargs or [
+        str(p) for p in _util.existing_paths([*conf.source_paths, *conf.extra_paths])
+    ]
+    test_paths = _util.discover_paths()
+    session.log("Starting the mypy daemons")
+    _watch_step(session, "mypy", lambda: _watch_mypy(session))
+
+    watcher = _watch.make_watcher(
+        paths, [*conf.config_files, "pyproject.toml"], interval=_watch.DEFAULT_INTERVAL
+    )
+    session.log(
+        f"Watching {', '.join(paths)} for changes ({type(watcher).__name__}), "
+        "press Ctrl+C to stop"
     )
+    try:
+        while True:
+            changed = watcher.wait()
+            session.log(f"Changed: {', '.join(map(str, changed))}")
+            plan = _watch.plan(
+                changed,
+                source_paths=conf.source_paths,
+                test_paths=test_paths,
+                config_files=conf.config_files,
+            )
+            files = paths if plan.files is None else plan.files
+            results: dict[str, bool] = {}
+            if files:
+                results["formatting"] = _watch_step(
+                    session,
+                    "formatting",
+                    lambda: (
+                        session.run("black", *conf.opts.black, *files),
+                        session.run("isort", *conf.opts.isort, *files),
+                    ),
+                )
+                results["flake8"] = _watch_step(
+                    session,
+                    "flake8",
+                    lambda: session.run("flake8", *conf.opts.flake8, *files),
+                )
+            results["mypy"] = _watch_step(session, "mypy", lambda: _watch_mypy(session))
+            if files:
+                results["pylint"] = _watch_step(
+                    session,
+                    "pylint",
+                    lambda: session.run("pylint", *conf.opts.pylint, *files),
+                )
+            session.log(f"Tests: {plan.reason}")
+            if plan.tests is None or plan.tests:
+                tests = plan.tests or []
+                results["pytest"] = _watch_step(
+                    session,
+                    "pytest",
+                    lambda: session.run("pytest", *conf.opts.pytest, *tests),
+                )
+            session.log(
+                "Results: "
+                + ", ".join(
+                    f"{n} {'ok' if ok else 'FAILED'}" for n, ok in results.items()
+                )
+            )
+    except KeyboardInterrupt:
+        session.log("Stopped watching")
+    finally:
+        watcher.close()
+
+
+def _watch_step(session: nox.Session, name: str, func: Callable[[], object]) -> bool:
+    """Run a step of the watch session, without stopping the session if it fails.
+
+    Args:
+        session: The nox session.
+        name: The name of the step.
+        func: The function running the step.
+
+    Returns:
+        Whether the step succeeded.
+    """
+    session.log(f"Running {name}")
+    try:
+        func()
+    except nox.command.CommandFailed:
+        session.warn(f"{name} failed")
+        return False
+    return True
+
+
+def _watch_mypy(session: nox.Session) -> None:
+    """Run mypy on all the sources and development files using daemons.
+
+    Args:
+        session: The nox session.
+
+    Raises:
+        nox.command.CommandFailed: If any of the mypy runs failed.
+    """
+    conf = _config.get()
+    targets = {"sources": conf.opts.mypy}
+    if paths := conf.path_args(session, include_sources=False):
+        targets["dev"] = [*conf.opts.mypy, *paths]
+    failed: nox.command.CommandFailed | None = None
+    for target, args in targets.items():
+        try:
+            _dmypy_run(session, target, args)
+        except nox.command.CommandFailed as exc:
+            failed = exc
+    if failed is not None:
+        raise failed
 
 
 @nox.session
+@_timing.timed
 def pylint(session: nox.Session, install_deps: bool = True) -> None:
     """Check for code smells with pylint.
 
@@ -91,13 +326,37 @@ def pylint(session: nox.Session, install_deps: bool = True) -> None:
     if install_deps:
         # install the package itself as editable, so that it is possible to do
         # fast local tests with `nox -R -e pylint`.
-        session.install("-e", ".[dev-pylint]")
+        _install.install(session, "-e", ".[dev-pylint]")
 
     conf = _config.get()
-    session.run("pylint", *conf.opts.pylint, *conf.path_args(session))
+    paths, cache = _skip_cached(
+        session,
+        conf.path_args(session),
+        tool="pylint",
+        distributions=["pylint", "astroid"],
+        args=conf.opts.pylint,
+        whole_set=True,
+        expand=_pylint.module_files,
+    )
+    if not paths:
+        session.log("No files to check")
+        return
+    workers = conf.pylint_workers or _parallel.default_workers()
+    # Profiles are only useful if everything runs in one process
+    if workers > 1 and conf.profile is None:
+        shards = _pylint.shards(paths, workers)
+    else:
+        shards = []
+    if len(shards) > 1:
+        _pylint_parallel(session, shards)
+    else:
+        _profile.run(session, "pylint", *conf.opts.pylint, *paths)
+    if cache is not None:
+        cache.mark_clean(map(_pathlib.Path, paths))
 
 
 @nox.session
+@_timing.timed
 def flake8(session: nox.Session, install_deps: bool = True) -> None:
     """Check for common errors and in particular documentation format and style.
 
@@ -106,13 +365,27 @@ def flake8(session: nox.Session, install_deps: bool = True) -> None:
         install_deps: True if dependencies should be installed.
     """
     if install_deps:
-        session.install("-e", ".[dev-flake8]")
+        _install.install(session, "-e", ".[dev-flake8]")
 
     conf = _config.get()
-    session.run("flake8", *conf.opts.flake8, *conf.path_args(session))
+    paths, cache = _skip_cached(
+        session,
+        conf.path_args(session),
+        tool="flake8",
+        distributions=["flake8"],
+        plugin_groups=["flake8.extension", "flake8.report"],
+        args=conf.opts.flake8,
+    )
+    if not paths:
+        session.log("No files to check")
+        return
+    _profile.run(session, "flake8", *conf.opts.flake8, *paths)
+    if cache is not None:
+        cache.mark_clean(map(_pathlib.Path, paths))
 
 
 @nox.session
+@_timing.timed
 def pytest_max(session: nox.Session, install_deps: bool = True) -> None:
     """Test the code against max dependency versions with pytest.
 
@@ -123,12 +396,13 @@ def pytest_max(session: nox.Session, install_deps: bool = True) -> None:
     if install_deps:
         # install the package itself as editable, so that it is possible to do
         # fast local tests with `nox -R -e pytest_max`.
-        session.install("-e", ".[dev-pytest]")
+        _install.install(session, "-e", ".[dev-pytest]")
 
     _pytest_impl(session, "max")
 
 
 @nox.session
+@_timing.timed
 def pytest_min(session: nox.Session, install_deps: bool = True) -> None:
     """Test the code against min dependency versions with pytest.
 
@@ -139,20 +413,497 @@ def pytest_min(session: nox.Session, install_deps: bool = True) -> None:
     if install_deps:
         # install the package itself as editable, so that it is possible to do
         # fast local tests with `nox -R -e pytest_min`.
-        session.install("-e", ".[dev-pytest]", *_util.min_dependencies())
+        if _config.get().min_deps_lock:
+            _install.install_min_deps_locked(session)
+        else:
+            _install.install(session, "-e", ".[dev-pytest]", *_util.min_dependencies())
 
     _pytest_impl(session, "min")
 
 
-def _pytest_impl(
-    session: nox.Session, max_or_min_deps: str  # pylint: disable=unused-argument
+_DMYPY_STATUS_GLOB = "dmypy-*.json"
+"""The glob matching the status files of the mypy daemons in a virtualenv."""
+
+_DMYPY_IDLE_TIMEOUT = 3600
+"""The time (in seconds) a mypy daemon keeps running without being used."""
+
+
+def _dmypy_run(session: nox.Session, target: str, args: list[str]) -> None:
+    """Run mypy using a daemon, starting or restarting it if necessary.
+
+    Each target gets its own daemon, because switching a daemon between different
+    sets of files can make it crash.
+
+    Args:
+        session: The nox session.
+        target: The name of the checked target, used to identify the daemon.
+        args: The command-line arguments to pass to mypy.
+    """
+    conf = _config.get()
+    location = getattr(session.virtualenv, "location", None) or _pathlib.Path(
+        ".nox", session.name
+    )
+    status_file = _pathlib.Path(
+        location, _DMYPY_STATUS_GLOB.replace("*", target)
+    ).absolute()
+    fingerprint_file = status_file.with_suffix(".fingerprint")
+    fingerprint = _cache.make_salt(
+        session,
+        tool="mypy",
+        distributions=["mypy"],
+        args=args,
+        config_files=conf.config_files,
+    )
+
+    dmypy = ["dmypy", "--status-file", str(status_file)]
+    if status_file.exists() and (
+        not fingerprint_file.exists()
+        or fingerprint_file.read_text(encoding="utf-8") != fingerprint
+    ):
+        session.log(f"The mypy configuration changed, restarting the {target} daemon")
+        session.run(*dmypy, "stop", success_codes=[0, 2])
+    fingerprint_file.parent.mkdir(parents=True, exist_ok=True)
+    fingerprint_file.write_text(fingerprint, encoding="utf-8")
+    session.run(*dmypy, "run", "--timeout", str(_DMYPY_IDLE_TIMEOUT), "--", *args)
+
+
+def _skip_cached(  # pylint: disable=too-many-arguments
+    session: nox.Session,
+    paths: list[str],
+    /,
+    *,
+    tool: str,
+    distributions: list[str],
+    args: list[str],
+    plugin_groups: list[str] | None = None,
+    whole_set: bool = False,
+    expand: Callable[[list[str]], list[_pathlib.Path]] = _util.python_files,
+) -> tuple[list[str], _cache.CheckCache | None]:
+    """Remove the files that were already checked clean from the paths to check.
+
+    This only does something if
+    [`check_cache`][frequenz.repo.config.nox.config.Config.check_cache] is enabled.
+
+    Args:
+        session: The nox session.
+        paths: The paths to check.
+        tool: The name of the tool (or check).
+        distributions: The distributions that affect the tool results.
+        args: The command-line arguments passed to the tool.
+        plugin_groups: Entry point groups used to register plugins for the tool.
+        whole_set: If `True`, the results of the files are only reused if none of the
+            checked files nor the Python files in the source and extra paths changed,
+            for tools where checking a file depends on other files.
+        expand: The function used to expand the paths to the files the tool checks.
+
+    Returns:
+        The paths that still need to be checked and the cache to mark them as clean
+            if the check succeeds (or `None` if the cache is not enabled).
+    """
+    conf = _config.get()
+    if not conf.check_cache or not paths:
+        return paths, None
+
+    files = expand(paths)
+    salt = _cache.make_salt(
+        session,
+        tool=tool,
+        distributions=distributions,
+        plugin_groups=plugin_groups or [],
+        args=args,
+        config_files=conf.config_files,
+    )
+    if whole_set:
+        # The checked files can be only some of them (with `changed_since` or
+        # positional arguments), but they can still depend on all the others
+        project_files = _util.python_files(
+            map(str, _util.existing_paths([*conf.source_paths, *conf.extra_paths]))
+        )
+        salt += _cache.hash_files({*files, *project_files})
+    cache = _cache.CheckCache(salt)
+
+    pending = [f for f in files if not cache.is_clean(f)]
+    if skipped := len(files) - len(pending):
+        session.log(f"Skipping {skipped} file(s) already checked clean by {tool}")
+    return [str(f) for f in pending], cache
+
+
+def _pylint_parallel(session: nox.Session, shards: list[list[str]]) -> None:
+    """Run groups of files in parallel pylint processes.
+
+    The messages of all processes are merged into one report.
+
+    Args:
+        session: The nox session.
+        shards: The files to check in each process.
+    """
+    conf = _config.get()
+    report_dir = _pathlib.Path(".nox", ".pylint")
+    report_dir.mkdir(parents=True, exist_ok=True)
+    reports = [report_dir / f"pylint-{i}.json" for i in range(len(shards))]
+    for report in reports:
+        report.unlink(missing_ok=True)
+
+    def make_step(
+        files: list[str], report: _pathlib.Path
+    ) -> Callable[[nox.Session], None]:
+        def step(session: nox.Session) -> None:
+            session.run(
+                "pylint", *conf.opts.pylint, f"--output-format=json:{report}", *files
+            )
+
+        return step
+
+    session.log(f"Running pylint in {len(shards)} parallel processes")
+    results = _parallel.run_steps(
+        session,
+        [
+            (f"pylint[{i}]", make_step(files, report))
+            for i, (files, report) in enumerate(zip(shards, reports))
+        ],
+        fail_fast=False,
+    )
+
+    messages = _pylint.read_reports(reports)
+    if messages:
+        _parallel.write_output(session, _pylint.format_messages(messages) + "\n")
+    session.log(
+        f"pylint: {len(messages)} message(s) in "
+        f"{max(r.duration for r in results):.1f}s "
+        f"({sum(r.duration for r in results):.1f}s in total)"
+    )
+    if code := _pylint.exit_code(results):
+        session.error(f"pylint failed (exit code {code})")
+
+
+def _pytest_impl(session: nox.Session, max_or_min_deps: str) -> None:
+    conf = _config.get()
+    history = _history.RunHistory.for_deps(max_or_min_deps)
+    report_dir = _pathlib.Path(".nox", ".pytest", max_or_min_deps)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    junit = report_dir / "junit.xml"
+    junit.unlink(missing_ok=True)
+
+    targets = list(session.posargs)
+    if not targets and conf.impacted_tests:
+        if (selected := _impact.select_impacted_tests(session)) is not None:
+            if not selected:
+                session.log("No tests are affected by the changes")
+                return
+            targets = selected
+
+    coverage = _Coverage(session, report_dir) if conf.coverage else None
+    try:
+        workers = conf.pytest_workers or _parallel.default_workers()
+        # Positional arguments can be pytest options, so we can't split them, and
+        # profiles are only useful if everything runs in one process
+        if workers > 1 and not session.posargs and conf.profile is None:
+            shards = _pytest_shards(session, history, workers, targets)
+            if len(shards) > 1:
+                _pytest_parallel(session, history, shards, report_dir, coverage)
+                return
+
+        try:
+            _profile.run(
+                session,
+                *(coverage.command if coverage else ["pytest"]),
+                *conf.opts.pytest,
+                *_history.JUNIT_ARGS,
+                f"--junitxml={junit}",
+                *_failed_first_args(history, report_dir / "cache"),
+                *targets,
+                env=coverage.env if coverage else None,
+            )
+        finally:
+            history.update(_history.read_junit(junit))
+            history.save()
+    finally:
+        if coverage is not None:
+            coverage.report(max_or_min_deps)
+        if conf.slowest_tests:
+            _log_slowest_tests(session, history, junit, conf.slowest_tests)
+
+
+def _failed_first_args(
+    history: _history.RunHistory, cache_dir: _pathlib.Path
+) -> list[str]:
+    """Get the pytest arguments to run the tests that failed last time first.
+
+    This only does something if
+    [`failed_first`][frequenz.repo.config.nox.config.Config.failed_first] is
+    enabled.
+
+    pytest only knows about the failures of the previous run in the same cache
+    directory, so a separate cache directory is seeded with the tests that failed in
+    their last run according to the history (which includes failures in any of the
+    parallel pytest processes or in runs of only a few tests).
+
+    Args:
+        history: The history of previous runs.
+        cache_dir: The pytest cache directory to use.
+
+    Returns:
+        The pytest arguments.
+    """
+    if not _config.get().failed_first:
+        return []
+    lastfailed = cache_dir / "v" / "cache" / "lastfailed"
+    lastfailed.parent.mkdir(parents=True, exist_ok=True)
+    lastfailed.write_text(
+        _json.dumps(dict.fromkeys(history.failed, True), indent=2), encoding="utf-8"
+    )
+    return ["-o", f"cache_dir={cache_dir}", "--failed-first"]
+
+
+def _log_slowest_tests(
+    session: nox.Session,
+    history: _history.RunHistory,
+    junit: _pathlib.Path,
+    count: int,
 ) -> None:
+    """Log the slowest tests of a run and how their duration changed.
+
+    Args:
+        session: The nox session.
+        history: The history of the runs.
+        junit: The JUnit report of the run.
+        count: The number of tests to log.
+    """
+    ran = [r.nodeid for r in _history.read_junit(junit)]
+    if not (slowest := history.slowest(count, among=ran)):
+        return
+    session.log(f"Slowest {len(slowest)} tests:")
+    for nodeid in slowest:
+        *previous, last = history.recent_durations(nodeid)
+        trend = ""
+        if previous and (average := sum(previous) / len(previous)) > 0:
+            trend = (
+                f" ({(last - average) / average:+.0%} vs. the average of "
+                f"{len(previous)} previous run(s))"
+            )
+        session.log(f"{last:8.2f}s {nodeid}{trend}")
+
+
+class _Coverage:
+    """Collect test coverage with `coverage.py`."""
+
+    def __init__(self, session: nox.Session, report_dir: _pathlib.Path) -> None:
+        """Prepare the session to collect coverage.
+
+        `coverage` is installed if it is not installed yet, and the data of previous
+        runs is removed.
+
+        Args:
+            session: The nox session.
+            report_dir: The directory where to store the coverage data and XML report.
+        """
+        self._session = session
+        self._report_dir = report_dir
+        self._data_file = report_dir / ".coverage"
+        for data_file in report_dir.glob(".coverage*"):
+            data_file.unlink()
+
+        if not _cache.installed_versions(session, ["coverage"])["coverage"]:
+            _install.run_installer(session, ("coverage[toml]",), force=True)
+
+        self.env: dict[str, str] = {}
+        """The environment variables to use when running the tests."""
+
+        version = _venv_python_version(session)
+        if version is not None and version >= (3, 12):
+            # Use the low-overhead sys.monitoring tracer (PEP 669)
+            self.env["COVERAGE_CORE"] = "sysmon"
+
+        self.command: list[str] = [
+            "python",
+            "-m",
+            "coverage",
+            "run",
+            "--parallel-mode",
+            f"--data-file={self._data_file}",
+        ]
+        """The command to run pytest collecting coverage (pytest options follow)."""
+
+        if sources := _config.get().source_paths:
+            self.command.append(f"--source={','.join(sources)}")
+        self.command.extend(["-m", "pytest"])
+
+    def report(self, max_or_min_deps: str) -> None:
+        """Combine the collected data and write the reports.
+
+        A report is printed to the terminal, and HTML (in `.htmlcov-{max_or_min}`) and
+        XML reports are written.
+
+        Args:
+            max_or_min_deps: Either `max` or `min`, used to name the HTML report.
+        """
+        session = self._session
+        data_file = f"--data-file={self._data_file}"
+        if not any(self._report_dir.glob(".coverage.*")):
+            session.warn("No coverage data was collected")
+            return
+        try:
+            session.run("python", "-m", "coverage", "combine", "--quiet", data_file)
+            session.run("python", "-m", "coverage", "report", data_file)
+            session.run(
+                "python",
+                "-m",
+                "coverage",
+                "html",
+                "--quiet",
+                data_file,
+                f"--directory=.htmlcov-{max_or_min_deps}",
+            )
+            session.run(
+                "python",
+                "-m",
+                "coverage",
+                "xml",
+                "--quiet",
+                data_file,
+                "-o",
+                str(self._report_dir / "coverage.xml"),
+            )
+        except nox.command.CommandFailed:
+            session.warn("Could not write the coverage reports")
+
+
+def _venv_python_version(session: nox.Session) -> tuple[int, int] | None:
+    """Get the Python version used by the session virtualenv.
+
+    Args:
+        session: The nox session.
+
+    Returns:
+        The major and minor version, or `None` if it can't be determined.
+    """
+    location = getattr(session.virtualenv, "location", None)
+    if not location:
+        return None
+    try:
+        config = _pathlib.Path(location, "pyvenv.cfg").read_text(encoding="utf-8")
+    except OSError:
+        return None
+    for line in config.splitlines():
+        key, _, value = line.partition("=")
+        # virtualenv writes version_info and venv writes version
+        if key.strip() in ("version_info", "version"):
+            major, minor, *_ = value.strip().split(".")
+            return int(major), int(minor)
+    return None
+
+
+def _pytest_shards(
+    session: nox.Session,
+    history: _history.RunHistory,
+    workers: int,
+    targets: list[str],
+) -> list[list[str]]:
+    """Split the test files in groups with a similar duration.
+
+    Args:
+        session: The nox session.
+        history: The history of previous runs, to get the duration of the tests.
+        workers: The maximum number of groups to make.
+        targets: The test files to split (if empty, the pytest defaults are used).
+
+    Returns:
+        The test files in each group, or no groups if the tests can't be collected.
+    """
     conf = _config.get()
-    session.run("pytest", *conf.opts.pytest, *session.posargs)
-
-    # pylint: disable=fixme
-    # TODO: Implement coverage reporting, we need to research this a bit and it
-    # makes sense to do so when we actually collect the coverage somewhere
-    # "--cov=frequenz.sdk",
-    # "--cov-report=term",
-    # f"--cov-report=html:.htmlcov-{max_or_min_deps}",
+    try:
+        output = session.run(
+            "pytest",
+            *conf.opts.pytest,
+            *targets,
+            "--collect-only",
+            "--verbosity=-1",
+            silent=True,
+            success_codes=[0, 5],  # 5 means no tests were collected
+        )
+    except nox.command.CommandFailed:
+        session.warn(
+            "Collecting the tests failed, running them in one pytest process to "
+            "report the errors"
+        )
+        return []
+    files = _util.deduplicate(
+        line.split("::", 1)[0]
+        for line in str(output).splitlines()
+        if "::" in line and _pathlib.Path(line.split("::", 1)[0]).is_file()
+    )
+
+    durations = history.file_durations(files)
+    known = [d for d in durations.values() if d is not None]
+    # Files without history are assumed to take as long as the average file
+    default = sum(known) / len(known) if known else 1.0
+    return _parallel.partition(
+        {f: default if d is None else d for f, d in durations.items()}, workers
+    )
+
+
+def _pytest_parallel(
+    session: nox.Session,
+    history: _history.RunHistory,
+    shards: list[list[str]],
+    report_dir: _pathlib.Path,
+    coverage: _Coverage | None,
+) -> None:
+    """Run groups of test files in parallel pytest processes.
+
+    The JUnit reports of all processes are merged into one, and the combined results
+    are summarized at the end.
+
+    Args:
+        session: The nox session.
+        history: The history where to record the results.
+        shards: The test files to run in each process.
+        report_dir: The directory where to write the JUnit reports.
+        coverage: The coverage collector, or `None` if coverage is not collected.
+    """
+    conf = _config.get()
+
+    def make_step(
+        files: list[str], junit: _pathlib.Path, cache_dir: _pathlib.Path
+    ) -> Callable[[nox.Session], None]:
+        def step(session: nox.Session) -> None:
+            session.run(
+                *(coverage.command if coverage else ["pytest"]),
+                *conf.opts.pytest,
+                *_history.JUNIT_ARGS,
+                f"--junitxml={junit}",
+                *_failed_first_args(history, cache_dir),
+                *files,
+                env=coverage.env if coverage else None,
+            )
+
+        return step
+
+    junits = [report_dir / f"junit-{i}.xml" for i in range(len(shards))]
+    for junit in junits:
+        junit.unlink(missing_ok=True)
+    session.log(f"Running the tests in {len(shards)} parallel pytest processes")
+    results = _parallel.run_steps(
+        session,
+        [
+            (f"pytest[{i}]", make_step(files, junit, report_dir / f"cache-{i}"))
+            for i, (files, junit) in enumerate(zip(shards, junits))
+        ],
+        fail_fast=False,
+    )
+
+    reports = [r for junit in junits for r in _history.read_junit(junit)]
+    history.update(reports)
+    history.save()
+    _history.merge_junit(junits, report_dir / "junit.xml")
+
+    counts = _collections.Counter(r.outcome for r in reports)
+    session.log(
+        f"pytest: {counts['passed']} passed, {counts['failed']} failed, "
+        f"{counts['skipped']} skipped in {max(r.duration for r in results):.1f}s "
+        f"({sum(r.duration for r in results):.1f}s in total)"
+    )
+    for report in reports:
+        if report.outcome == "failed":
+            session.log(f"FAILED {report.nodeid}")
+    _parallel.check_results(session, results)
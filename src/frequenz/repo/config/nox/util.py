@@ -8,10 +8,15 @@ modules in this package.
 """
 
 
+import json as _json
+import os as _os
 import pathlib as _pathlib
-import tomllib as _tomllib
+import subprocess as _subprocess
+import time as _time
 from collections.abc import Iterable, Mapping
-from typing import TypeVar
+from typing import Any, TypeVar
+
+from .. import _pyproject
 
 _T = TypeVar("_T")
 
@@ -92,6 +97,49 @@ def is_python_file(path: _pathlib.Path, /) -> bool:
     return path.suffix in (".py", ".pyi")
 
 
+def python_files(paths: Iterable[str], /) -> list[_pathlib.Path]:
+    """Expand paths to the Python files they contain.
+
+    Files are returned as they are (if they are Python files) and directories are
+    searched recursively for Python files. If the current directory is a git
+    repository, files ignored by git are not returned.
+
+    Args:
+        paths: The files and directories to expand.
+
+    Returns:
+        The Python files in `paths`, without duplicates.
+    """
+    files: list[_pathlib.Path] = []
+    directories: list[str] = []
+    for path in map(_pathlib.Path, paths):
+        if path.is_dir():
+            directories.append(str(path))
+        elif is_python_file(path):
+            files.append(path)
+
+    if directories:
+        found: Iterable[_pathlib.Path]
+        try:
+            found = map(
+                _pathlib.Path,
+                _git(
+                    "ls-files",
+                    "-z",
+                    "--cached",
+                    "--others",
+                    "--exclude-standard",
+                    "--",
+                    *directories,
+                ).split("\0"),
+            )
+        except (OSError, _subprocess.CalledProcessError):
+            found = flatten(_pathlib.Path(d).rglob("*.py*") for d in directories)
+        files.extend(p for p in found if is_python_file(p) and p.is_file())
+
+    return list(deduplicate(files))
+
+
 def path_to_package(path: _pathlib.Path, root: _pathlib.Path | None = None) -> str:
     """Convert paths to Python package names.
 
@@ -124,19 +172,201 @@ def path_to_package(path: _pathlib.Path, root: _pathlib.Path | None = None) -> s
     return path.as_posix().replace("/", ".")
 
 
+PRUNED_DIRECTORIES = frozenset(
+    {
+        ".eggs",
+        ".git",
+        ".hg",
+        ".mypy_cache",
+        ".nox",
+        ".pytest_cache",
+        ".tox",
+        ".venv",
+        "__pycache__",
+        "build",
+        "dist",
+        "node_modules",
+        "venv",
+    }
+)
+"""Directories not searched for packages, unless they are packages themselves.
+
+`*.egg-info` directories are never searched.
+"""
+
+_RACY_WINDOW_NS = 2_000_000_000
+"""How old a directory modification time must be to trust its indexed contents."""
+
+
+def _is_package_dir(path: str, /) -> bool:
+    """Tell whether a directory is a regular package.
+
+    Args:
+        path: The directory.
+
+    Returns:
+        Whether the directory has a `__init__.py` file.
+    """
+    return _os.path.isfile(_os.path.join(path, "__init__.py"))
+
+
+def is_pruned(path: _pathlib.Path, /) -> bool:
+    """Tell whether a path is inside a directory that is not searched for packages.
+
+    Args:
+        path: The path to check.
+
+    Returns:
+        Whether any of the parent directories of `path` is in
+            [`PRUNED_DIRECTORIES`][frequenz.repo.config.nox.util.PRUNED_DIRECTORIES]
+            (and is not a package) or is a `*.egg-info` directory.
+    """
+    parent = _pathlib.Path()
+    for part in path.parts[:-1]:
+        parent /= part
+        if part.endswith(".egg-info") or (
+            part in PRUNED_DIRECTORIES and not _is_package_dir(str(parent))
+        ):
+            return True
+    return False
+
+
+def _scan_directory(path: _pathlib.Path, /) -> tuple[bool, bool, list[str], list[str]]:
+    """Scan the entries of a directory that are relevant to find packages.
+
+    Args:
+        path: The directory to scan.
+
+    Returns:
+        If the directory has a `__init__.py` file, if it has other Python modules,
+            the names of the sub-directories that should be searched, and the names
+            of the sub-directories in `PRUNED_DIRECTORIES` (which are only searched
+            if they are packages).
+    """
+    has_init = has_modules = False
+    subdirs: list[str] = []
+    pruned: list[str] = []
+    with _os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if entry.name in PRUNED_DIRECTORIES:
+                    pruned.append(entry.name)
+                    # Something like `mypkg/build/` can be a real sub-package
+                    if _is_package_dir(entry.path):
+                        subdirs.append(entry.name)
+                elif not entry.name.endswith(".egg-info"):
+                    subdirs.append(entry.name)
+            elif entry.name == "__init__.py":
+                has_init = True
+            elif entry.name.endswith((".py", ".pyi")):
+                has_modules = True
+    return has_init, has_modules, sorted(subdirs), sorted(pruned)
+
+
+class _PackageIndex:
+    """An on-disk index of the scanned directories, keyed by their mtime.
+
+    Adding or removing entries in a directory changes its modification time, so the
+    directories that didn't change don't need to be scanned again.
+    """
+
+    def __init__(self, path: _pathlib.Path, /) -> None:
+        """Load the index.
+
+        Args:
+            path: The file where the index is stored.
+        """
+        self._path = path
+        try:
+            loaded = _json.loads(path.read_text(encoding="utf-8"))
+            self._entries: dict[str, list[Any]] = dict(loaded["directories"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self._entries = {}
+        self._visited: dict[str, list[Any]] = {}
+
+    def scan(self, directory: _pathlib.Path, /) -> tuple[bool, bool, list[str]]:
+        """Scan a directory, using the index if it didn't change.
+
+        Args:
+            directory: The directory to scan.
+
+        Returns:
+            If the directory has a `__init__.py` file, if it has other Python modules,
+                and the names of the sub-directories that should be searched.
+        """
+        key = str(directory)
+        mtime = directory.stat().st_mtime_ns
+        entry = self._entries.get(key)
+        if (
+            isinstance(entry, list)
+            and len(entry) == 6
+            and entry[0] == mtime
+            and entry[1] - mtime > _RACY_WINDOW_NS
+        ):
+            self._visited[key] = entry
+            # Adding a `__init__.py` to a pruned directory doesn't change the
+            # modification time of this directory, so they are checked every time
+            packages = [d for d in entry[5] if _is_package_dir(_os.path.join(key, d))]
+            return bool(entry[2]), bool(entry[3]), sorted([*entry[4], *packages])
+
+        scanned_at = _time.time_ns()
+        has_init, has_modules, subdirs, pruned = _scan_directory(directory)
+        self._visited[key] = [
+            mtime,
+            scanned_at,
+            has_init,
+            has_modules,
+            [d for d in subdirs if d not in pruned],
+            pruned,
+        ]
+        return has_init, has_modules, subdirs
+
+    def save(self, walked: _pathlib.Path, /) -> None:
+        """Save the index, dropping entries under `walked` that were not visited.
+
+        Args:
+            walked: The directory that was walked.
+        """
+        prefix = str(walked) + _os.sep
+        entries = {
+            k: v
+            for k, v in self._entries.items()
+            if k != str(walked) and not k.startswith(prefix)
+        }
+        entries.update(self._visited)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self._path.with_name(self._path.name + ".tmp")
+        temporary.write_text(
+            _json.dumps({"version": 1, "directories": entries}), encoding="utf-8"
+        )
+        temporary.replace(self._path)
+
+
 def find_toplevel_package_dirs(
-    path: _pathlib.Path, /, *, root: _pathlib.Path | None = None
+    path: _pathlib.Path,
+    /,
+    *,
+    root: _pathlib.Path | None = None,
+    namespace_packages: bool = False,
+    index: _pathlib.Path | None = None,
 ) -> Iterable[_pathlib.Path]:
     """Find top-level packages directories in a `path`.
 
     Searches recursively for the top-level packages in `path`, relative to
-    `root`.
+    `root`. Directories in
+    [`PRUNED_DIRECTORIES`][frequenz.repo.config.nox.util.PRUNED_DIRECTORIES] and
+    `*.egg-info` directories are not searched.
 
     Args:
         path: The path to look for python packages.
         root: The part of the path that is considered the root and will be
             removed from the resulting path. If `None` then `path` is used as
             `root`.
+        namespace_packages: Whether to consider sub-directories without a
+            `__init__.py` file but with Python modules as (namespace) packages too.
+        index: A file where to store the contents of the scanned directories, so
+            they are not scanned again in future calls if their modification time
+            didn't change. If `None`, no index is used.
 
     Returns:
         The top-level paths that contains a `__init__.py` file, with `root`
@@ -167,15 +397,142 @@ def find_toplevel_package_dirs(
     """
     if root is None:
         root = path
-    # Bail out early if it is a directory with a __init__.py to avoid getting
-    # sub-packages
-    if (path / "__init__.py").exists():
-        return [path.relative_to(root)]
-    if path.is_dir():
-        return flatten(
-            [find_toplevel_package_dirs(p, root=root) for p in path.iterdir()]
-        )
-    return ()
+    package_index = _PackageIndex(index) if index is not None else None
+
+    found: list[_pathlib.Path] = []
+    pending = [(path, False)]
+    while pending:
+        directory, nested = pending.pop()
+        try:
+            if package_index is not None:
+                has_init, has_modules, subdirs = package_index.scan(directory)
+            else:
+                has_init, has_modules, subdirs, _ = _scan_directory(directory)
+        except OSError:  # Not a directory, or it can't be read
+            continue
+        # Stop at packages to avoid getting sub-packages
+        if has_init or (
+            namespace_packages
+            and nested
+            and has_modules
+            and directory.name.isidentifier()
+        ):
+            found.append(directory.relative_to(root))
+            continue
+        pending.extend((directory / d, True) for d in reversed(subdirs))
+
+    if package_index is not None:
+        package_index.save(path)
+    return found
+
+
+def env_flag(name: str, /, *, default: bool = False) -> bool:
+    """Read a boolean flag from an environment variable.
+
+    The values `1`, `true`, `yes` and `on` are considered `True` and `0`, `false`,
+    `no`, `off` and the empty string are considered `False` (case-insensitive).
+
+    Args:
+        name: The name of the environment variable.
+        default: The value to return if the environment variable is not defined.
+
+    Returns:
+        The value of the flag.
+
+    Raises:
+        ValueError: If the environment variable has an invalid value.
+
+    Example:
+        >>> assert env_flag("SOME_UNDEFINED_ENV_VAR", default=True) is True
+    """
+    value = _os.environ.get(name)
+    if value is None:
+        return default
+    match value.strip().lower():
+        case "1" | "true" | "yes" | "on":
+            return True
+        case "0" | "false" | "no" | "off" | "":
+            return False
+        case _:
+            raise ValueError(
+                f"Invalid value for the environment variable {name}: {value!r}"
+            )
+
+
+def env_int(name: str, /, *, default: int) -> int:
+    """Read an integer from an environment variable.
+
+    Args:
+        name: The name of the environment variable.
+        default: The value to return if the environment variable is not defined or
+            empty.
+
+    Returns:
+        The value of the environment variable.
+
+    Raises:
+        ValueError: If the environment variable is not a valid integer.
+
+    Example:
+        >>> assert env_int("SOME_UNDEFINED_ENV_VAR", default=1) == 1
+    """
+    value = _os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(
+            f"Invalid value for the environment variable {name}: {value!r}"
+        ) from None
+
+
+def _git(*args: str) -> str:
+    """Run a git command and return its output.
+
+    Args:
+        *args: The arguments to pass to git.
+
+    Returns:
+        The standard output of the command.
+    """
+    return _subprocess.run(
+        ["git", *args], check=True, capture_output=True, text=True
+    ).stdout
+
+
+def changed_files(since: str, /) -> list[_pathlib.Path]:
+    """Get the files that changed since the merge-base of `since` and `HEAD`.
+
+    Changes that are not committed yet (staged or not) and untracked files (that are not
+    ignored) are included too, so what is being worked on is considered as changed.
+
+    Deleted files are also included, so the returned paths might not exist.
+
+    Args:
+        since: The git reference to compare against (for example `origin/main`).
+
+    Returns:
+        The changed files, relative to the current working directory. Files outside of
+            the current working directory are not included.
+
+    Raises:
+        RuntimeError: If git failed to calculate the changes (for example, if the
+            reference doesn't exist or the current directory is not a git
+            repository).
+    """
+    try:
+        merge_base = _git("merge-base", since, "HEAD").strip()
+        changed = _git("diff", "--name-only", "--relative", "-z", merge_base)
+        untracked = _git("ls-files", "--others", "--exclude-standard", "-z")
+    except (OSError, _subprocess.CalledProcessError) as exc:
+        stderr = getattr(exc, "stderr", None) or str(exc)
+        raise RuntimeError(
+            f"Failed to get the files changed since {since!r}: {stderr.strip()}"
+        ) from exc
+
+    names = changed.split("\0") + untracked.split("\0")
+    return [_pathlib.Path(p) for p in deduplicate(names) if p]
 
 
 def min_dependencies() -> list[str]:
@@ -187,12 +544,9 @@ def min_dependencies() -> list[str]:
     Raises:
         RuntimeError: If minimun dependencies are not properly set in pyproject.toml.
     """
-    with open("pyproject.toml", "rb") as toml_file:
-        data = _tomllib.load(toml_file)
-
     min_deps: list[str] = []
 
-    dependencies = data.get("project", {}).get("dependencies", {})
+    dependencies = _pyproject.load().dependencies
     if not dependencies:
         return min_deps
 
@@ -205,6 +559,16 @@ def min_dependencies() -> list[str]:
     return min_deps
 
 
+def build_dependencies() -> list[str]:
+    """Extract the build dependencies from pyproject.toml.
+
+    Returns:
+        The requirements of the build system defined in pyproject.toml, or the
+            default requirements (`setuptools>=40.8.0`) if there is none.
+    """
+    return _pyproject.load().build_requires
+
+
 def discover_paths() -> list[str]:
     """Discover paths to check.
 
@@ -219,14 +583,4 @@ def discover_paths() -> list[str]:
     Returns:
         The discovered paths to check.
     """
-    with open("pyproject.toml", "rb") as toml_file:
-        data = _tomllib.load(toml_file)
-
-    testpaths: list[str] = (
-        data.get("tool", {})
-        .get("pytest", {})
-        .get("ini_options", {})
-        .get("testpaths", [])
-    )
-
-    return list(deduplicate(testpaths))
+    return list(deduplicate(_pyproject.load().pytest_testpaths))
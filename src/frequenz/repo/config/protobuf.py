@@ -5,11 +5,11 @@
 
 import dataclasses
 import logging
-import pathlib
-import tomllib
 from collections.abc import Sequence
 from typing import Any, Self
 
+from . import _pyproject
+
 _logger = logging.getLogger(__name__)
 
 
@@ -57,17 +57,15 @@ class ProtobufConfig:
             The configuration.
         """
         try:
-            with pathlib.Path(path).open("rb") as toml_file:
-                pyproject_toml = tomllib.load(toml_file)
+            pyproject = _pyproject.load(path)
         except FileNotFoundError:
             return cls(**defaults)
         except (IOError, OSError) as err:
             _logger.warning("WARNING: Failed to load pyproject.toml: %s", err)
             return cls(**defaults)
 
-        try:
-            config = pyproject_toml["tool"]["frequenz-repo-config"]["protobuf"]
-        except KeyError:
+        config = pyproject.tool("frequenz-repo-config", "protobuf")
+        if not config:
             return cls(**defaults)
 
         default = cls(**defaults)
@@ -5,7 +5,9 @@
 
 This module provides the
 [`RepoVersionInfo`][frequenz.repo.config.version.RepoVersionInfo] class to get information
-about the repository version.
+about the repository version, and the
+[`RepoVersionIndex`][frequenz.repo.config.version.RepoVersionIndex] class to get
+information about many references of the same repository efficiently.
 
 It handles many scenarios and queries, like:
 
@@ -46,16 +48,23 @@ expected follow the format:
 from __future__ import annotations
 
 import dataclasses
+import functools
 import logging
 import pathlib
 import re
-from typing import Self, TypeGuard
+from typing import Self
 
 import semver
 
 _logger = logging.getLogger(__name__)
-_major_branch_re: re.Pattern[str] = re.compile(r"^v?(\d+)\.x\.x$")
-_minor_branch_re: re.Pattern[str] = re.compile(r"^v?(\d+)\.(\d+)\.x$")
+_branch_re: re.Pattern[str] = re.compile(r"^v?(\d+)\.(?:x|(\d+))\.x$")
+_semver_prefilter_re: re.Pattern[str] = re.compile(
+    r"^v?\d+\.\d+\.\d+(?:[-+][0-9A-Za-z.+-]*)?$"
+)
+"""Strings not matching this can't be semantic versions (it accepts some that aren't)."""
+
+_PARSE_CACHE_SIZE = 16384
+"""How many parsed tags and branches to remember."""
 
 
 def strip_v(version: str) -> str:
@@ -80,11 +89,96 @@ def to_semver(version: str) -> semver.Version | None:
         The semantic version or `None` if the version string is not a valid semantic
             version.
     """
-    try:
-        return semver.Version.parse(strip_v(version))
-    except ValueError:
-        logging.debug("Version is not a semantic version: %s", version)
-        return None
+    return _to_semver(version)
+
+
+@functools.lru_cache(maxsize=_PARSE_CACHE_SIZE)
+def _to_semver(version: str) -> semver.Version | None:
+    """Convert a version string to a semantic version, remembering the result.
+
+    Args:
+        version: The version string.
+
+    Returns:
+        The semantic version or `None` if the version string is not a valid semantic
+            version.
+    """
+    # Most tags that are not versions are rejected here, without the cost of raising
+    # and catching an exception
+    if _semver_prefilter_re.match(version) is not None:
+        try:
+            return semver.Version.parse(strip_v(version))
+        except ValueError:
+            pass
+    logging.debug("Version is not a semantic version: %s", version)
+    return None
+
+
+@functools.lru_cache(maxsize=_PARSE_CACHE_SIZE)
+def _parse_branch(branch: str) -> BranchVersion | None:
+    """Parse a branch name, remembering the result.
+
+    Args:
+        branch: The branch name.
+
+    Returns:
+        The parsed branch version information or None if the branch name is not a
+            valid branch name.
+    """
+    return BranchVersion.parse(branch)
+
+
+_SemverSortKey = tuple[int, int, int, int, tuple[tuple[int, int, str], ...]]
+"""A key to sort semantic versions."""
+
+
+def _semver_sort_key(version: semver.Version) -> _SemverSortKey:
+    """Get a key to sort semantic versions.
+
+    Comparing the keys gives the same result as comparing the versions (build
+    metadata is ignored), but it is much faster than calling `semver.Version.compare()`
+    for each comparison.
+
+    Args:
+        version: The semantic version.
+
+    Returns:
+        The sort key.
+    """
+    if version.prerelease is None:
+        # Releases are bigger than any of their pre-releases
+        return (version.major, version.minor, version.patch, 1, ())
+    return (
+        version.major,
+        version.minor,
+        version.patch,
+        0,
+        # Numeric identifiers are compared numerically and are smaller than
+        # alphanumeric identifiers
+        tuple(
+            (0, int(part), "") if part.isdigit() else (1, 0, part)
+            for part in version.prerelease.split(".")
+        ),
+    )
+
+
+def _sort_tags(tags: list[str]) -> list[tuple[str, semver.Version, _SemverSortKey]]:
+    """Parse and sort the tags.
+
+    Args:
+        tags: The tags of the repository.
+
+    Returns:
+        The valid tags, with their parsed (semantic) version and sort key, sorted by
+            semantic version.
+    """
+    parsed = [
+        (tag, version, _semver_sort_key(version))
+        for tag in tags
+        if (version := to_semver(tag)) is not None
+    ]
+    parsed.sort(key=lambda tag: tag[2])
+    return parsed
 
 
 def _build_tags(tags: list[str]) -> dict[str, semver.Version]:
@@ -97,21 +191,7 @@ def _build_tags(tags: list[str]) -> dict[str, semver.Version]:
         The tags dictionary, where the key is the tag name and the value is the
             parsed tag (semantic) version, sorted by semantic version.
     """
-
-    def tag_not_none(
-        tag: tuple[str, semver.Version | None]
-    ) -> TypeGuard[tuple[str, semver.Version]]:
-        return tag[1] is not None
-
-    return dict(
-        sorted(
-            filter(
-                tag_not_none,
-                ((tag, to_semver(tag)) for tag in (tags or [])),
-            ),
-            key=lambda tag: tag[1],
-        )
-    )
+    return {tag: version for tag, version, _ in _sort_tags(tags or [])}
 
 
 def _build_branches(branches: list[str]) -> dict[str, BranchVersion]:
@@ -124,29 +204,26 @@ def _build_branches(branches: list[str]) -> dict[str, BranchVersion]:
         The branches dictionary, where the key is the branch name and the value is
             the parsed branch name, sorted by branch version.
     """
-
-    def branch_not_none(
-        branch: tuple[str, BranchVersion | None]
-    ) -> TypeGuard[tuple[str, BranchVersion]]:
-        return branch[1] is not None
-
-    return dict(
-        sorted(
-            filter(
-                branch_not_none,
-                ((branch, BranchVersion.parse(branch)) for branch in (branches or [])),
-            ),
-            key=lambda branch: branch[1],
-        )
-    )
+    parsed = [
+        (branch, version)
+        for branch in branches
+        if (version := _parse_branch(branch)) is not None
+    ]
+    parsed.sort(key=lambda branch: branch[1].sort_key)
+    return dict(parsed)
 
 
-@dataclasses.dataclass(frozen=True, kw_only=True)
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
 class BranchVersion:
     """A branch version.
 
     Versions can be compared with each other. If `minor` is `None`, it is considered to
     be greater than any other `minor`.
+
+    To sort many branches or find the biggest one, using the
+    [`sort_key`][frequenz.repo.config.version.BranchVersion.sort_key] as key (for
+    example, `max(branches, key=operator.attrgetter("sort_key"))`) is faster than
+    comparing the branches.
     """
 
     major: int
@@ -158,12 +235,29 @@ class BranchVersion:
     name: str
     """The branch name."""
 
+    sort_key: tuple[int, int, int, str] = dataclasses.field(
+        init=False, repr=False, compare=False
+    )
+    """A key to sort branch versions, ordered like the branch versions.
+
+    Major branches (`minor` is `None`) are bigger than any minor branch of the same
+    major.
+    """
+
     def __post_init__(self) -> None:
         """Post init."""
         if self.major < 0:
             raise ValueError("major cannot be negative")
         if self.minor is not None and self.minor < 0:
             raise ValueError("minor cannot be negative")
+        # The class is frozen, so the key is set bypassing the dataclass __setattr__
+        object.__setattr__(
+            self,
+            "sort_key",
+            (self.major, 1, 0, self.name)
+            if self.minor is None
+            else (self.major, 0, self.minor, self.name),
+        )
 
     @classmethod
     def parse(cls, branch: str) -> Self | None:
@@ -179,11 +273,12 @@ class BranchVersion:
             The parsed branch version information or None if the branch name is not
                 a valid branch name.
         """
-        if match := _major_branch_re.match(branch):
-            return cls(major=int(match.group(1)), name=branch)
-        if match := _minor_branch_re.match(branch):
+        if match := _branch_re.match(branch):
+            major, minor = match.groups()
             return cls(
-                major=int(match.group(1)), minor=int(match.group(2)), name=branch
+                major=int(major),
+                minor=None if minor is None else int(minor),
+                name=branch,
             )
         _logger.debug("Invalid branch name: %s", branch)
         return None
@@ -205,27 +300,160 @@ class BranchVersion:
         """
         if not isinstance(other, BranchVersion):
             return NotImplemented
-        if self.minor is None and other.minor is None:
-            self_minor = 0
-            other_minor = 0
-        elif self.minor is None and other.minor is not None:
-            self_minor = other.minor + 1
-            other_minor = other.minor
-        elif other.minor is None and self.minor is not None:
-            self_minor = self.minor
-            other_minor = self.minor + 1
-        elif self.minor is not None and other.minor is not None:
-            self_minor = self.minor
-            other_minor = other.minor
-        else:
-            # We need this because mypy is not smart enough to figure it out
-            assert False, "unreachable"
-        return (self.major, self_minor, self.name) < (
-            other.major,
-            other_minor,
-            other.name,
+        return self.sort_key < other.sort_key
+
+
+class RepoVersionIndex:  # pylint: disable=too-many-instance-attributes
+    """The tags and branches of a repository, parsed and indexed once.
+
+    Parsing and sorting the tags and branches takes much longer than answering the
+    queries about them, so when information about many references of the same
+    repository is needed (for example, to build the `mike` versions of all branches
+    and tags), an index can be built once and used to get the
+    [`RepoVersionInfo`][frequenz.repo.config.version.RepoVersionInfo] of each
+    reference with [`info()`][frequenz.repo.config.version.RepoVersionIndex.info].
+
+    All the queries only look up precomputed values. When several tags are equal
+    (they only differ in the build metadata), the first one in the sorted tags is
+    returned, like `max()` would do.
+    """
+
+    def __init__(
+        self, tags: list[str] | None = None, branches: list[str] | None = None
+    ) -> None:
+        """Parse and index the tags and branches.
+
+        Args:
+            tags: The tags of the repository.
+            branches: The branches of the repository.
+        """
+        sorted_tags = _sort_tags(tags or [])
+        self._tags: dict[str, semver.Version] = {
+            tag: version for tag, version, _ in sorted_tags
+        }
+        _logger.debug("tags: %s", self._tags)
+
+        self._branches: dict[str, BranchVersion] = _build_branches(branches or [])
+        _logger.debug("branches: %s", self._branches)
+
+        self._by_major: dict[int, semver.Version] = {}
+        self._by_minor: dict[tuple[int, int], semver.Version] = {}
+        self._stable_minor: dict[int, int] = {}
+        self._minor_tag: dict[tuple[int, bool], semver.Version] = {}
+        self._latest_tag: dict[bool, semver.Version] = {}
+        # Tags are sorted, so each tag is bigger than all the previous ones, unless it
+        # is equal to the previous one. Equal tags are skipped to keep the first one.
+        previous = None
+        for _, tag, key in sorted_tags:
+            if key == previous:
+                continue
+            previous = key
+            prerelease = tag.prerelease is not None
+            self._by_major[tag.major] = tag
+            self._by_minor[tag.major, tag.minor] = tag
+            if not prerelease:
+                self._stable_minor[tag.major] = tag.minor
+            last = self._minor_tag.get((tag.major, prerelease))
+            if last is None or tag.minor > last.minor:
+                self._minor_tag[tag.major, prerelease] = tag
+            self._latest_tag[prerelease] = tag
+
+        # Branches are sorted and there are no equal branches (their names are
+        # different), so the last one is the biggest
+        self._latest_branch: BranchVersion | None = next(
+            reversed(self._branches.values()), None
         )
 
+    @property
+    def tags(self) -> dict[str, semver.Version]:
+        """The tags of the repository.
+
+        The key is the tag name and the value is the parsed tag (semantic) version,
+        sorted by semantic version.
+        """
+        return self._tags
+
+    @property
+    def branches(self) -> dict[str, BranchVersion]:
+        """The branches of the repository.
+
+        The key is the branch name and the value is the parsed branch name, sorted by
+        branch version.
+        """
+        return self._branches
+
+    def last_tag(self, major: int, minor: int | None = None) -> semver.Version | None:
+        """Get the biggest tag for a major, or a major and minor.
+
+        Args:
+            major: The major version.
+            minor: The minor version, or `None` to consider all the minors.
+
+        Returns:
+            The biggest tag (including pre-releases), or `None` if there are no tags
+                for the version.
+        """
+        if minor is None:
+            return self._by_major.get(major)
+        return self._by_minor.get((major, minor))
+
+    def last_stable_minor(self, major: int) -> int | None:
+        """Get the biggest minor of the stable tags for a major.
+
+        Args:
+            major: The major version.
+
+        Returns:
+            The biggest minor, or `None` if there are no stable tags for the major.
+        """
+        return self._stable_minor.get(major)
+
+    def last_minor_tag(self, major: int, *, prerelease: bool) -> semver.Version | None:
+        """Get the first tag with the biggest minor for a major.
+
+        Args:
+            major: The major version.
+            prerelease: Whether to consider only pre-release tags (or only stable
+                tags).
+
+        Returns:
+            The first (smallest) tag with the biggest minor, or `None` if there are no
+                tags of that kind for the major.
+        """
+        return self._minor_tag.get((major, prerelease))
+
+    def latest_tag(self, *, prerelease: bool) -> semver.Version | None:
+        """Get the biggest tag.
+
+        Args:
+            prerelease: Whether to consider only pre-release tags (or only stable
+                tags).
+
+        Returns:
+            The biggest tag, or `None` if there are no tags of that kind.
+        """
+        return self._latest_tag.get(prerelease)
+
+    def latest_branch(self) -> BranchVersion | None:
+        """Get the biggest branch.
+
+        Returns:
+            The biggest branch, or `None` if there are no (valid) branches.
+        """
+        return self._latest_branch
+
+    def info(self, sha: str, ref: str) -> RepoVersionInfo:
+        """Get the information about a reference of the repository.
+
+        Args:
+            sha: The commit hash of the reference.
+            ref: The reference full path (e.g. `refs/tags/v1.0.0`).
+
+        Returns:
+            The information about the reference, using this index.
+        """
+        return RepoVersionInfo(sha, ref, index=self)
+
 
 class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
     """The information about a repository version.
@@ -241,6 +469,12 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
     for patch releases for that minor. For example, if the current major version is 1,
     the current major branch is "v1.x.x" and the current minor branch is "v1.0.x". If
     the next minor version is 1.1, the new minor branch will be "v1.1.x".
+
+    The tags and branches are indexed when the object is created, so queries don't
+    need to look at all of them. To get the information about many references of the
+    same repository, use a
+    [`RepoVersionIndex`][frequenz.repo.config.version.RepoVersionIndex] to parse and
+    index the tags and branches only once.
     """
 
     def __init__(  # pylint: disable=too-many-arguments
@@ -249,6 +483,8 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
         ref: str,
         tags: list[str] | None = None,
         branches: list[str] | None = None,
+        *,
+        index: RepoVersionIndex | None = None,
     ) -> None:
         """Initialize the environment variables.
 
@@ -257,6 +493,13 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
             ref: The current reference full path (e.g. `refs/tags/v1.0.0`).
             tags: The tags of the repository.
             branches: The branches of the repository.
+            index: An index of the tags and branches of the repository, to use
+                instead of `tags` and `branches` (for example, to get the
+                information about many references without parsing the tags and
+                branches each time).
+
+        Raises:
+            ValueError: If both `index` and `tags` or `branches` are given.
         """
         self._sha: str = sha
         _logger.debug("sha: %s", self._sha)
@@ -273,11 +516,11 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
         self._current_tag: semver.Version | None = to_semver(self._ref_name)
         _logger.debug("current_tag: %s", self._current_tag)
 
-        self._tags: dict[str, semver.Version] = _build_tags(tags or [])
-        _logger.debug("tags: %s", self._tags)
-
-        self._branches: dict[str, BranchVersion] = _build_branches(branches or [])
-        _logger.debug("branches: %s", self._branches)
+        if index is None:
+            index = RepoVersionIndex(tags, branches)
+        elif tags or branches:
+            raise ValueError("Either an index or tags and branches can be given")
+        self._index: RepoVersionIndex = index
 
     @property
     def sha(self) -> str:
@@ -316,7 +559,7 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
 
         The key is the tag name and the value is the parsed tag (semantic) version.
         """
-        return self._tags
+        return self._index.tags
 
     @property
     def branches(self) -> dict[str, BranchVersion]:
@@ -324,7 +567,7 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
 
         The key is the branch name and the value is the parsed branch name.
         """
-        return self._branches
+        return self._index.branches
 
     def find_last_tag(self) -> semver.Version | None:
         """Find the last tag.
@@ -340,12 +583,7 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
         branch = self.current_branch
         if branch is None:
             return None
-        tags = [t for t in self._tags.values() if t.major == branch.major]
-        if branch.minor is not None:
-            tags = [t for t in tags if t.minor == branch.minor]
-        if not tags:
-            return None
-        return max(tags)
+        return self._index.last_tag(branch.major, branch.minor)
 
     def find_next_breaking_branch(self) -> BranchVersion | None:
         """Find the next branch potentially introducing breaking changes.
@@ -408,16 +646,10 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
             )
             return None
 
-        minor_tags = [
-            tag
-            for tag in self._tags.values()
-            if tag.major == branch.major and tag.prerelease is None
-        ]
-        if not minor_tags:
+        last_minor = self._index.last_stable_minor(branch.major)
+        if last_minor is None:
             return 0
-
-        bigger_tag = max(minor_tags, key=lambda tag: tag.minor)
-        return bigger_tag.minor + 1
+        return last_minor + 1
 
     def is_tag(self) -> bool:
         """Tell whether we are at a stable release."""
@@ -443,12 +675,10 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
                 self._ref_name,
             )
             return False
-        minor_tags = [tag_ for tag_ in self._tags.values() if tag_.major == tag.major]
-        if tag.prerelease is None:
-            minor_tags = [tag_ for tag_ in minor_tags if tag_.prerelease is None]
-        else:
-            minor_tags = [tag_ for tag_ in minor_tags if tag_.prerelease is not None]
-        if not minor_tags:
+        last_minor_tag = self._index.last_minor_tag(
+            tag.major, prerelease=tag.prerelease is not None
+        )
+        if last_minor_tag is None:
             _logger.debug(
                 "No minor tags found for major version %s, considering the "
                 "tag %r the last minor for this major",
@@ -456,7 +686,7 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
                 tag,
             )
             return True
-        return tag >= max(minor_tags, key=lambda tag_: tag_.minor)
+        return tag >= last_minor_tag
 
     def is_tag_latest(self) -> bool:
         """Tell whether the current tag is the latest tag.
@@ -475,22 +705,16 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
                 self._ref_name,
             )
             return False
-        if tag.prerelease is None:
-            tags_it = (tag_ for tag_ in self._tags.values() if tag_.prerelease is None)
-        else:
-            tags_it = (
-                tag_ for tag_ in self._tags.values() if tag_.prerelease is not None
-            )
-        latest = sorted(tags_it, reverse=True)
-        if not latest:
+        latest = self._index.latest_tag(prerelease=tag.prerelease is not None)
+        if latest is None:
             _logger.warning(
                 "No other tags found, at least the current tag %r should be in the list "
                 "of tags (%r)",
                 tag,
-                self._tags,
+                self._index.tags,
             )
             return False
-        return tag == latest[0]
+        return tag == latest
 
     def is_branch_latest(self) -> bool:
         """Tell whether the current branch is the latest.
@@ -506,13 +730,13 @@ class RepoVersionInfo:  # pylint: disable=too-many-instance-attributes
                 self._ref_name,
             )
             return False
-        latest = sorted(self._branches.values(), reverse=True)
-        if not latest:
+        latest = self._index.latest_branch()
+        if latest is None:
             _logger.warning(
                 "No other branches found, at least the current branch %r should be in the list "
                 "of branches (%r)",
                 branch,
-                self._branches,
+                self._index.branches,
             )
             return False
-        return branch == latest[0]
+        return branch == latest
@@ -13,10 +13,15 @@ import semver
 from frequenz.repo.config.mkdocs.mike import (
     MikeVersionInfo,
     build_mike_version,
+    build_mike_versions,
     compare_mike_version,
     sort_mike_versions,
 )
-from frequenz.repo.config.version import BranchVersion, RepoVersionInfo
+from frequenz.repo.config.version import (
+    BranchVersion,
+    RepoVersionIndex,
+    RepoVersionInfo,
+)
 
 
 @dataclasses.dataclass(frozen=True, kw_only=True)
@@ -383,3 +388,36 @@ def test_sort_mike_versions(
 ) -> None:
     """Test sort_mike_versions()."""
     assert sort_mike_versions(case.versions, reverse=case.reversed) == case.expected
+
+
+def test_build_mike_versions() -> None:
+    """Test that building many versions is the same as building them one by one."""
+    tags = ["v1.0.0", "v1.1.0", "v1.1.1", "v2.0.0-rc.1", "v2.0.0", "invalid"]
+    branches = ["v1.x.x", "v1.1.x", "v2.x.x", "v3.x.x", "feature"]
+    refs = {f"refs/tags/{t}": f"sha-{t}" for t in tags}
+    refs.update({f"refs/heads/{b}": f"sha-{b}" for b in branches})
+    refs["refs/pull/1/merge"] = "sha-pr"
+
+    versions = build_mike_versions(RepoVersionIndex(tags, branches), refs)
+
+    expected: dict[str, MikeVersionInfo] = {}
+    for ref, sha in refs.items():
+        try:
+            expected[ref] = build_mike_version(
+                RepoVersionInfo(sha, ref, tags, branches)
+            )
+        except ValueError:
+            pass
+    assert versions == expected
+    assert list(versions) == [
+        "refs/tags/v1.0.0",
+        "refs/tags/v1.1.0",
+        "refs/tags/v1.1.1",
+        "refs/tags/v2.0.0-rc.1",
+        "refs/tags/v2.0.0",
+        "refs/heads/v1.x.x",
+        "refs/heads/v1.1.x",
+        "refs/heads/v2.x.x",
+        "refs/heads/v3.x.x",
+    ]
+    assert versions["refs/tags/v2.0.0"].aliases == ["v2", "latest"]
@@ -0,0 +1,119 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for the cache of files checked clean."""
+
+import os
+import pathlib
+from unittest import mock
+
+import pytest
+
+import nox
+from frequenz.repo.config.nox._cache import CheckCache, hash_files, install_fingerprint
+
+
+def test_clean_files_are_remembered(tmp_path: pathlib.Path) -> None:
+    """Test that files marked clean are found until their content changes."""
+    cache_dir = tmp_path / "cache"
+    file = tmp_path / "mod.py"
+    file.write_text("x = 1\n")
+
+    assert not CheckCache("salt", directory=cache_dir).is_clean(file)
+    CheckCache("salt", directory=cache_dir).mark_clean([file])
+    assert CheckCache("salt", directory=cache_dir).is_clean(file)
+    assert not CheckCache("other salt", directory=cache_dir).is_clean(file)
+
+    file.write_text("x = 2\n")
+    assert not CheckCache("salt", directory=cache_dir).is_clean(file)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: pathlib.Path) -> None:
+    """Test that the cache doesn't grow over its maximum number of entries."""
+    cache_dir = tmp_path / "cache"
+    files = [tmp_path / f"mod{i}.py" for i in range(3)]
+    for i, file in enumerate(files):
+        file.write_text(f"x = {i}\n")
+
+    cache = CheckCache("salt", directory=cache_dir, max_entries=2)
+    cache.mark_clean(files[:2])
+    # Make the first entry the oldest one, and then use it, so the second is evicted
+    for entry in cache_dir.glob("*/*"):
+        os.utime(entry, (0, 0))
+    assert cache.is_clean(files[0])
+    cache.mark_clean(files[2:])
+
+    cache = CheckCache("salt", directory=cache_dir, max_entries=2)
+    assert [cache.is_clean(f) for f in files] == [True, False, True]
+
+
+def test_hash_files(tmp_path: pathlib.Path) -> None:
+    """Test that the hash of a set of files changes when any file changes."""
+    files = [tmp_path / "a.py", tmp_path / "b.py"]
+    for file in files:
+        file.write_text("")
+
+    before = hash_files(files)
+    assert hash_files(reversed(files)) == before
+    files[1].write_text("x = 1\n")
+    assert hash_files(files) != before
+
+
+def test_install_fingerprint(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the install fingerprint changes when the dependencies change."""
+    monkeypatch.chdir(tmp_path)
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text('[project]\nname = "x"\ndependencies = ["a>=1"]\n')
+    (tmp_path / "venv").mkdir()
+    (tmp_path / "venv" / "pyvenv.cfg").write_text("version = 3.11.4\n")
+    session = mock.MagicMock(spec=nox.Session)
+    session.virtualenv.location = str(tmp_path / "venv")
+
+    before = install_fingerprint(session, ["-e", ".[dev]"])
+    assert install_fingerprint(session, ["-e", ".[dev]"]) == before
+    assert install_fingerprint(session, ["-e", ".[dev-mypy]"]) != before
+
+    pyproject.write_text(pyproject.read_text() + "\n[tool.black]\nline-length = 88\n")
+    assert install_fingerprint(session, ["-e", ".[dev]"]) == before
+
+    pyproject.write_text('[project]\nname = "x"\ndependencies = ["a>=2"]\n')
+    assert install_fingerprint(session, ["-e", ".[dev]"]) != before
+    pyproject.write_text('[project]\nname = "x"\ndependencies = ["a>=1"]\n')
+
+    (tmp_path / "venv" / "pyvenv.cfg").write_text("version = 3.12.0\n")
+    assert install_fingerprint(session, ["-e", ".[dev]"]) != before
+
+
+def test_paths_are_part_of_the_key(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that files with the same contents in different paths are different."""
+    monkeypatch.chdir(tmp_path)
+    for path in ("src/pkg/__init__.py", "tests/pkg/__init__.py"):
+        (tmp_path / path).parent.mkdir(parents=True)
+        (tmp_path / path).write_text("")
+
+    CheckCache("salt").mark_clean([pathlib.Path("tests/pkg/__init__.py")])
+
+    cache = CheckCache("salt")
+    assert cache.is_clean(pathlib.Path("tests/pkg/__init__.py"))
+    assert cache.is_clean(tmp_path / "tests" / "pkg" / "__init__.py")
+    assert not cache.is_clean(pathlib.Path("src/pkg/__init__.py"))
+
+
+def test_mark_clean_skips_changed_files(tmp_path: pathlib.Path) -> None:
+    """Test that files changed after being looked up are not marked clean."""
+    cache_dir = tmp_path / "cache"
+    file = tmp_path / "mod.py"
+    file.write_text("x = 1\n")
+
+    cache = CheckCache("salt", directory=cache_dir)
+    assert not cache.is_clean(file)
+    file.write_text("x = 2\n")
+    cache.mark_clean([file])
+
+    assert not CheckCache("salt", directory=cache_dir).is_clean(file)
+    file.write_text("x = 1\n")
+    assert not CheckCache("salt", directory=cache_dir).is_clean(file)
@@ -0,0 +1,92 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for the nox.config module."""
+
+import pathlib
+import subprocess
+from unittest import mock
+
+import pytest
+
+import nox
+from frequenz.repo.config.nox.config import Config
+
+
+def _git(*args: str) -> None:
+    subprocess.run(["git", *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def git_repo(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> pathlib.Path:
+    """Create a git repository with a committed project and make it the cwd."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("FREQUENZ_NOX_CHANGED_SINCE", raising=False)
+    for path in ("src/pkg/__init__.py", "src/pkg/mod.py", "tests/test_mod.py"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("")
+    (tmp_path / "pyproject.toml").write_text(
+        '[tool.pytest.ini_options]\ntestpaths = ["tests"]\n'
+    )
+    _git("init", "-q", "-b", "main")
+    _git("add", ".")
+    _git("-c", "user.name=test", "-c", "user.email=test@test", "commit", "-qm", "x")
+    return tmp_path
+
+
+def _session() -> nox.Session:
+    session = mock.MagicMock(spec=nox.Session)
+    session.posargs = []
+    return session
+
+
+def test_path_args_all(git_repo: pathlib.Path) -> None:
+    """Test that all existing paths are returned by default."""
+    (git_repo / "src/pkg/mod.py").write_text("x = 1\n")
+    conf = Config(source_paths=["src"], extra_paths=["docs"])
+    assert conf.path_args(_session()) == ["src", "tests"]
+
+
+def test_path_args_changed_since(git_repo: pathlib.Path) -> None:
+    """Test that only changed python files are returned when changed_since is set."""
+    (git_repo / "src/pkg/mod.py").write_text("x = 1\n")
+    (git_repo / "src/pkg/new.py").write_text("")
+    (git_repo / "src/pkg/data.json").write_text("{}")
+    (git_repo / "other.py").write_text("")
+    conf = Config(source_paths=["src"], changed_since="main")
+
+    assert conf.path_args(_session()) == ["src/pkg/mod.py", "src/pkg/new.py"]
+    assert conf.path_args(_session(), include_sources=False) == []
+
+
+def test_path_args_changed_config(git_repo: pathlib.Path) -> None:
+    """Test that all paths are returned if a config file changed."""
+    (git_repo / "src/pkg/mod.py").write_text("x = 1\n")
+    with (git_repo / "pyproject.toml").open("a") as pyproject:
+        pyproject.write("# changed\n")
+    conf = Config(source_paths=["src"], changed_since="main")
+
+    assert conf.path_args(_session()) == ["src", "tests"]
+
+
+@pytest.mark.usefixtures("git_repo")
+def test_path_args_bad_reference() -> None:
+    """Test that all paths are returned if the reference doesn't exist."""
+    conf = Config(source_paths=["src"], changed_since="does-not-exist")
+    session = _session()
+
+    assert conf.path_args(session) == ["src", "tests"]
+    session.warn.assert_called_once()  # type: ignore[attr-defined]
+
+
+def test_session_groups_validation() -> None:
+    """Test that invalid session groups are rejected."""
+    conf = Config(session_groups={"lint": ["flake8", "pylint"], "types": ["mypy"]})
+    copy = conf.copy()
+    copy.session_groups["lint"].append("formatting")
+    assert conf.session_groups["lint"] == ["flake8", "pylint"]
+
+    with pytest.raises(ValueError, match="pytest_min"):
+        Config(session_groups={"tests": ["pytest_max", "pytest_min"]})
+    with pytest.raises(ValueError, match="more than one session group"):
+        Config(session_groups={"lint": ["flake8"], "other": ["flake8"]})
@@ -0,0 +1,118 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for the single-pass formatting checker."""
+
+import pathlib
+from unittest import mock
+
+import isort
+import pytest
+
+from frequenz.repo.config.nox import _formatting
+
+_GOOD = "import os\nimport sys\n\nprint(os, sys)\n"
+
+
+@pytest.fixture
+def project(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> pathlib.Path:
+    """Create a project configuring black and isort.
+
+    Args:
+        tmp_path: The temporary directory to create the project in.
+        monkeypatch: The fixture to change the working directory.
+
+    Returns:
+        The project directory.
+    """
+    (tmp_path / "pyproject.toml").write_text(
+        '[tool.black]\nline-length = 88\ntarget-version = ["py311"]\n'
+        '[tool.isort]\nprofile = "black"\n'
+    )
+    (tmp_path / "good.py").write_text(_GOOD)
+    (tmp_path / "unsorted.py").write_text("import sys\nimport os\n\nprint(os, sys)\n")
+    (tmp_path / "both.py").write_text("import sys\nimport os\nprint( os,sys )\n")
+    (tmp_path / "invalid.py").write_text("def (:\n")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.usefixtures("project")
+def test_check_file() -> None:
+    """Test that files are checked with both tools and a combined diff is made."""
+    black_conf = _formatting.black_config()
+    assert black_conf is not None
+    isort_conf = isort.Config(settings_path=".")
+
+    assert _formatting.check_file("good.py", black_conf, isort_conf) == (
+        _formatting.FileResult(path="good.py")
+    )
+
+    unsorted = _formatting.check_file("unsorted.py", black_conf, isort_conf)
+    assert unsorted.tools == ("isort",)
+    assert "-import os\n" in unsorted.diff
+
+    both = _formatting.check_file("both.py", black_conf, isort_conf)
+    assert both.tools == ("isort", "black")
+    formatted = "".join(
+        line[1:]
+        for line in both.diff.splitlines(True)[3:]
+        if line.startswith(("+", " "))
+    )
+    assert formatted == _GOOD
+
+    invalid = _formatting.check_file("invalid.py", black_conf, isort_conf)
+    assert invalid.error is not None
+
+
+def test_check_file_isort_skip(project: pathlib.Path) -> None:
+    """Test that black still checks files skipped by isort with a comment."""
+    (project / "skipped.py").write_text(
+        "# isort: skip_file\nimport sys\nimport os\nprint( os,sys )\n"
+    )
+    black_conf = _formatting.black_config()
+    assert black_conf is not None
+    isort_conf = isort.Config(settings_path=".")
+
+    skipped = _formatting.check_file("skipped.py", black_conf, isort_conf)
+
+    assert skipped.tools == ("black",)
+    assert "+print(os, sys)\n" in skipped.diff
+    assert "+import os\n" not in skipped.diff
+
+
+@pytest.mark.usefixtures("project")
+def test_main(capsys: pytest.CaptureFixture[str]) -> None:
+    """Test the exit code and output of the script."""
+    check = ["--black-option=--check", "--isort-option=--check"]
+    assert _formatting.main([*check, "good.py"]) == 0
+    assert _formatting.main([*check, "--workers=4", "good.py", "both.py"]) == 1
+    assert "would reformat both.py (isort, black)" in capsys.readouterr().err
+    assert _formatting.main([*check, "good.py", "invalid.py"]) == 123
+
+
+def test_main_unsupported(project: pathlib.Path) -> None:
+    """Test that the tools are run separately if the options are not supported."""
+    (project / "pyproject.toml").write_text(
+        "[tool.black]\nskip-source-first-line = 1\n"
+    )
+    with mock.patch("subprocess.run") as run:
+        run.return_value.returncode = 0
+        assert _formatting.main(["good.py"]) == 0
+    assert [c.args[0][2] for c in run.call_args_list] == ["black", "isort"]
+
+    with mock.patch("subprocess.run") as run:
+        run.return_value.returncode = 1
+        assert _formatting.main(["--isort-option=--profile=black", "good.py"]) == 1
+
+
+@pytest.mark.parametrize(
+    "options", [["--black-option=--check"], ["--isort-option=--check"], []]
+)
+@pytest.mark.usefixtures("project")
+def test_main_not_checking(options: list[str]) -> None:
+    """Test that the tools are run separately if they could reformat the files."""
+    with mock.patch("subprocess.run") as run:
+        run.return_value.returncode = 0
+        assert _formatting.main([*options, "both.py"]) == 0
+    assert [c.args[0][2] for c in run.call_args_list] == ["black", "isort"]
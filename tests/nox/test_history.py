@@ -0,0 +1,130 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for the history of test runs."""
+
+import pathlib
+
+import pytest
+
+from frequenz.repo.config.nox._history import (
+    HISTORY_SIZE,
+    RunHistory,
+    TestReport,
+    merge_junit,
+    read_junit,
+)
+
+_JUNIT = """\
+<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" errors="0" failures="1" skipped="1" tests="4">
+<testcase classname="tests.test_a.TestX" name="test_in_class" file="tests/test_a.py"
+    time="0.5" />
+<testcase classname="tests.test_a" name="test_p[1]" file="tests/test_a.py" time="1.0" />
+<testcase classname="tests.test_a" name="test_p[2]" file="tests/test_a.py" time="2.0">
+    <failure message="assert 2 == 1">boom</failure>
+</testcase>
+<testcase classname="tests.test_b" name="test_skip" file="tests/test_b.py" time="0">
+    <skipped type="pytest.skip" message="no">skipped</skipped>
+</testcase>
+</testsuite></testsuites>
+"""
+
+
+def test_read_junit(tmp_path: pathlib.Path) -> None:
+    """Test that node IDs and outcomes are read from JUnit reports."""
+    junit = tmp_path / "junit.xml"
+    junit.write_text(_JUNIT)
+
+    assert read_junit(junit) == [
+        TestReport(
+            nodeid="tests/test_a.py::TestX::test_in_class",
+            duration=0.5,
+            outcome="passed",
+        ),
+        TestReport(nodeid="tests/test_a.py::test_p[1]", duration=1.0, outcome="passed"),
+        TestReport(nodeid="tests/test_a.py::test_p[2]", duration=2.0, outcome="failed"),
+        TestReport(
+            nodeid="tests/test_b.py::test_skip", duration=0.0, outcome="skipped"
+        ),
+    ]
+    assert not read_junit(tmp_path / "missing.xml")
+
+
+def test_merge_junit(tmp_path: pathlib.Path) -> None:
+    """Test that merged reports include the tests of all reports."""
+    junits = [tmp_path / "1.xml", tmp_path / "2.xml", tmp_path / "missing.xml"]
+    junits[0].write_text(_JUNIT)
+    junits[1].write_text(_JUNIT.replace("tests/test_b.py", "tests/test_c.py"))
+
+    merge_junit(junits, tmp_path / "merged.xml")
+
+    assert len(read_junit(tmp_path / "merged.xml")) == 8
+
+
+def test_history_durations(tmp_path: pathlib.Path) -> None:
+    """Test that durations are stored and summed by file."""
+    junit = tmp_path / "junit.xml"
+    junit.write_text(_JUNIT)
+    history = RunHistory(tmp_path / "history.json")
+    history.update(read_junit(junit))
+    history.save()
+
+    history = RunHistory(tmp_path / "history.json")
+    assert history.file_durations(
+        ["tests/test_a.py", "tests/test_b.py", "tests/test_new.py"]
+    ) == {"tests/test_a.py": 3.5, "tests/test_b.py": 0.0, "tests/test_new.py": None}
+
+
+def test_history_invalid(tmp_path: pathlib.Path) -> None:
+    """Test that an invalid history file is ignored."""
+    (tmp_path / "history.json").write_text("[]")
+    assert not RunHistory(tmp_path / "history.json").durations
+
+
+def test_history_outcomes_and_trend(tmp_path: pathlib.Path) -> None:
+    """Test that outcomes and the recent durations are recorded."""
+    history = RunHistory(tmp_path / "history.json")
+    for i in range(HISTORY_SIZE + 2):
+        history.update(
+            [
+                TestReport(nodeid="t.py::slow", duration=10.0 + i, outcome="passed"),
+                TestReport(nodeid="t.py::fast", duration=0.1, outcome="failed"),
+                TestReport(nodeid="t.py::skip", duration=0.0, outcome="skipped"),
+            ]
+        )
+    history.update([TestReport(nodeid="t.py::fast", duration=0.2, outcome="passed")])
+    history.save()
+
+    history = RunHistory(tmp_path / "history.json")
+    assert history.recent_durations("t.py::slow") == [
+        float(10 + i) for i in range(2, HISTORY_SIZE + 2)
+    ]
+    assert history.recent_durations("t.py::skip") == [0.0]
+    assert not history.recent_durations("t.py::unknown")
+    assert not history.failed
+    assert history.slowest(2) == ["t.py::slow", "t.py::fast"]
+    assert history.slowest(2, among=["t.py::fast", "t.py::skip"]) == [
+        "t.py::fast",
+        "t.py::skip",
+    ]
+
+    history.update([TestReport(nodeid="t.py::skip", duration=0.0, outcome="failed")])
+    assert history.failed == ["t.py::skip"]
+
+
+@pytest.mark.parametrize(
+    "contents", ["", '{"durations": {"t.py::test": 1.5}}', '{"tests": {"t": 1}}']
+)
+def test_history_unreadable_is_overwritten(
+    tmp_path: pathlib.Path, contents: str
+) -> None:
+    """Test that unreadable histories are ignored and overwritten when saving."""
+    (tmp_path / "history.json").write_text(contents)
+    history = RunHistory(tmp_path / "history.json")
+    assert not history.durations
+    assert not history.failed
+
+    history.update([TestReport(nodeid="t.py::test", duration=0.5, outcome="passed")])
+    history.save()
+    assert RunHistory(tmp_path / "history.json").durations == {"t.py::test": 0.5}
@@ -0,0 +1,112 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for the selection of the tests affected by changes."""
+
+import json
+import pathlib
+
+import pytest
+
+from frequenz.repo.config.nox._impact import ImportGraph, module_name, select_tests
+
+_FILES = {
+    "src/pkg/__init__.py": "",
+    "src/pkg/core.py": "VALUE = 1\n",
+    "src/pkg/api.py": "from .core import VALUE\n",
+    "src/pkg/sub/__init__.py": "from .. import api\n",
+    "src/pkg/other.py": "import json\n",
+    "tests/__init__.py": "",
+    "tests/test_api.py": "from pkg import api\n",
+    "tests/test_sub.py": "def test() -> None:\n    import pkg.sub\n",
+    "tests/test_other.py": "from pkg.other import json\n",
+    "tests/test_helper.py": "from tests import helper\n",
+    "tests/helper.py": "",
+}
+
+
+@pytest.fixture
+def project(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> pathlib.Path:
+    """Create a project with some modules and tests.
+
+    Args:
+        tmp_path: The temporary directory to create the project in.
+        monkeypatch: The fixture to change the working directory.
+
+    Returns:
+        The project directory.
+    """
+    for name, content in _FILES.items():
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text(content)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _select(*changed: str) -> list[str] | None:
+    return select_tests(
+        map(pathlib.Path, changed),
+        source_paths=["src"],
+        test_paths=["src", "tests"],
+        config_files=[".flake8"],
+        cache_file=pathlib.Path("cache.json"),
+    ).tests
+
+
+@pytest.mark.usefixtures("project")
+def test_module_name() -> None:
+    """Test that module names are calculated like Python and pytest import them."""
+    assert module_name(pathlib.Path("src/pkg/core.py"), ["src"]) == "pkg.core"
+    assert module_name(pathlib.Path("src/pkg/__init__.py"), ["src"]) == "pkg"
+    assert module_name(pathlib.Path("tests/helper.py"), ["src"]) == "tests.helper"
+    assert module_name(pathlib.Path("noxfile.py"), ["src"]) == "noxfile"
+
+
+@pytest.mark.usefixtures("project")
+def test_select_transitive() -> None:
+    """Test that tests importing changed modules indirectly are selected."""
+    assert _select("src/pkg/core.py") == [
+        "src/pkg/api.py",
+        "src/pkg/core.py",
+        "src/pkg/sub/__init__.py",
+        "tests/test_api.py",
+        "tests/test_sub.py",
+    ]
+    assert _select("src/pkg/other.py") == ["src/pkg/other.py", "tests/test_other.py"]
+    assert _select("tests/helper.py") == ["tests/helper.py", "tests/test_helper.py"]
+    assert _select("tests/test_api.py") == ["tests/test_api.py"]
+    assert not _select("noxfile.py", "src/pkg/deleted.py")
+
+
+@pytest.mark.usefixtures("project")
+def test_select_all() -> None:
+    """Test that all tests are selected if the impact of a change can't be known."""
+    assert _select("src/pkg/core.py", "tests/conftest.py") is None
+    assert _select("pyproject.toml") is None
+    assert _select(".flake8") is None
+    assert _select("src/pkg/data.json") is None
+
+
+def test_cache(project: pathlib.Path) -> None:
+    """Test that cached imports are used only for files that didn't change."""
+    files = [pathlib.Path(f) for f in _FILES]
+    cache = project / "cache.json"
+    changed = [pathlib.Path("src/pkg/other.py")]
+    ImportGraph(files, ["src"], cache_file=cache)
+
+    # Tamper the cache to check it is used for files with the same contents
+    data = json.loads(cache.read_text())
+    data["files"]["tests/helper.py"]["imports"] = ["pkg", "pkg.other"]
+    cache.write_text(json.dumps(data))
+    (project / "tests/test_other.py").write_text("import pkg.api\n")
+
+    assert ImportGraph(files, ["src"], cache_file=cache).dependents(changed) == {
+        pathlib.Path("src/pkg/other.py"),
+        pathlib.Path("tests/helper.py"),
+        pathlib.Path("tests/test_helper.py"),
+    }
+
+    cache.write_text("invalid")
+    assert ImportGraph(files, ["src"], cache_file=cache).dependents(changed) == {
+        pathlib.Path("src/pkg/other.py")
+    }
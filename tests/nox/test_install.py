@@ -0,0 +1,341 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for installing packages in the session virtualenvs."""
+
+# pylint: disable=protected-access
+
+import pathlib
+from unittest import mock
+
+import pytest
+
+import nox
+import nox.command
+import nox.virtualenv
+from frequenz.repo.config.nox import _cache, _install
+from frequenz.repo.config.nox import config as _config
+from frequenz.repo.config.nox import util as _util
+
+
+def _make_session(venv: pathlib.Path) -> mock.MagicMock:
+    session = mock.MagicMock(spec=nox.Session)
+    session.virtualenv.location = str(venv)
+    session.bin = str(venv / "bin")
+    session._runner.global_config.no_install = False
+    return session
+
+
+def test_install_with_uv(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    """Test that packages are installed with uv if it is configured."""
+    monkeypatch.setattr(
+        _config, "_config", _config.Config(installer="uv", install_cache_dir="cache")
+    )
+    monkeypatch.setattr("shutil.which", lambda *_, **__: "/bin/uv")
+    session = _make_session(tmp_path)
+
+    _install.install(session, "-e", ".[dev]")
+
+    session.install.assert_not_called()
+    session.run.assert_called_once()
+    args, kwargs = session.run.call_args
+    assert args == (
+        "/bin/uv",
+        "pip",
+        "install",
+        "--python",
+        str(tmp_path / "bin" / "python"),
+        "-e",
+        ".[dev]",
+    )
+    assert kwargs["env"]["UV_CACHE_DIR"] == str(pathlib.Path("cache").absolute())
+
+
+def test_install_falls_back_to_pip(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    """Test that pip is used if uv is configured but not available."""
+    monkeypatch.setattr(_config, "_config", _config.Config(installer="uv"))
+    monkeypatch.setattr("shutil.which", lambda *_, **__: None)
+    session = _make_session(tmp_path)
+
+    _install.install(session, "-e", ".[dev]")
+
+    session.warn.assert_called_once()
+    session.install.assert_called_once_with("-e", ".[dev]", env={})
+
+
+def test_install_skips_unchanged(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    """Test that installs are skipped when the fingerprint didn't change."""
+    monkeypatch.setattr(
+        _config, "_config", _config.Config(skip_unchanged_installs=True)
+    )
+    session = _make_session(tmp_path)
+
+    _install.install(session, "-e", ".[dev]")
+    _install.install(session, "-e", ".[dev]")
+    _install.install(session, "-e", ".[dev-mypy]")
+
+    assert [c.args for c in session.install.call_args_list] == [
+        ("-e", ".[dev]"),
+        ("-e", ".[dev-mypy]"),
+    ]
+
+
+def test_install_no_install_keeps_fingerprint(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    """Test that skipped installs with `--no-install` are not recorded as done."""
+    monkeypatch.setattr(
+        _config, "_config", _config.Config(skip_unchanged_installs=True)
+    )
+    session = _make_session(tmp_path)
+    session._runner.global_config.no_install = True
+    session._runner.venv._reused = True
+
+    _install.install(session, "-e", ".[dev]")
+
+    session.install.assert_not_called()
+    assert not (tmp_path / _cache.INSTALL_FINGERPRINT_FILE).exists()
+
+    session._runner.global_config.no_install = False
+    _install.install(session, "-e", ".[dev]")
+
+    session.install.assert_called_once_with("-e", ".[dev]", env={})
+    assert (tmp_path / _cache.INSTALL_FINGERPRINT_FILE).exists()
+
+
+def _make_group_session(name: str, nox_dir: pathlib.Path) -> mock.MagicMock:
+    session = _make_session(nox_dir / name)
+    session.name = name
+    session.python = None
+    session._runner.venv = nox.virtualenv.VirtualEnv(str(nox_dir / name))
+    # Like in nox, the session virtualenv is the one of its runner
+    type(session).virtualenv = mock.PropertyMock(
+        side_effect=lambda: session._runner.venv
+    )
+    return session
+
+
+@pytest.fixture
+def created_venvs(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Record the virtualenvs created, without really creating them.
+
+    Args:
+        monkeypatch: The fixture to patch the virtualenv creation.
+
+    Returns:
+        The locations of the virtualenvs created, in creation order.
+    """
+    created: list[str] = []
+
+    def create(self: nox.virtualenv.VirtualEnv) -> bool:
+        pathlib.Path(self.location).mkdir(parents=True, exist_ok=True)
+        created.append(self.location)
+        return True
+
+    monkeypatch.setattr(nox.virtualenv.VirtualEnv, "create", create)
+    monkeypatch.setattr(_install, "_created_group_venvs", set())
+    monkeypatch.setattr(
+        _config,
+        "_config",
+        _config.Config(session_groups={"lint": ["formatting", "flake8", "pylint"]}),
+    )
+    return created
+
+
+def test_install_session_group(
+    created_venvs: list[str], tmp_path: pathlib.Path
+) -> None:
+    """Test that sessions in a group share a virtualenv, installed only once."""
+    flake8 = _make_group_session("flake8", tmp_path)
+
+    _install.install(flake8, "-e", ".[dev-flake8]")
+
+    group_location = str(tmp_path / "group-lint")
+    assert flake8._runner.venv.location == group_location
+    assert not flake8._runner.venv.reuse_existing
+    assert flake8._runner.venv.env["NOX_CURRENT_SESSION"] == "flake8"
+    flake8.install.assert_called_once_with(
+        "-e", ".[dev-flake8,dev-formatting,dev-pylint]", env={}
+    )
+
+    pylint = _make_group_session("pylint", tmp_path)
+
+    _install.install(pylint, "-e", ".[dev-pylint]")
+
+    assert pylint._runner.venv.location == group_location
+    assert pylint._runner.venv.reuse_existing
+    pylint.install.assert_not_called()
+    assert created_venvs == [group_location, group_location]
+
+
+def test_install_session_not_in_group(
+    created_venvs: list[str], tmp_path: pathlib.Path
+) -> None:
+    """Test that sessions that are not in a group keep their virtualenv."""
+    mypy = _make_group_session("mypy", tmp_path)
+
+    _install.install(mypy, "-e", ".[dev-mypy]")
+
+    assert mypy._runner.venv.location == str(tmp_path / "mypy")
+    mypy.install.assert_called_once_with("-e", ".[dev-mypy]", env={})
+    assert not created_venvs
+
+
+def test_install_session_group_unsupported_nox(
+    created_venvs: list[str], tmp_path: pathlib.Path
+) -> None:
+    """Test that a clear error is raised if the session virtualenv can't be changed."""
+    flake8 = _make_group_session("flake8", tmp_path)
+    venv = flake8._runner.venv
+    type(flake8).virtualenv = mock.PropertyMock(return_value=venv)
+    flake8._runner = mock.MagicMock(spec=[])
+    flake8.error.side_effect = RuntimeError("session error")
+
+    with pytest.raises(RuntimeError, match="session error"):
+        _install.install(flake8, "-e", ".[dev-flake8]")
+
+    assert "doesn't support changing the virtualenv" in flake8.error.call_args.args[0]
+    assert not created_venvs
+
+
+_MIN_DEPS = ["-e", ".[dev-pytest]", "typing-extensions==4.5.0"]
+
+
+@pytest.fixture
+def min_deps_project(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> pathlib.Path:
+    """Create a project with minimum dependencies and use it as working directory.
+
+    Args:
+        monkeypatch: The fixture to patch the dependencies and working directory.
+        tmp_path: The directory where to create the project.
+
+    Returns:
+        The virtualenv of the session, with a `pyvenv.cfg` file.
+    """
+    monkeypatch.setattr(_config, "_config", _config.Config())
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(_util, "min_dependencies", lambda: _MIN_DEPS[2:])
+    monkeypatch.setattr(_util, "build_dependencies", lambda: ["setuptools==68.1.0"])
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'test'\n")
+    venv = tmp_path / ".nox" / "pytest_min"
+    venv.mkdir(parents=True)
+    (venv / "pyvenv.cfg").write_text("version_info = 3.11.4.final.0\n")
+    return venv
+
+
+def _make_min_deps_session(venv: pathlib.Path, frozen: str) -> mock.MagicMock:
+    session = _make_session(venv)
+
+    def run(*args: str, **_: object) -> str | None:
+        return frozen if "freeze" in args else None
+
+    session.run.side_effect = run
+    return session
+
+
+def _lock_dirs() -> list[pathlib.Path]:
+    return sorted(_install.MIN_DEPS_LOCK_DIRECTORY.iterdir())
+
+
+def test_min_deps_lock_created_and_reused(min_deps_project: pathlib.Path) -> None:
+    """Test that the lock is created the first time, and then installed offline."""
+    session = _make_min_deps_session(min_deps_project, "typing-extensions==4.5.0\n")
+
+    _install.install_min_deps_locked(session)
+
+    session.install.assert_called_once_with(*_MIN_DEPS, env={})
+    (lock_dir,) = _lock_dirs()
+    wheels = str(lock_dir / "wheels")
+    constraints = lock_dir / "constraints.txt"
+    assert constraints.read_text() == "typing-extensions==4.5.0\n"
+    # The lock is created in a temporary directory that is renamed when complete
+    tmp_dir = lock_dir.with_name(f"{lock_dir.name}.tmp")
+    assert [c.args[3:] for c in session.run.call_args_list] == [
+        ("freeze", "--exclude-editable"),
+        (
+            "download",
+            "--dest",
+            str(tmp_dir / "wheels"),
+            "--no-deps",
+            "--requirement",
+            str(tmp_dir / "constraints.txt"),
+        ),
+        ("download", "--dest", str(tmp_dir / "wheels"), "setuptools==68.1.0", "wheel"),
+    ]
+
+    session = _make_min_deps_session(min_deps_project, "")
+
+    _install.install_min_deps_locked(session)
+
+    session.install.assert_called_once_with(
+        "--no-index",
+        "--find-links",
+        wheels,
+        "--constraint",
+        str(constraints),
+        *_MIN_DEPS,
+        env={},
+    )
+    session.run.assert_not_called()
+    assert _lock_dirs() == [lock_dir]
+
+
+@pytest.mark.parametrize("changed", ["pyproject.toml", "pyvenv.cfg"])
+def test_min_deps_lock_key(min_deps_project: pathlib.Path, changed: str) -> None:
+    """Test that a new lock is created if the project or the virtualenv change."""
+    _install.install_min_deps_locked(
+        _make_min_deps_session(min_deps_project, "typing-extensions==4.5.0\n")
+    )
+    (old_lock_dir,) = _lock_dirs()
+
+    if changed == "pyproject.toml":
+        (pathlib.Path.cwd() / "pyproject.toml").write_text(
+            "[project]\nname = 'other'\n"
+        )
+    else:
+        (min_deps_project / "pyvenv.cfg").write_text("version_info = 3.12.1\n")
+    session = _make_min_deps_session(min_deps_project, "typing-extensions==4.6.0\n")
+    _install.install_min_deps_locked(session)
+
+    session.install.assert_called_once_with(*_MIN_DEPS, env={})
+    (new_lock_dir,) = set(_lock_dirs()) - {old_lock_dir}
+    assert (new_lock_dir / "constraints.txt").read_text() == (
+        "typing-extensions==4.6.0\n"
+    )
+
+
+def test_min_deps_lock_recreated_after_failure(
+    min_deps_project: pathlib.Path,
+) -> None:
+    """Test that the lock is discarded and created again if installing it fails."""
+    _install.install_min_deps_locked(
+        _make_min_deps_session(min_deps_project, "typing-extensions==4.5.0\n")
+    )
+    (lock_dir,) = _lock_dirs()
+    (lock_dir / "wheels" / "stale.whl").write_text("")
+
+    session = _make_min_deps_session(min_deps_project, "typing-extensions==4.5.1\n")
+
+    def install(*args: str, **_: object) -> None:
+        if "--no-index" in args:
+            raise nox.command.CommandFailed("Returned code 1")
+
+    session.install.side_effect = install
+
+    _install.install_min_deps_locked(session)
+
+    session.warn.assert_called_once()
+    locked, unlocked = session.install.call_args_list
+    assert locked.args[0] == "--no-index"
+    assert unlocked.args == tuple(_MIN_DEPS)
+    assert _lock_dirs() == [lock_dir]
+    assert not (lock_dir / "wheels" / "stale.whl").exists()
+    assert (lock_dir / "constraints.txt").read_text() == "typing-extensions==4.5.1\n"
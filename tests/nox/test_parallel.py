@@ -0,0 +1,111 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for running nox session steps concurrently."""
+
+import os
+import sys
+from unittest import mock
+
+import nox
+from frequenz.repo.config.nox import _parallel
+
+
+def _make_session() -> mock.MagicMock:
+    session = mock.MagicMock(spec=nox.Session)
+    session.env = dict(os.environ)
+    return session
+
+
+def _python(session: nox.Session, code: str) -> None:
+    session.run(sys.executable, "-c", code)
+
+
+def test_outputs_are_buffered_in_order() -> None:
+    """Test that the output of each step is kept whole and the order is preserved."""
+    session = _make_session()
+
+    results = _parallel.run_steps(
+        session,
+        [
+            ("slow", lambda s: _python(s, "import time; time.sleep(0.3); print('a')")),
+            ("fast", lambda s: _python(s, "print('b'); print('c')")),
+        ],
+    )
+
+    assert [r.name for r in results] == ["slow", "fast"]
+    assert all(r.ok for r in results)
+    assert results[0].output.endswith("a\n")
+    assert results[1].output.endswith("b\nc\n")
+    _parallel.check_results(session, results)
+    session.error.assert_not_called()
+
+
+def test_fail_fast_cancels_other_steps() -> None:
+    """Test that with fail-fast a failure cancels the steps still running."""
+    session = _make_session()
+
+    results = _parallel.run_steps(
+        session,
+        [
+            ("slow", lambda s: _python(s, "import time; time.sleep(30)")),
+            ("fail", lambda s: _python(s, "raise SystemExit(3)")),
+        ],
+        fail_fast=True,
+    )
+
+    assert results[0].cancelled
+    assert results[0].duration < 30
+    assert results[1].error == "Returned code 3"
+    _parallel.check_results(session, results)
+    session.error.assert_called_once()
+
+
+def test_run_all_keeps_running() -> None:
+    """Test that without fail-fast all steps run to completion."""
+    session = _make_session()
+
+    results = _parallel.run_steps(
+        session,
+        [
+            ("fail", lambda s: _python(s, "raise SystemExit(1)")),
+            ("slow", lambda s: _python(s, "import time; time.sleep(0.3)")),
+        ],
+        fail_fast=False,
+    )
+
+    assert not results[0].ok
+    assert results[1].ok
+
+
+def test_silent_run_returns_output() -> None:
+    """Test that silent runs return the output instead of buffering it."""
+    session = _make_session()
+    outputs: list[object] = []
+
+    results = _parallel.run_steps(
+        session,
+        [
+            (
+                "silent",
+                lambda s: outputs.append(
+                    s.run(sys.executable, "-c", "print('x')", silent=True)
+                ),
+            ),
+        ],
+    )
+
+    assert outputs == ["x\n"]
+    assert "x\n" not in results[0].output
+
+
+def test_partition_balances_weights() -> None:
+    """Test that items are split in groups with a similar total weight."""
+    weights = {"a": 5.0, "b": 4.0, "c": 3.0, "d": 3.0, "e": 2.0, "f": 1.0}
+
+    groups = _parallel.partition(weights, 3)
+
+    assert sorted(sum(weights[i] for i in group) for group in groups) == [6, 6, 6]
+    assert sorted(i for group in groups for i in group) == sorted(weights)
+    assert _parallel.partition(weights, 10) == [[i] for i in weights]
+    assert not _parallel.partition({}, 2)
@@ -0,0 +1,116 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for profiling the tools used by the sessions."""
+
+import collections
+import pathlib
+import pstats
+import sys
+from unittest import mock
+
+import pytest
+
+import nox
+from frequenz.repo.config.nox import _profile, _profiled
+from frequenz.repo.config.nox import config as _config
+
+
+def test_profiled(
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Test that the profile is saved and the exit code preserved."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", list(sys.argv))
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    (tmp_path / "slow_tool.py").write_text(
+        "import sys\n\ndef slow_function():\n    return sum(range(10000))\n\n"
+        "if __name__ == '__main__':\n    slow_function()\n    sys.exit(3)\n"
+    )
+    output = tmp_path / "profiles" / "tool.pstats"
+
+    assert (
+        _profiled.main([f"--output={output}", "--top=5", "--", "slow_tool.py", "x"])
+        == 3
+    )
+    profile = pstats.Stats(str(output)).get_stats_profile()
+    assert "slow_function" in profile.func_profiles
+    err = capsys.readouterr().err
+    assert "Top 5 functions by cumulative time" in err
+    assert "Top 5 functions by own time" in err
+
+    output.unlink()
+    assert _profiled.main([f"--output={output}", "--", "-m", "slow_tool"]) == 3
+    assert output.exists()
+
+
+def test_profiler_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the profiler is read from the environment."""
+    monkeypatch.delenv("FREQUENZ_NOX_PROFILE", raising=False)
+    assert _config.Config().profile is None
+    monkeypatch.setenv("FREQUENZ_NOX_PROFILE", "1")
+    assert _config.Config().profile == "cprofile"
+    monkeypatch.setenv("FREQUENZ_NOX_PROFILE", "py-spy")
+    assert _config.Config().profile == "py-spy"
+    monkeypatch.setenv("FREQUENZ_NOX_PROFILE", "perf")
+    with pytest.raises(ValueError, match="FREQUENZ_NOX_PROFILE"):
+        _config.Config()
+
+
+def test_run(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that only Python tools are run under the profiler."""
+    monkeypatch.setattr(_profile, "_runs", collections.Counter())
+    session = mock.MagicMock(spec=nox.Session)
+    session.name = "lint"
+
+    monkeypatch.setattr(_config, "_config", _config.Config(profile=None))
+    _profile.run(session, "pylint", "src")
+    session.run.assert_called_once_with("pylint", "src")
+
+    monkeypatch.setattr(
+        _config, "_config", _config.Config(profile="cprofile", profile_top=7)
+    )
+    session.reset_mock()
+    _profile.run(session, "pylint", "src", env={"A": "1"})
+    _profile.run(session, "python", "-m", "coverage", "run", "-m", "pytest")
+    _profile.run(session, "python", "script.py")
+    _profile.run(session, "git", "status")
+    _profile.run(session, "python", "-c", "print()")
+    script = str(_profile.PROFILED_SCRIPT)
+    assert session.run.call_args_list == [
+        mock.call(
+            "python",
+            script,
+            "--output=.nox/profiles/lint-pylint-1.pstats",
+            "--top=7",
+            "--",
+            "-m",
+            "pylint",
+            "src",
+            env={"A": "1"},
+        ),
+        mock.call(
+            "python",
+            script,
+            "--output=.nox/profiles/lint-coverage-1.pstats",
+            "--top=7",
+            "--",
+            "-m",
+            "coverage",
+            "run",
+            "-m",
+            "pytest",
+        ),
+        mock.call(
+            "python",
+            script,
+            "--output=.nox/profiles/lint-script-1.pstats",
+            "--top=7",
+            "--",
+            "script.py",
+        ),
+        mock.call("git", "status"),
+        mock.call("python", "-c", "print()"),
+    ]
@@ -0,0 +1,108 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for running pylint in shards."""
+
+import json
+import pathlib
+
+import pytest
+
+from frequenz.repo.config.nox import _pylint
+from frequenz.repo.config.nox._parallel import StepResult
+
+
+def test_shards_keep_packages_together(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that files in the same directory end up in the same shard."""
+    monkeypatch.chdir(tmp_path)
+    for package, size in [("a", 100), ("b", 60), ("c", 50)]:
+        (tmp_path / "pkg" / package).mkdir(parents=True)
+        (tmp_path / "pkg" / package / "__init__.py").write_text("")
+        (tmp_path / "pkg" / package / "mod.py").write_text("#" * size)
+
+    shards = _pylint.shards(["pkg"], 2)
+
+    assert sorted(sorted(shard) for shard in shards) == [
+        ["pkg/a/__init__.py", "pkg/a/mod.py"],
+        ["pkg/b/__init__.py", "pkg/b/mod.py", "pkg/c/__init__.py", "pkg/c/mod.py"],
+    ]
+
+
+def test_module_files_follow_packages(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that directories that are not packages are skipped inside packages."""
+    monkeypatch.chdir(tmp_path)
+    for file in [
+        "tests/__init__.py",
+        "tests/test_a.py",
+        "tests/sub/__init__.py",
+        "tests/sub/test_b.py",
+        "tests/integration/test_c.py",
+        "scripts/tool.py",
+        "scripts/nested/other.py",
+    ]:
+        (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / file).write_text("")
+
+    assert sorted(map(str, _pylint.module_files(["tests", "scripts"]))) == [
+        "scripts/nested/other.py",
+        "scripts/tool.py",
+        "tests/__init__.py",
+        "tests/sub/__init__.py",
+        "tests/sub/test_b.py",
+        "tests/test_a.py",
+    ]
+
+
+def test_reports_are_merged(tmp_path: pathlib.Path) -> None:
+    """Test that messages are deduplicated, sorted and formatted."""
+
+    def message(path: str, line: int, symbol: str) -> dict[str, object]:
+        return {
+            "type": "convention",
+            "module": path.removesuffix(".py"),
+            "obj": "",
+            "line": line,
+            "column": 0,
+            "path": path,
+            "symbol": symbol,
+            "message": f"Bad {symbol}",
+            "message-id": "C0000",
+        }
+
+    reports = [tmp_path / "1.json", tmp_path / "2.json", tmp_path / "missing.json"]
+    reports[0].write_text(
+        json.dumps([message("b.py", 1, "x"), message("a.py", 2, "y")])
+    )
+    reports[1].write_text(
+        json.dumps([message("a.py", 2, "y"), message("a.py", 1, "z")])
+    )
+
+    messages = _pylint.read_reports(reports)
+
+    assert _pylint.format_messages(messages).splitlines() == [
+        "************* Module a",
+        "a.py:1:0: C0000: Bad z (z)",
+        "a.py:2:0: C0000: Bad y (y)",
+        "************* Module b",
+        "b.py:1:0: C0000: Bad x (x)",
+    ]
+
+
+def test_exit_codes_are_combined() -> None:
+    """Test that the exit code is the combination of the pylint bit masks."""
+
+    def result(error: str | None) -> StepResult:
+        return StepResult(name="pylint", output="", duration=0.0, error=error)
+
+    assert _pylint.exit_code([result(None), result(None)]) == 0
+    assert (
+        _pylint.exit_code(
+            [result("Returned code 16"), result(None), result("Returned code 4")]
+        )
+        == 20
+    )
+    assert _pylint.exit_code([result("Something odd"), result("Returned code 8")]) == 9
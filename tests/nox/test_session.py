@@ -0,0 +1,550 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for the predefined nox sessions helpers."""
+
+# pylint: disable=protected-access
+
+import pathlib
+from collections.abc import Callable
+from unittest import mock
+
+import pytest
+
+import nox
+from frequenz.repo.config.nox import _cache, _history, _parallel
+from frequenz.repo.config.nox import config as _config
+from frequenz.repo.config.nox import session as _session
+
+
+def _make_session(venv: pathlib.Path) -> mock.MagicMock:
+    session = mock.MagicMock(spec=nox.Session)
+    session.virtualenv.location = str(venv)
+    return session
+
+
+@pytest.mark.parametrize(
+    "config, version",
+    [
+        ("home = /usr\nversion_info = 3.12.1.final.0\n", (3, 12)),
+        ("home = /usr\nversion = 3.11.4\n", (3, 11)),
+        ("home = /usr\n", None),
+    ],
+)
+def test_venv_python_version(
+    tmp_path: pathlib.Path, config: str, version: tuple[int, int] | None
+) -> None:
+    """Test that the Python version is read from the virtualenv configuration."""
+    (tmp_path / "pyvenv.cfg").write_text(config)
+    assert _session._venv_python_version(_make_session(tmp_path)) == version
+
+
+@pytest.mark.parametrize(
+    "black, isort, marked",
+    [
+        (["--check"], ["--diff", "--check"], True),
+        (["--check"], [], False),
+        ([], ["--check-only"], False),
+    ],
+)
+def test_formatting_marks_clean_only_when_checking(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: pathlib.Path,
+    black: list[str],
+    isort: list[str],
+    marked: bool,
+) -> None:
+    """Test that files reformatted by black or isort are not recorded as clean."""
+    opts = _config.CommandsOptions(black=black, isort=isort)
+    monkeypatch.setattr(_config, "_config", _config.Config(opts=opts))
+    cache = mock.MagicMock(spec=_cache.CheckCache)
+    monkeypatch.setattr(
+        _session, "_skip_cached", lambda *_, **__: (["src/mod.py"], cache)
+    )
+    session = _make_session(tmp_path)
+
+    _session.formatting(session, False)
+
+    assert [c.args[0] for c in session.run.call_args_list] == ["black", "isort"]
+    assert cache.mark_clean.called == marked
+
+
+def _install_fake_mypy(venv: pathlib.Path, version: str) -> None:
+    site_packages = venv / "lib" / "python3.11" / "site-packages"
+    for dist_info in site_packages.glob("mypy-*.dist-info"):
+        (dist_info / "METADATA").unlink()
+        dist_info.rmdir()
+    dist_info = site_packages / f"mypy-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: mypy\nVersion: {version}\n"
+    )
+
+
+def _dmypy_commands(session: mock.MagicMock) -> list[tuple[str, str]]:
+    """Get the status file name and dmypy command of each run.
+
+    Args:
+        session: The mocked session.
+
+    Returns:
+        The status file name and the dmypy command of each run.
+    """
+    return [
+        (pathlib.Path(c.args[2]).name, c.args[3]) for c in session.run.call_args_list
+    ]
+
+
+@pytest.mark.parametrize("change", [None, "version", "options", "config"])
+def test_dmypy_run_restarts_on_changes(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path, change: str | None
+) -> None:
+    """Test that the daemon is restarted only when something affecting it changed."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text("[tool.mypy]\n")
+    monkeypatch.setattr(
+        _config, "_config", _config.Config(config_files=["pyproject.toml"])
+    )
+    venv = tmp_path / ".nox" / "mypy"
+    _install_fake_mypy(venv, "1.5.0")
+    session = _make_session(venv)
+
+    _session._dmypy_run(session, "sources", ["--strict"])
+    # The daemon creates the status file when it starts
+    (venv / "dmypy-sources.json").write_text("{}")
+
+    args = ["--strict"]
+    match change:
+        case "version":
+            _install_fake_mypy(venv, "1.6.0")
+        case "options":
+            args = ["--strict", "--warn-unreachable"]
+        case "config":
+            (tmp_path / "pyproject.toml").write_text("[tool.mypy]\nstrict = true\n")
+    _session._dmypy_run(session, "sources", args)
+
+    restart = [("dmypy-sources.json", "stop")] if change else []
+    assert _dmypy_commands(session) == [
+        ("dmypy-sources.json", "run"),
+        *restart,
+        ("dmypy-sources.json", "run"),
+    ]
+    assert session.run.call_args.args[-len(args) :] == tuple(args)
+
+
+def test_dmypy_run_uses_a_daemon_per_target(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    """Test that each target uses its own daemon, restarted independently."""
+    monkeypatch.setattr(_config, "_config", _config.Config(config_files=[]))
+    monkeypatch.chdir(tmp_path)
+    venv = tmp_path / ".nox" / "mypy"
+    _install_fake_mypy(venv, "1.5.0")
+    session = _make_session(venv)
+
+    _session._dmypy_run(session, "sources", ["src"])
+    _session._dmypy_run(session, "dev", ["tests"])
+    (venv / "dmypy-sources.json").write_text("{}")
+    (venv / "dmypy-dev.json").write_text("{}")
+    _session._dmypy_run(session, "sources", ["src"])
+    _session._dmypy_run(session, "dev", ["tests", "benchmarks"])
+
+    assert _dmypy_commands(session) == [
+        ("dmypy-sources.json", "run"),
+        ("dmypy-dev.json", "run"),
+        ("dmypy-sources.json", "run"),
+        ("dmypy-dev.json", "stop"),
+        ("dmypy-dev.json", "run"),
+    ]
+    assert session.run.call_args_list[0].args[2] == str(venv / "dmypy-sources.json")
+
+
+def test_mypy_daemon_stop(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    """Test that the daemons of all the virtualenvs are stopped."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("sys.platform", "linux")
+    for status_file in ["mypy/dmypy-sources.json", "mypy/dmypy-dev.json", "ci/x.json"]:
+        (tmp_path / ".nox" / status_file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / ".nox" / status_file).write_text("{}")
+    session = _make_session(tmp_path / ".nox" / "mypy_daemon_stop")
+
+    _session.mypy_daemon_stop(session)
+
+    assert sorted(c.args for c in session.run.call_args_list) == [
+        (
+            str(pathlib.Path(".nox", "mypy", "bin", "dmypy")),
+            "--status-file",
+            str(pathlib.Path(".nox", "mypy", name)),
+            "stop",
+        )
+        for name in ["dmypy-dev.json", "dmypy-sources.json"]
+    ]
+    assert all(
+        c.kwargs == {"external": True, "success_codes": [0, 2]}
+        for c in session.run.call_args_list
+    )
+
+
+@pytest.mark.parametrize("whole_set", [True, False])
+def test_skip_cached_whole_set(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path, whole_set: bool
+) -> None:
+    """Test that whole-set results depend on the files that are not checked too."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text("[tool.pylint]\n")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.py").write_text("from b import B\n")
+    (tmp_path / "src" / "b.py").write_text("B = 1\n")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_b.py").write_text("from b import B\n")
+    monkeypatch.setattr(
+        _config,
+        "_config",
+        _config.Config(
+            check_cache=True,
+            config_files=[],
+            source_paths=["src"],
+            extra_paths=["tests"],
+        ),
+    )
+    session = _make_session(tmp_path / ".nox" / "pylint")
+
+    def skip_cached() -> list[str]:
+        paths, cache = _session._skip_cached(
+            session,
+            ["src/a.py"],
+            tool="pylint",
+            distributions=["pylint"],
+            args=[],
+            whole_set=whole_set,
+        )
+        assert cache is not None
+        cache.mark_clean(map(pathlib.Path, paths))
+        return paths
+
+    assert skip_cached() == ["src/a.py"]
+    assert not skip_cached()
+
+    (tmp_path / "src" / "b.py").write_text("B = 2\n")
+    assert skip_cached() == (["src/a.py"] if whole_set else [])
+    (tmp_path / "tests" / "test_b.py").write_text("from b import B as C\n")
+    assert skip_cached() == (["src/a.py"] if whole_set else [])
+    assert not skip_cached()
+
+
+def _write_junit(path: pathlib.Path, tests: dict[str, str]) -> None:
+    """Write a JUnit report like the ones written by pytest.
+
+    Args:
+        path: The file where to write the report.
+        tests: The outcome of each test, by node ID.
+    """
+    cases = []
+    for nodeid, outcome in tests.items():
+        file, name = nodeid.split("::")
+        result = "<failure message='boom'>boom</failure>" if outcome == "failed" else ""
+        cases.append(
+            f'<testcase classname="{file[:-3].replace("/", ".")}" name="{name}" '
+            f'file="{file}" time="0.5">{result}</testcase>'
+        )
+    path.write_text(
+        f"<testsuites><testsuite name='pytest'>{''.join(cases)}</testsuite>"
+        "</testsuites>"
+    )
+
+
+def _run_steps_serially(
+    session: nox.Session,
+    steps: list[tuple[str, Callable[[nox.Session], object]]],
+    *,
+    fail_fast: bool,
+) -> list[_parallel.StepResult]:
+    """Run the steps one after the other, like `_parallel.run_steps()` does.
+
+    Args:
+        session: The nox session.
+        steps: The names and functions of the steps.
+        fail_fast: Whether to cancel the remaining steps if one fails.
+
+    Returns:
+        The results of the steps, all taking 2 seconds.
+    """
+    assert not fail_fast
+    results = []
+    for name, step in steps:
+        try:
+            step(session)
+            error = None
+        except nox.command.CommandFailed as exc:
+            error = str(exc)
+        results.append(
+            _parallel.StepResult(name=name, output="", duration=2.0, error=error)
+        )
+    return results
+
+
+@pytest.fixture
+def tests_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path) -> None:
+    """Create some test files and use the directory as working directory.
+
+    Args:
+        monkeypatch: The fixture to change the working directory and config.
+        tmp_path: The directory where to create the test files.
+    """
+    monkeypatch.setattr(
+        _config,
+        "_config",
+        _config.Config(opts=_config.CommandsOptions(pytest=["-q"]), failed_first=False),
+    )
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "tests").mkdir()
+    for name in ["test_a.py", "test_b.py", "test_c.py"]:
+        (tmp_path / "tests" / name).write_text("")
+
+
+@pytest.mark.usefixtures("tests_dir")
+def test_pytest_shards(tmp_path: pathlib.Path) -> None:
+    """Test that the collected files are split using the durations in the history."""
+    history = _history.RunHistory(tmp_path / "history.json")
+    history.update(
+        [
+            _history.TestReport(
+                nodeid="tests/test_a.py::test_1", duration=3.0, outcome="passed"
+            ),
+            _history.TestReport(
+                nodeid="tests/test_a.py::test_2", duration=1.0, outcome="passed"
+            ),
+            _history.TestReport(
+                nodeid="tests/test_b.py::test_1", duration=1.0, outcome="passed"
+            ),
+        ]
+    )
+    session = _make_session(tmp_path / ".nox" / "pytest_max")
+    session.run.return_value = (
+        "tests/test_a.py::test_1\n"
+        "tests/test_a.py::test_2\n"
+        "tests/test_b.py::TestB::test_1\n"
+        "tests/test_c.py::test_1[x::y]\n"
+        "tests/test_missing.py::test_1\n"
+        "\n"
+        "4 tests collected in 0.01s\n"
+    )
+
+    shards = _session._pytest_shards(session, history, 2, ["tests"])
+
+    session.run.assert_called_once_with(
+        "pytest",
+        "-q",
+        "tests",
+        "--collect-only",
+        "--verbosity=-1",
+        silent=True,
+        success_codes=[0, 5],
+    )
+    # test_c.py has no history, so it is assumed to take the average (2.5s)
+    assert sorted(sorted(s) for s in shards) == [
+        ["tests/test_a.py"],
+        ["tests/test_b.py", "tests/test_c.py"],
+    ]
+
+
+@pytest.mark.usefixtures("tests_dir")
+def test_pytest_shards_collection_error(tmp_path: pathlib.Path) -> None:
+    """Test that no shards are made if the tests can't be collected."""
+    session = _make_session(tmp_path / ".nox" / "pytest_max")
+    session.run.side_effect = nox.command.CommandFailed("Returned code 2")
+
+    shards = _session._pytest_shards(
+        session, _history.RunHistory(tmp_path / "history.json"), 2, []
+    )
+
+    assert not shards
+    session.warn.assert_called_once()
+
+
+@pytest.mark.usefixtures("tests_dir")
+def test_pytest_parallel(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    """Test that the reports of all processes are merged and summarized."""
+    outcomes = {
+        "tests/test_a.py::test_1": "passed",
+        "tests/test_b.py::test_1": "failed",
+        "tests/test_c.py::test_1": "passed",
+    }
+
+    def run(*args: str, **_: object) -> None:
+        junit = next(
+            a.removeprefix("--junitxml=") for a in args if a.startswith("--junitxml=")
+        )
+        tests = {
+            k: v for k, v in outcomes.items() if k.split("::", maxsplit=1)[0] in args
+        }
+        _write_junit(pathlib.Path(junit), tests)
+        if "failed" in tests.values():
+            raise nox.command.CommandFailed("Returned code 1")
+
+    monkeypatch.setattr(_parallel, "run_steps", _run_steps_serially)
+    session = _make_session(tmp_path / ".nox" / "pytest_max")
+    session.run.side_effect = run
+    history = _history.RunHistory(tmp_path / "history.json")
+    report_dir = tmp_path / "report"
+    report_dir.mkdir()
+
+    _session._pytest_parallel(
+        session,
+        history,
+        [["tests/test_a.py", "tests/test_c.py"], ["tests/test_b.py"]],
+        report_dir,
+        None,
+    )
+
+    assert [c.args for c in session.run.call_args_list] == [
+        (
+            "pytest",
+            "-q",
+            *_history.JUNIT_ARGS,
+            f"--junitxml={report_dir / f'junit-{i}.xml'}",
+            *files,
+        )
+        for i, files in enumerate(
+            [["tests/test_a.py", "tests/test_c.py"], ["tests/test_b.py"]]
+        )
+    ]
+    merged = _history.read_junit(report_dir / "junit.xml")
+    assert {r.nodeid: r.outcome for r in merged} == outcomes
+    assert _history.RunHistory(tmp_path / "history.json").failed == [
+        "tests/test_b.py::test_1"
+    ]
+    logs = [c.args[0] for c in session.log.call_args_list]
+    assert "pytest: 2 passed, 1 failed, 0 skipped in 2.0s (4.0s in total)" in logs
+    assert "FAILED tests/test_b.py::test_1" in logs
+    session.error.assert_called_once()
+
+
+def _install_fake_coverage(venv: pathlib.Path) -> None:
+    dist_info = venv / "lib" / "python3.12" / "site-packages" / "coverage.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text(
+        "Metadata-Version: 2.1\nName: coverage\nVersion: 7.4.0\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "python_version, installed, env",
+    [
+        ("3.11.4", True, {}),
+        ("3.12.1", False, {"COVERAGE_CORE": "sysmon"}),
+    ],
+)
+def test_coverage_setup(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: pathlib.Path,
+    python_version: str,
+    installed: bool,
+    env: dict[str, str],
+) -> None:
+    """Test that coverage is installed if needed and the command and env to use."""
+    monkeypatch.setattr(
+        _config,
+        "_config",
+        _config.Config(installer="pip", source_paths=["src", "examples"]),
+    )
+    venv = tmp_path / "venv"
+    venv.mkdir()
+    (venv / "pyvenv.cfg").write_text(f"version = {python_version}\n")
+    if installed:
+        _install_fake_coverage(venv)
+    session = _make_session(venv)
+    session._runner.global_config.no_install = False
+    report_dir = tmp_path / "report"
+    report_dir.mkdir()
+    (report_dir / ".coverage.old").write_text("")
+
+    coverage = _session._Coverage(session, report_dir)
+
+    assert not (report_dir / ".coverage.old").exists()
+    assert [c.args for c in session.run.call_args_list] == (
+        [] if installed else [("python", "-m", "pip", "install", "coverage[toml]")]
+    )
+    assert coverage.env == env
+    assert coverage.command == [
+        "python",
+        "-m",
+        "coverage",
+        "run",
+        "--parallel-mode",
+        f"--data-file={report_dir / '.coverage'}",
+        "--source=src,examples",
+        "-m",
+        "pytest",
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.usefixtures("tests_dir")
+def test_pytest_coverage(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path, workers: int
+) -> None:
+    """Test that the tests run collecting coverage and the reports are written."""
+    (tmp_path / "pyproject.toml").write_text("")
+    monkeypatch.setattr(
+        _config,
+        "_config",
+        _config.Config(
+            coverage=True,
+            pytest_workers=workers,
+            impacted_tests=False,
+            slowest_tests=0,
+            profile=None,
+            failed_first=False,
+        ),
+    )
+    monkeypatch.setattr(_parallel, "run_steps", _run_steps_serially)
+    venv = tmp_path / ".nox" / "pytest_max"
+    venv.mkdir(parents=True)
+    (venv / "pyvenv.cfg").write_text("version = 3.12.1\n")
+    _install_fake_coverage(venv)
+    session = _make_session(venv)
+    session.posargs = []
+    report_dir = pathlib.Path(".nox", ".pytest", "max")
+    data_file = f"--data-file={report_dir / '.coverage'}"
+
+    def run(*args: str, **_: object) -> str | None:
+        if "--collect-only" in args:
+            return "tests/test_a.py::test_1\ntests/test_b.py::test_1\n"
+        if args[:4] == ("python", "-m", "coverage", "run"):
+            (report_dir / f".coverage.{len(list(report_dir.iterdir()))}").touch()
+        return None
+
+    session.run.side_effect = run
+
+    _session._pytest_impl(session, "max")
+
+    calls = session.run.call_args_list
+    test_runs = [c for c in calls if c.args[:4] == ("python", "-m", "coverage", "run")]
+    assert len(test_runs) == workers
+    for test_run in test_runs:
+        assert test_run.args[5] == data_file
+        assert test_run.kwargs["env"] == {"COVERAGE_CORE": "sysmon"}
+    assert [c.args[3] for c in calls[-4:]] == ["combine", "report", "html", "xml"]
+    assert all(data_file in c.args for c in calls[-4:])
+    assert "--directory=.htmlcov-max" in calls[-2].args
+    assert calls[-1].args[-2:] == ("-o", str(report_dir / "coverage.xml"))
+
+
+def test_coverage_report_without_data(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    """Test that no reports are written if no coverage data was collected."""
+    monkeypatch.setattr(_config, "_config", _config.Config())
+    _install_fake_coverage(tmp_path)
+    session = _make_session(tmp_path)
+    coverage = _session._Coverage(session, tmp_path)
+
+    coverage.report("max")
+
+    session.run.assert_not_called()
+    session.warn.assert_called_once_with("No coverage data was collected")
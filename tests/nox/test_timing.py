@@ -0,0 +1,113 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for the timing of nox session steps."""
+
+import json
+import pathlib
+import subprocess
+import sys
+from unittest import mock
+
+import pytest
+
+import nox
+import nox.command
+from frequenz.repo.config.nox import _timing
+from frequenz.repo.config.nox import config as _config
+
+
+def _make_session(name: str = "session") -> mock.MagicMock:
+    session = mock.MagicMock(spec=nox.Session)
+    session.name = name
+    return session
+
+
+def test_recorder_measures_steps(tmp_path: pathlib.Path) -> None:
+    """Test that steps are recorded with their exit code, and reports written."""
+    recorder = _timing.Recorder("test")
+
+    recorder.measure("test/ok", ["ok"], lambda: None)
+    recorder.measure("test/ok", ["ok"], lambda: None)
+
+    def fail() -> None:
+        raise nox.command.CommandFailed("Returned code 3")
+
+    with pytest.raises(nox.command.CommandFailed):
+        recorder.measure("test/fail", ["fail"], fail)
+
+    assert [(s.step, s.exit_code) for s in recorder.steps] == [
+        ("test/ok", 0),
+        ("test/ok#2", 0),
+        ("test/fail", 3),
+    ]
+
+    with mock.patch.object(_timing, "REPORT_DIRECTORY", tmp_path):
+        report = recorder.write_report(tmp_path / "summary.md")
+    data = json.loads(report.read_text(encoding="utf-8"))
+    assert data["session"] == "test"
+    assert [s["command"] for s in data["steps"]] == [["ok"], ["ok"], ["fail"]]
+    summary = (tmp_path / "summary.md").read_text(encoding="utf-8")
+    assert "| `test/fail` |" in summary
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs the resource module")
+def test_recorder_measures_cpu_time() -> None:
+    """Test that the CPU time of child processes is measured."""
+    recorder = _timing.Recorder("test")
+    command = [
+        sys.executable,
+        "-c",
+        "import time\nwhile time.process_time() < 0.2: pass",
+    ]
+
+    recorder.measure("test/busy", command, lambda: subprocess.run(command, check=True))
+
+    steps = recorder.steps
+    assert len(steps) == 1
+    assert steps[0].cpu_time is not None
+    assert steps[0].cpu_time >= 0.1
+
+
+def test_nested_sessions_share_the_report(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that session functions called by other sessions are recorded together."""
+    monkeypatch.setattr(_config, "_config", _config.Config(timing_report=True))
+    monkeypatch.chdir(tmp_path)
+
+    @_timing.timed
+    def inner(session: nox.Session) -> None:
+        session.run("tool", "arg")
+
+    @_timing.timed
+    def outer(session: nox.Session) -> None:
+        session.install("pkg")
+        inner(session)
+
+    outer(_make_session("outer"))
+
+    data = json.loads(
+        (tmp_path / ".nox" / ".timing" / "outer.json").read_text(encoding="utf-8")
+    )
+    assert [(s["step"], s["command"]) for s in data["steps"]] == [
+        ("outer/install", ["install", "pkg"]),
+        ("inner/tool", ["tool", "arg"]),
+    ]
+    assert not (tmp_path / ".nox" / ".timing" / "inner.json").exists()
+
+
+def test_disabled(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that no report is written when timing is disabled."""
+    monkeypatch.setattr(_config, "_config", _config.Config(timing_report=False))
+    monkeypatch.chdir(tmp_path)
+    session = _make_session()
+
+    @_timing.timed
+    def func(session: nox.Session) -> None:
+        session.run("tool")
+
+    func(session)
+
+    session.run.assert_called_once_with("tool")
+    assert not (tmp_path / ".nox").exists()
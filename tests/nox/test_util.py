@@ -0,0 +1,117 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for the nox utilities."""
+
+import json
+import os
+import pathlib
+
+import pytest
+
+from frequenz.repo.config.nox.util import find_toplevel_package_dirs, is_pruned
+
+
+def _make_tree(root: pathlib.Path, files: list[str]) -> None:
+    for name in files:
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).touch()
+
+
+def test_find_toplevel_package_dirs(tmp_path: pathlib.Path) -> None:
+    """Test that only top-level packages are found and pruned directories skipped."""
+    _make_tree(
+        tmp_path,
+        [
+            "src/frequenz/repo/config/__init__.py",
+            "src/frequenz/repo/config/nox/__init__.py",
+            "src/other/__init__.py",
+            "src/namespace/module.py",
+            "src/build/pkg/__init__.py",
+            "src/other.egg-info/pkg/__init__.py",
+            "src/data/file.txt",
+        ],
+    )
+    src = tmp_path / "src"
+
+    assert find_toplevel_package_dirs(src) == [
+        pathlib.Path("frequenz/repo/config"),
+        pathlib.Path("other"),
+    ]
+    assert find_toplevel_package_dirs(src, root=tmp_path) == [
+        pathlib.Path("src/frequenz/repo/config"),
+        pathlib.Path("src/other"),
+    ]
+    assert find_toplevel_package_dirs(src, namespace_packages=True) == [
+        pathlib.Path("frequenz/repo/config"),
+        pathlib.Path("namespace"),
+        pathlib.Path("other"),
+    ]
+    assert find_toplevel_package_dirs(src / "other") == [pathlib.Path(".")]
+    assert not find_toplevel_package_dirs(src / "missing")
+
+
+def test_find_toplevel_package_dirs_index(tmp_path: pathlib.Path) -> None:
+    """Test that directories that didn't change are read from the index."""
+    _make_tree(tmp_path, ["src/a/__init__.py", "src/b/c/__init__.py"])
+    src = tmp_path / "src"
+    index = tmp_path / "index.json"
+    old = 1_000_000_000_000_000_000
+    for directory in [src, src / "a", src / "b", src / "b" / "c"]:
+        os.utime(directory, ns=(old, old))
+
+    expected = [pathlib.Path("a"), pathlib.Path("b/c")]
+    assert find_toplevel_package_dirs(src, index=index) == expected
+
+    # Tamper the index to check it is used for directories that didn't change
+    data = json.loads(index.read_text())
+    data["directories"][str(src / "b")][4] = []
+    index.write_text(json.dumps(data))
+    assert find_toplevel_package_dirs(src, index=index) == [pathlib.Path("a")]
+
+    (src / "b" / "d").mkdir()
+    assert find_toplevel_package_dirs(src, index=index) == expected
+    assert str(src / "b" / "d") in index.read_text()
+
+
+def test_pruned_directories_that_are_packages(tmp_path: pathlib.Path) -> None:
+    """Test that directories with pruned names are searched if they are packages."""
+    _make_tree(
+        tmp_path,
+        [
+            "src/dist/__init__.py",
+            "src/dist/sub/__init__.py",
+            "src/build/pkg/__init__.py",
+            "src/venv/__init__.py",
+        ],
+    )
+    src = tmp_path / "src"
+    index = tmp_path / "index.json"
+    old = 1_000_000_000_000_000_000
+    for directory in [src, src / "build", src / "dist", src / "venv"]:
+        os.utime(directory, ns=(old, old))
+
+    expected = [pathlib.Path("dist"), pathlib.Path("venv")]
+    assert find_toplevel_package_dirs(src) == expected
+    assert find_toplevel_package_dirs(src, index=index) == expected
+
+    # Adding a `__init__.py` doesn't change the modification time of `src`
+    (src / "build" / "__init__.py").touch()
+    os.utime(src, ns=(old, old))
+    assert find_toplevel_package_dirs(src, index=index) == [
+        pathlib.Path("build"),
+        *expected,
+    ]
+
+
+def test_is_pruned(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that only paths inside pruned directories that are not packages match."""
+    monkeypatch.chdir(tmp_path)
+    _make_tree(tmp_path, ["mypkg/__init__.py", "mypkg/build/__init__.py"])
+
+    assert not is_pruned(pathlib.Path("mypkg/build/module.py"))
+    assert not is_pruned(pathlib.Path("mypkg/module.py"))
+    assert not is_pruned(pathlib.Path("build.py"))
+    assert is_pruned(pathlib.Path("build/lib/mypkg/module.py"))
+    assert is_pruned(pathlib.Path("mypkg/__pycache__/module.py"))
+    assert is_pruned(pathlib.Path("mypkg.egg-info/module.py"))
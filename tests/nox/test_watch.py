@@ -0,0 +1,102 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for watching files for changes."""
+
+import pathlib
+import threading
+import time
+
+import pytest
+
+from frequenz.repo.config.nox import _watch
+
+
+@pytest.fixture
+def project(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> pathlib.Path:
+    """Create a project with a module, a test and a configuration file.
+
+    Args:
+        tmp_path: The temporary directory to create the project in.
+        monkeypatch: The fixture to change the working directory.
+
+    Returns:
+        The project directory.
+    """
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "src" / "pkg" / "mod.py").write_text("VALUE = 1\n")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_mod.py").write_text("from pkg import mod\n")
+    (tmp_path / "setup.cfg").write_text("")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _touch_later(*actions: tuple[pathlib.Path, str | None]) -> threading.Thread:
+    def run() -> None:
+        time.sleep(0.2)
+        for path, content in actions:
+            if content is None:
+                path.unlink()
+            else:
+                path.write_text(content)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("watcher_class", ["PollingWatcher", "WatchdogWatcher"])
+def test_watcher(project: pathlib.Path, watcher_class: str) -> None:
+    """Test that changes to watched files are reported together."""
+    if watcher_class == "WatchdogWatcher":
+        pytest.importorskip("watchdog")
+    watcher = getattr(_watch, watcher_class)(
+        ["src", "tests"], ["setup.cfg"], interval=0.1
+    )
+    try:
+        assert not watcher.wait(0.3)
+
+        thread = _touch_later(
+            (project / "src" / "pkg" / "mod.py", "VALUE = 2\n"),
+            (project / "src" / "pkg" / "new.py", ""),
+            (project / "tests" / "test_mod.py", None),
+            (project / "src" / "pkg" / "data.txt", "ignored"),
+            (project / "setup.cfg", "[flake8]\n"),
+        )
+        changed = watcher.wait(5)
+        thread.join()
+    finally:
+        watcher.close()
+
+    assert changed == [
+        pathlib.Path("setup.cfg"),
+        pathlib.Path("src/pkg/mod.py"),
+        pathlib.Path("src/pkg/new.py"),
+        pathlib.Path("tests/test_mod.py"),
+    ]
+
+
+@pytest.mark.usefixtures("project")
+def test_plan() -> None:
+    """Test that only the checks affected by the changes are planned."""
+    kwargs = {
+        "source_paths": ["src"],
+        "test_paths": ["tests"],
+        "config_files": ["setup.cfg"],
+    }
+
+    plan = _watch.plan([pathlib.Path("src/pkg/mod.py")], **kwargs)
+    assert plan.files == ["src/pkg/mod.py"]
+    assert plan.tests == ["tests/test_mod.py"]
+
+    plan = _watch.plan([pathlib.Path("src/pkg/deleted.py")], **kwargs)
+    assert not plan.files
+    assert not plan.tests
+
+    plan = _watch.plan(
+        [pathlib.Path("src/pkg/mod.py"), pathlib.Path("setup.cfg")], **kwargs
+    )
+    assert plan.files is None
+    assert plan.tests is None
@@ -0,0 +1,202 @@
+# License: MIT
+# Copyright © 2023 Frequenz Energy-as-a-Service GmbH
+
+"""Tests for the GitHub utilities."""
+
+import dataclasses
+import http.server
+import json
+import subprocess
+import threading
+import urllib.error
+import urllib.parse
+from collections.abc import Iterator
+
+import pytest
+
+from frequenz.repo.config import github
+
+
+@dataclasses.dataclass
+class _FakeApi:
+    """A local stand-in for the GitHub API, serving the tags and branches of a repo."""
+
+    url: str
+    """The URL of the API."""
+
+    refs: dict[str, list[str]]
+    """The names of the `tags` and `branches` of the `org/repo` repository."""
+
+    requests: list[tuple[str, str | None]] = dataclasses.field(default_factory=list)
+    """The path and `Authorization` header of each request received."""
+
+    barrier: threading.Barrier | None = None
+    """If set, the first page of each kind waits for the others to be requested."""
+
+    link_url: str | None = None
+    """The URL of the API used in the `Link` headers, if not `url`."""
+
+
+@pytest.fixture
+def fake_api(monkeypatch: pytest.MonkeyPatch) -> Iterator[_FakeApi]:
+    """Start a local stand-in for the GitHub API and use it.
+
+    Args:
+        monkeypatch: The fixture to set the environment variables.
+
+    Yields:
+        The fake API.
+    """
+    refs = {
+        "tags": [f"v1.{i}.0" for i in range(250)],
+        "branches": [f"v{i}.x.x" for i in range(150)],
+    }
+    api: _FakeApi
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        """Serve the tags and branches, paginated like the GitHub API."""
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            """Serve a page of tags or branches."""
+            url = urllib.parse.urlsplit(self.path)
+            api.requests.append((self.path, self.headers.get("Authorization")))
+            query = dict(urllib.parse.parse_qsl(url.query))
+            kind = url.path.removeprefix("/repos/org/repo/")
+            if kind not in api.refs:
+                self.send_error(404)
+                return
+            page, per_page = int(query.get("page", "1")), int(query["per_page"])
+            if page == 1 and api.barrier is not None:
+                try:
+                    api.barrier.wait()
+                except threading.BrokenBarrierError:
+                    self.send_error(500, "The requests were not concurrent")
+                    return
+            names = api.refs[kind][(page - 1) * per_page : page * per_page]
+            body = json.dumps([{"name": n, "commit": {}} for n in names]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if page * per_page < len(api.refs[kind]):
+                base = f"{api.link_url or api.url}{url.path}?per_page={per_page}"
+                self.send_header(
+                    "Link",
+                    f'<{base}&page={page + 1}>; rel="next", <{base}>; rel="first"',
+                )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_: object) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    api = _FakeApi(url=f"http://127.0.0.1:{server.server_address[1]}", refs=refs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("GITHUB_API_URL", api.url)
+    monkeypatch.setenv("GITHUB_TOKEN", "secret")
+    for name in ("GH_TOKEN", "TAGS", "BRANCHES"):
+        monkeypatch.delenv(name, raising=False)
+    try:
+        yield api
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_get_tags_and_branches(fake_api: _FakeApi) -> None:
+    """Test that all the pages are fetched, with the tags and branches concurrently."""
+    fake_api.barrier = threading.Barrier(2, timeout=5)
+
+    tags, branches = github.get_tags_and_branches("org/repo")
+
+    assert tags == fake_api.refs["tags"]
+    assert branches == fake_api.refs["branches"]
+    assert sorted(fake_api.requests) == [
+        ("/repos/org/repo/branches?per_page=100", "Bearer secret"),
+        ("/repos/org/repo/branches?per_page=100&page=2", "Bearer secret"),
+        ("/repos/org/repo/tags?per_page=100", "Bearer secret"),
+        ("/repos/org/repo/tags?per_page=100&page=2", "Bearer secret"),
+        ("/repos/org/repo/tags?per_page=100&page=3", "Bearer secret"),
+    ]
+
+
+def test_get_tags_and_branches_from_env(
+    fake_api: _FakeApi, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the environment variables are used instead of the API."""
+    monkeypatch.setenv("TAGS", "v1.0.0 v1.1.0")
+    assert github.get_tags_and_branches("org/repo") == (
+        ["v1.0.0", "v1.1.0"],
+        fake_api.refs["branches"],
+    )
+    assert all("/branches" in path for path, _ in fake_api.requests)
+
+    fake_api.requests.clear()
+    monkeypatch.setenv("BRANCHES", "v1.x.x")
+    assert github.get_tags_and_branches("org/repo") == (
+        ["v1.0.0", "v1.1.0"],
+        ["v1.x.x"],
+    )
+    assert not fake_api.requests
+
+
+def test_get_tags_and_branches_gets_token_once(
+    fake_api: _FakeApi, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the token of `gh` is only requested once for tags and branches."""
+    monkeypatch.delenv("GITHUB_TOKEN")
+    calls: list[object] = []
+
+    def gh_auth_token(*args: object, **_: object) -> bytes:
+        calls.append(args)
+        return b"gh-secret\n"
+
+    monkeypatch.setattr(subprocess, "check_output", gh_auth_token)
+
+    github.get_tags_and_branches("org/repo")
+
+    assert len(calls) == 1
+    assert {auth for _, auth in fake_api.requests} == {"Bearer gh-secret"}
+
+
+def test_token_not_sent_to_other_hosts(fake_api: _FakeApi) -> None:
+    """Test that the token is not sent to next pages in another host."""
+    port = urllib.parse.urlsplit(fake_api.url).port
+    fake_api.link_url = f"http://localhost:{port}"
+
+    assert github.get_tags("org/repo") == fake_api.refs["tags"]
+    assert fake_api.requests == [
+        ("/repos/org/repo/tags?per_page=100", "Bearer secret"),
+        ("/repos/org/repo/tags?per_page=100&page=2", None),
+        ("/repos/org/repo/tags?per_page=100&page=3", None),
+    ]
+
+
+def test_get_tags_without_token(
+    fake_api: _FakeApi, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the token of `gh` is used if there is no token in the environment."""
+    monkeypatch.delenv("GITHUB_TOKEN")
+    fake_api.refs["tags"] = ["v1.0.0"]
+
+    def gh_auth_token(*_: object, **__: object) -> bytes:
+        return b"gh-secret\n"
+
+    monkeypatch.setattr(subprocess, "check_output", gh_auth_token)
+    assert github.get_tags("org/repo") == ["v1.0.0"]
+
+    def gh_not_installed(*_: object, **__: object) -> bytes:
+        raise FileNotFoundError("gh")
+
+    monkeypatch.setattr(subprocess, "check_output", gh_not_installed)
+    assert github.get_tags("org/repo") == ["v1.0.0"]
+    assert [auth for _, auth in fake_api.requests] == ["Bearer gh-secret", None]
+
+
+@pytest.mark.usefixtures("fake_api")
+def test_get_branches_error() -> None:
+    """Test that errors from the API are raised."""
+    with pytest.raises(urllib.error.HTTPError, match="404"):
+        github.get_branches("org/unknown")
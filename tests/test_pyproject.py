@@ -3,9 +3,12 @@
 
 """Tests for the pyproject.toml file."""
 
+import os
+import pathlib
+import time
 import tomllib
 
-from frequenz.repo.config import RepositoryType
+from frequenz.repo.config import RepositoryType, _pyproject
 
 from . import utils
 
@@ -22,3 +25,35 @@ def test_optional_dependencies() -> None:
         if k != "dev" and not k.startswith("dev-") and not k.startswith("extra-")
     }
     assert defined == expected, utils.MSG_UNEXPECTED_REPO_TYPES
+
+
+def test_load_cached(tmp_path: pathlib.Path) -> None:
+    """Test that the file is parsed again only when it changes."""
+    path = tmp_path / "pyproject.toml"
+    path.write_text('[project]\ndependencies = ["a>=1"]\n')
+    old = time.time_ns() - 10_000_000_000
+    os.utime(path, ns=(old, old))
+
+    pyproject = _pyproject.load(path)
+    assert pyproject.dependencies == ["a>=1"]
+    assert pyproject.build_requires == ["setuptools>=40.8.0"]
+    assert not pyproject.pytest_testpaths
+    assert not pyproject.tool("frequenz-repo-config", "protobuf")
+    assert _pyproject.load(path) is pyproject
+
+    path.write_text('[project]\ndependencies = ["a>=2"]\n')
+    os.utime(path, ns=(old, old))
+    assert _pyproject.load(path) is pyproject
+
+    os.utime(path, ns=(old + 1, old + 1))
+    assert _pyproject.load(path).dependencies == ["a>=2"]
+
+
+def test_load_recently_modified(tmp_path: pathlib.Path) -> None:
+    """Test that files modified right before being parsed are not cached."""
+    path = tmp_path / "pyproject.toml"
+    path.write_text("[tool.pytest.ini_options]\ntestpaths = ['tests']\n")
+
+    pyproject = _pyproject.load(path)
+    assert pyproject.pytest_testpaths == ["tests"]
+    assert _pyproject.load(path) is not pyproject
@@ -4,12 +4,15 @@
 """Tests for the version module."""
 
 import dataclasses
+import math
+import random
 
 import pytest
 import semver
 
 from frequenz.repo.config.version import (
     BranchVersion,
+    RepoVersionIndex,
     RepoVersionInfo,
     _build_branches,
     _build_tags,
@@ -31,6 +34,10 @@ from frequenz.repo.config.version import (
         ("1.0.0-alpha+build.1", semver.Version(1, 0, 0, "alpha", "build.1")),
         ("1.0.x", None),
         ("blah", None),
+        ("v01.0.0", None),
+        ("1.0.0-", None),
+        ("1.0.0-alpha..1", None),
+        ("release-1.0.0", None),
     ],
 )
 def test_to_semver(version: str, expected: semver.Version | None) -> None:
@@ -101,6 +108,31 @@ def test_branch_version_comparison(branch_1: str, branch_2: str) -> None:
     assert br1 < br2
 
 
+def test_branch_version_sort_key() -> None:
+    """Test the sort key of BranchVersion is ordered like the branches."""
+    major = BranchVersion(major=1, name="v1.x.x")
+    minor = BranchVersion(major=1, minor=99, name="v1.99.x")
+    assert major.sort_key > minor.sort_key
+    assert max([major, minor], key=lambda b: b.sort_key) is major
+    assert BranchVersion(major=2, minor=0, name="v2.0.x").sort_key > major.sort_key
+    assert "sort_key" not in repr(major)
+    assert dataclasses.replace(minor, minor=None).sort_key == (1, 1, 0, "v1.99.x")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        minor.sort_key = major.sort_key  # type: ignore[misc]
+
+    rng = random.Random(42)
+    branches = [
+        BranchVersion(major=rng.randrange(5), minor=minor, name=f"b{i}")
+        for i in range(200)
+        for minor in [rng.choice([None, *range(5)])]
+    ]
+    # Major branches are like minor branches with an infinite minor
+    assert sorted(branches) == sorted(
+        branches,
+        key=lambda b: (b.major, math.inf if b.minor is None else b.minor, b.name),
+    )
+
+
 @pytest.mark.parametrize(
     ["tags", "expected"],
     [
@@ -151,6 +183,35 @@ def test_build_branches(
     assert _build_branches(branches) == expected
 
 
+def test_build_tags_sort_order() -> None:
+    """Test _build_tags() sorts the tags like comparing the versions does."""
+    rng = random.Random(42)
+    tags = [
+        f"v{rng.randrange(3)}.{rng.randrange(3)}.{rng.randrange(3)}"
+        + rng.choice(["", "-1", "-10", "-2.a", "-alpha", "-alpha.1", "-alpha.beta"])
+        + rng.choice(["", "+build.1", "+build.2"])
+        for _ in range(300)
+    ]
+    versions = {tag: semver.Version.parse(tag[1:]) for tag in tags}
+    # sorted() is stable, so equal versions are kept in the original order too
+    assert list(_build_tags(tags).items()) == sorted(
+        versions.items(), key=lambda item: item[1]
+    )
+
+
+def test_build_branches_sort_order() -> None:
+    """Test _build_branches() sorts the branches like comparing them does."""
+    rng = random.Random(42)
+    branches = [
+        rng.choice([f"v{rng.randrange(5)}.x.x", f"v{rng.randrange(5)}.{i % 5}.x"])
+        for i in range(100)
+    ]
+    parsed = {b: v for b in branches if (v := BranchVersion.parse(b)) is not None}
+    assert list(_build_branches(branches).items()) == sorted(
+        parsed.items(), key=lambda item: item[1]
+    )
+
+
 _test_tags_1 = [
     "v0.0.1",
     "v0.1.0",
@@ -588,3 +649,95 @@ def test_repo_version(
         repo_version_info.find_next_breaking_branch()
         == case.expected.next_breaking_branch
     )
+
+
+def _random_repo(rng: random.Random) -> tuple[list[str], list[str]]:
+    """Make random tags and branches, with many equal versions.
+
+    Args:
+        rng: The random number generator.
+
+    Returns:
+        The tags and branches.
+    """
+    tags = [
+        f"v{rng.randrange(3)}.{rng.randrange(3)}.{rng.randrange(3)}"
+        + rng.choice(["", "", "-rc.1", "-rc.2"])
+        + rng.choice(["", "+build.1", "+build.2"])
+        for _ in range(rng.randrange(30))
+    ]
+    branches = [
+        rng.choice([f"v{rng.randrange(3)}.x.x", f"v{rng.randrange(3)}.{i % 3}.x"])
+        for i in range(rng.randrange(10))
+    ]
+    return tags, branches
+
+
+def _check_branch_queries(info: RepoVersionInfo, branch: BranchVersion) -> None:
+    """Check the queries at a branch against scanning all the tags.
+
+    Args:
+        info: The repository information.
+        branch: The current branch.
+    """
+    all_tags = list(info.tags.values())
+    matching = [t for t in all_tags if t.major == branch.major]
+    if branch.minor is not None:
+        matching = [t for t in matching if t.minor == branch.minor]
+    # `is` checks the first of equal tags is returned, like `max()`
+    assert info.find_last_tag() is (max(matching) if matching else None)
+    if branch.minor is None:
+        stable = [
+            t.minor
+            for t in all_tags
+            if t.major == branch.major and t.prerelease is None
+        ]
+        assert info.find_next_minor_for_major_branch() == (
+            max(stable) + 1 if stable else 0
+        )
+    latest = sorted(info.branches.values(), reverse=True)
+    assert info.is_branch_latest() == (bool(latest) and branch == latest[0])
+
+
+def _check_tag_queries(info: RepoVersionInfo, tag: semver.Version) -> None:
+    """Check the queries at a tag against scanning all the tags.
+
+    Args:
+        info: The repository information.
+        tag: The current tag.
+    """
+    same_kind = [
+        t
+        for t in info.tags.values()
+        if (t.prerelease is None) == (tag.prerelease is None)
+    ]
+    minor_tags = [t for t in same_kind if t.major == tag.major]
+    assert info.is_tag_last_minor_for_major() == (
+        not minor_tags or tag >= max(minor_tags, key=lambda t: t.minor)
+    )
+    latest = sorted(same_kind, reverse=True)
+    assert info.is_tag_latest() == (bool(latest) and tag == latest[0])
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_repo_version_matches_scan(seed: int) -> None:
+    """Test that the indexed queries give the same results as scanning the tags."""
+    tags, branches = _random_repo(random.Random(seed))
+    refs = [f"refs/tags/{t}" for t in tags] + [f"refs/heads/{b}" for b in branches]
+    refs += ["refs/tags/v9.9.9", "refs/heads/v9.x.x", "refs/heads/v9.9.x"]
+    for ref in refs:
+        info = RepoVersionInfo("sha", ref, tags, branches)
+        if (tag := info.current_tag) is not None:
+            _check_tag_queries(info, tag)
+        elif (branch := info.current_branch) is not None:
+            _check_branch_queries(info, branch)
+
+
+def test_repo_version_info_index_and_tags() -> None:
+    """Test that an index can't be given together with the tags and branches."""
+    index = RepoVersionIndex(["v1.0.0"], ["v1.x.x"])
+    info = index.info("sha", "refs/heads/v1.x.x")
+    assert info.tags is index.tags
+    assert info.current_branch == BranchVersion(major=1, minor=None, name="v1.x.x")
+    with pytest.raises(ValueError, match="Either an index or tags and branches"):
+        RepoVersionInfo("sha", "refs/heads/v1.x.x", ["v1.0.0"], index=index)